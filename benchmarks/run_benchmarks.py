@@ -0,0 +1,259 @@
+"""
+BENCHMARK SUITE OF THE SIMULATION ENGINE
+
+Times the main stages of the engine over a matrix of particle counts, influence
+radii and interaction matrix densities and writes the results to JSON:
+
+    python -m benchmarks.run_benchmarks --counts 1000,10000,100000 --output bench.json
+    python -m benchmarks.run_benchmarks --counts 1000,10000 --compare bench.json --threshold 1.25
+
+With --compare the run is checked against an earlier results file and exits with
+status 1 if a case got slower than the threshold allows.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import numpy as np
+
+# Field area per particle, same particle density as the GUI default (2000 particles on 900 x 800)
+AREA_PER_PARTICLE = 900 * 800 / 2000
+TYPE_LABELS = ["A", "B", "C", "D"]
+
+DEFAULT_COUNTS = (1000, 10000, 100000)
+DEFAULT_RADII = (25, 50)
+DEFAULT_DENSITIES = (0.25, 1.0)
+APPROXIMATE_THETA = 0.5   # accuracy parameter of the approximate force case
+
+
+def field_size(num_particles):
+    """Square field size that keeps the particle density of the GUI."""
+    side = float(np.sqrt(num_particles * AREA_PER_PARTICLE))
+    return side, side
+
+
+def random_rules(density, seed=0):
+    """Interaction dictionary with the given share of enabled pairs, drawn reproducibly."""
+    rng = np.random.default_rng(seed)
+    keys = [f"{a}_{b}" for a in TYPE_LABELS for b in TYPE_LABELS]
+    return dict(zip(keys, (rng.random(len(keys)) < density).tolist()))
+
+
+def random_forces(density, seed=0):
+    """Signed float force matrix (K, K) with the given share of non zero entries, drawn reproducibly."""
+    rng = np.random.default_rng(seed)
+    size = (len(TYPE_LABELS), len(TYPE_LABELS))
+    return np.where(rng.random(size) < density, rng.uniform(-1.0, 1.0, size), 0.0)
+
+
+def time_call(function, repeat=5, min_time=0.05):
+    """
+    Times a callable like timeit: calls per repeat are chosen so that one repeat takes about min_time.
+
+    Args:
+        - function: callable without arguments
+        - repeat: number of timed repeats
+        - min_time: target duration of one repeat in seconds
+
+    Returns:
+        - dict: 'min', 'median' and 'mean' seconds per call and the 'number' of calls per repeat
+    """
+    start = time.perf_counter()
+    function()   # warm up (numba compilation, caches) and calibrate
+    single = max(time.perf_counter() - start, 1e-9)
+    number = max(1, int(min_time / single))
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        samples.append((time.perf_counter() - start) / number)
+    return {'min': min(samples), 'median': statistics.median(samples),
+            'mean': statistics.fmean(samples), 'number': number}
+
+
+def make_field(num_particles, radius, backend="kdtree", seed=0):
+    """Creates a seeded field of the benchmark size with every influence radius set to radius."""
+    from particle_simulation.main_classes import ParticleField
+
+    width, height = field_size(num_particles)
+    field = ParticleField(width, height, num_particles, backend=backend, seed=seed)
+    field.store.influence_radii.fill(radius)
+    field.interactions.build_spatial_index()
+    return field
+
+
+def benchmark_cases(counts, radii, densities, backend="kdtree"):
+    """
+    Yields (name, parameters, setup) for every benchmark case.
+
+    setup() builds the field and returns the callable that is timed.
+    """
+    def generate(n):
+        field = make_field(n, DEFAULT_RADII[0], backend)
+        return field.generate_particles
+
+    def random_walk(n):
+        return make_field(n, DEFAULT_RADII[0], backend).random_walk
+
+    def render(n):
+        import pygame
+        from particle_simulation.renderer import ParticleRenderer
+
+        field = make_field(n, DEFAULT_RADII[0], backend)
+        width, height = field_size(n)
+        renderer = ParticleRenderer(min(width, 4096), min(height, 4096))   # offscreen, no window needed
+        target = pygame.Surface((renderer.width, renderer.height))
+        return lambda: renderer.draw(target, field.store.positions, field.store.colors_rgb())
+
+    def build_index(n, radius):
+        return make_field(n, radius, backend).interactions.build_spatial_index
+
+    def neighbor_query(n, radius):
+        field = make_field(n, radius, backend)
+        probes = [field.particles[i] for i in range(0, n, max(1, n // 100))]   # 100 query particles
+        return lambda: [field.interactions.find_particles_within_reactionradius(p) for p in probes]
+
+    def forces(method):
+        def setup(n, radius, density):
+            field = make_field(n, radius, backend)
+            rules = random_forces(density) if method.startswith("apply_forces") else random_rules(density)
+            if method == "apply_forces_approximate":
+                field.interactions.approximate = APPROXIMATE_THETA
+                field.interactions.build_spatial_index()   # the index only covers the exact near zone
+            apply = field.interactions.apply_forces if method.startswith("apply_forces") \
+                else getattr(field.interactions, method)
+            start = field.store.positions.copy()
+
+            def call():
+                # every call starts from the same arrangement, otherwise the field clusters further with every
+                # call and the timing depends on how many calls time_call chose (the copy is a plain memcpy)
+                np.copyto(field.store.positions, start)
+                apply(rules)
+            return call
+        return setup
+
+    for n in counts:
+        yield "generate_particles", {'particles': n}, lambda n=n: generate(n)
+        yield "random_walk", {'particles': n}, lambda n=n: random_walk(n)
+        yield "render_offscreen", {'particles': n}, lambda n=n: render(n)
+        for radius in radii:
+            yield "build_spatial_index", {'particles': n, 'radius': radius}, \
+                lambda n=n, r=radius: build_index(n, r)
+            yield "find_particles_within_reactionradius", {'particles': n, 'radius': radius}, \
+                lambda n=n, r=radius: neighbor_query(n, r)
+            for density in densities:
+                for method in ("attract_particles", "repel_particles", "apply_forces", "apply_forces_approximate"):
+                    yield method, {'particles': n, 'radius': radius, 'density': density}, \
+                        lambda n=n, r=radius, d=density, m=method: forces(m)(n, r, d)
+
+
+def case_key(result):
+    """Identifies a case independently of its timings, used to match runs in compare()."""
+    return (result['name'], result['backend'], tuple(sorted(result['params'].items())))
+
+
+def run_benchmarks(counts=DEFAULT_COUNTS, radii=DEFAULT_RADII, densities=DEFAULT_DENSITIES, backend="kdtree",
+                   repeat=5, min_time=0.05, only=None, log=None):
+    """
+    Runs all benchmark cases.
+
+    Args:
+        - counts, radii, densities: parameter matrix of the cases
+        - backend: force backend of interaction_effects
+        - repeat, min_time: timing settings, see time_call
+        - only: optional list of case names to run
+        - log: optional callable receiving one progress line per case
+
+    Returns:
+        - dict: machine info and the list of case results
+    """
+    results = []
+    for name, params, setup in benchmark_cases(counts, radii, densities, backend):
+        if only and name not in only:
+            continue
+        timing = time_call(setup(), repeat=repeat, min_time=min_time)
+        result = {'name': name, 'backend': backend, 'params': params, **timing}
+        results.append(result)
+        if log:
+            log(f"{name:40s} {json.dumps(params):60s} {timing['median'] * 1e3:10.3f} ms")
+    return {
+        'created': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'results': results,
+    }
+
+
+def compare(current, baseline, threshold=1.25):
+    """
+    Finds cases that got slower than threshold times the baseline median.
+
+    Args:
+        - current, baseline: result dicts of run_benchmarks
+        - threshold: allowed slowdown factor
+
+    Returns:
+        - list: (name, params, baseline seconds, current seconds) of the regressed cases
+    """
+    previous = {case_key(result): result for result in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        before = previous.get(case_key(result))
+        if before and result['median'] > threshold * before['median']:
+            regressions.append((result['name'], result['params'], before['median'], result['median']))
+    return regressions
+
+
+def _int_list(text):
+    return [int(value) for value in text.split(",")]
+
+
+def _float_list(text):
+    return [float(value) for value in text.split(",")]
+
+
+def build_parser():
+    """Creates the command line parser of the benchmark suite."""
+    parser = argparse.ArgumentParser(description="Benchmark the stages of the particle simulation engine")
+    parser.add_argument("--counts", type=_int_list, default=list(DEFAULT_COUNTS), help="comma separated particle counts")
+    parser.add_argument("--radii", type=_float_list, default=list(DEFAULT_RADII), help="comma separated influence radii")
+    parser.add_argument("--densities", type=_float_list, default=list(DEFAULT_DENSITIES),
+                        help="comma separated shares of enabled interaction pairs")
+    parser.add_argument("--backend", choices=("kdtree", "numba"), default="kdtree", help="force backend")
+    parser.add_argument("--repeat", type=int, default=5, help="timed repeats per case")
+    parser.add_argument("--min-time", type=float, default=0.05, help="target seconds per repeat")
+    parser.add_argument("--only", default=None, help="comma separated case names to run")
+    parser.add_argument("--output", default="benchmarks.json", help="JSON file the results are written to")
+    parser.add_argument("--compare", default=None, help="earlier results file to check for regressions")
+    parser.add_argument("--threshold", type=float, default=1.25, help="allowed slowdown factor for --compare")
+    return parser
+
+
+def main(argv=None):
+    """Command line entry point of the benchmark suite."""
+    args = build_parser().parse_args(argv)
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")   # offscreen rendering only
+    report = run_benchmarks(args.counts, args.radii, args.densities, backend=args.backend, repeat=args.repeat,
+                            min_time=args.min_time, only=args.only.split(",") if args.only else None, log=print)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"{len(report['results'])} cases written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        for name, params, before, after in regressions:
+            print(f"REGRESSION {name} {json.dumps(params)}: {before * 1e3:.3f} ms -> {after * 1e3:.3f} ms")
+        if regressions:
+            sys.exit(1)
+    return report
+
+
+if __name__ == "__main__":
+    main()
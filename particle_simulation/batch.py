@@ -0,0 +1,295 @@
+"""
+HEADLESS BATCH RUNNER
+
+Runs the particle physics without a window, GUI panel or frame cap:
+
+    python -m particle_simulation.batch --particles 5000 --steps 2000 --attract A_B,B_C --repel C_A --seed 42
+    python -m particle_simulation.batch --particles 5000 --steps 2000 --attract all --record runs/a --record-every 10
+    python -m particle_simulation.batch --particles 5000 --steps 2000 --attract all --metrics runs/a.csv --metrics-every 50
+    python -m particle_simulation.batch --particles 5000 --steps 20000 --attract all --stop-on-convergence
+"""
+import argparse
+import json
+import time
+from particle_simulation.main_classes import ParticleField, interaction_effects
+from particle_simulation.domain import StripDecomposition
+from particle_simulation.trajectory import TrajectoryWriter
+from particle_simulation.checkpoint import load_checkpoint, save_checkpoint
+from particle_simulation.species import SpeciesRegistry
+from particle_simulation.interaction_matrix import InteractionMatrix
+from particle_simulation.metrics import MetricsWriter, field_metrics
+from particle_simulation.convergence import ConvergenceMonitor
+
+TYPE_LABELS = ["A", "B", "C", "D"]
+
+# Same defaults as the sliders of the GUI
+DEFAULT_PARAMS = {
+    'base_speed': 0.2,
+    'influence_radius': 50,
+    'attraction_strength': 0.5,
+    'species_radii': False,
+}
+
+
+def empty_matrix(labels=TYPE_LABELS):
+    """Returns an interaction dictionary with every pair disabled (same layout as the GUI matrices)."""
+    return {f"{a}_{b}": False for a in labels for b in labels}
+
+
+def parse_matrix(text, labels=TYPE_LABELS):
+    """
+    Parses a comma separated list of enabled pairs into an interaction dictionary.
+
+    A pair can carry a weight after a colon (e.g. "A_B:0.5" or "C_A:-1"), the
+    weight scales the force of the pair and a negative weight flips its direction.
+
+    Args:
+        - text: e.g. "A_B,C_D:0.5", "all" or "none" (empty string means none)
+        - labels: species labels the pairs may use
+
+    Returns:
+        - dict: interaction dictionary as used by ParticleGUI, True for pairs without weight
+
+    Raises:
+        - ValueError: if a pair is not of the form X_Y with known types or its weight is not a number
+    """
+    matrix = empty_matrix(labels)
+    text = text.strip()
+    if text.lower() == "all":
+        return {key: True for key in matrix}
+    if text.lower() in ("", "none"):
+        return matrix
+    for entry in text.split(","):
+        key, _, weight = entry.partition(":")
+        key = key.strip().upper()
+        if key not in matrix:
+            raise ValueError(f"Unknown interaction pair: {key}")
+        matrix[key] = float(weight) if weight.strip() else True
+    return matrix
+
+
+def format_matrix(matrix):
+    """Inverse of parse_matrix: comma separated list of the enabled pairs, with the weight unless it is 1."""
+    enabled = [key if float(value) == 1.0 else f"{key}:{float(value):g}" for key, value in matrix.items() if value]
+    return ",".join(enabled) if enabled else "none"
+
+
+def run_batch(num_particles, width, height, steps, interaction_matrix, repulsion_matrix,
+              seed=None, backend="kdtree", params=None, domains=None, record=None, record_every=1,
+              resume=None, checkpoint=None, species=None, approximate=None, metrics=None, metrics_every=100,
+              convergence=None, stop_on_convergence=False):
+    """
+    Runs a headless simulation for a fixed number of steps.
+
+    Args:
+        - num_particles: number of particles in the field
+        - width, height: size of the field
+        - steps: number of physics steps to run
+        - interaction_matrix: dict of enabled attractions (e.g. {'A_B': True}) or text for parse_matrix,
+          None for none (or the saved one when resuming)
+        - repulsion_matrix: dict of enabled repulsions, same as interaction_matrix
+        - seed: seed for the random generators, a random seed is drawn if None
+        - backend: force backend of interaction_effects
+        - params: dict with 'base_speed', 'influence_radius', 'attraction_strength', 'species_radii', missing values
+          are taken from the checkpoint when resuming, otherwise from DEFAULT_PARAMS
+        - domains: if set, split the field into this many strips simulated by worker processes
+        - record: if set, directory the positions of every record_every-th step are recorded to
+        - record_every: step interval of the recorded frames
+        - resume: checkpoint file to continue from, replaces num_particles, width, height and seed
+        - checkpoint: file the final state is saved to
+        - species: number of particle species K (see SpeciesRegistry.generate), the classic four if None
+        - approximate: theta of the approximate far field forces (see interaction_effects), exact if None;
+          not supported together with domains
+        - metrics: if set, CSV file one row of structure metrics (see metrics.field_metrics) is appended
+          to every metrics_every steps; not supported together with domains
+        - metrics_every: step interval of the metrics rows
+        - convergence: ConvergenceMonitor that watches the run, a default one if None and stop_on_convergence is set;
+          not supported together with domains
+        - stop_on_convergence: end the run as soon as the monitor reports convergence
+
+    Returns:
+        - tuple: (ParticleField after the run, summary dict)
+    """
+    if domains and approximate is not None:
+        raise ValueError("Approximate forces are not supported by the domain decomposition")
+    if domains and metrics:
+        raise ValueError("Metrics are not supported by the domain decomposition")
+    if stop_on_convergence and convergence is None:
+        convergence = ConvergenceMonitor()
+    if domains and convergence is not None:
+        raise ValueError("Convergence detection is not supported by the domain decomposition")
+    if metrics and metrics_every < 1:
+        raise ValueError("metrics_every must be at least 1")
+    start = time.perf_counter()
+    start_step = 0
+    if resume:
+        restored = load_checkpoint(resume, backend=backend, approximate=approximate)
+        field, start_step = restored.field, restored.step
+        num_particles, width, height = field.num_particles, field.width, field.height
+        saved_params = {key: value for key, value in restored.params.items() if key in DEFAULT_PARAMS}
+        interaction_matrix = interaction_matrix if interaction_matrix is not None else restored.interaction_matrix
+        repulsion_matrix = repulsion_matrix if repulsion_matrix is not None else restored.repulsion_matrix
+    else:
+        field = ParticleField(width, height, num_particles, backend=backend, seed=seed,
+                              species=SpeciesRegistry.generate(species) if species else None, approximate=approximate)
+        saved_params = {}
+    labels = field.species.labels
+    interaction_matrix = interaction_matrix if interaction_matrix is not None else empty_matrix(labels)
+    repulsion_matrix = repulsion_matrix if repulsion_matrix is not None else empty_matrix(labels)
+    if isinstance(interaction_matrix, str):
+        interaction_matrix = parse_matrix(interaction_matrix, labels)
+    if isinstance(repulsion_matrix, str):
+        repulsion_matrix = parse_matrix(repulsion_matrix, labels)
+    # dense matrices, so every step reuses the force matrix instead of reading the dictionaries again
+    interaction_matrix = InteractionMatrix.from_rules(interaction_matrix, labels)
+    repulsion_matrix = InteractionMatrix.from_rules(repulsion_matrix, labels)
+    params = {**DEFAULT_PARAMS, **saved_params, **(params or {})}
+    seed = field.seed
+    field.apply_params(params)
+    setup_time = time.perf_counter() - start
+
+    recorder = None
+    if record:
+        recorder = TrajectoryWriter(record, field.store, width, height, steps, every=record_every, seed=seed)
+        recorder.record(field.store.positions, 0)
+    metrics_writer = MetricsWriter(metrics) if metrics else None
+
+    steps_run = steps
+    start = time.perf_counter()
+    if domains:
+        with StripDecomposition(field, n_strips=domains, seed=seed) as decomposition:
+            if recorder:
+                # run in chunks of record_every steps, the workers are idle while a frame is written
+                for done in range(record_every, steps + 1, record_every):
+                    decomposition.step(interaction_matrix, repulsion_matrix, steps=record_every)
+                    recorder.record(decomposition.positions, done)
+                if steps % record_every:
+                    decomposition.step(interaction_matrix, repulsion_matrix, steps=steps % record_every)
+            else:
+                decomposition.step(interaction_matrix, repulsion_matrix, steps=steps)
+    else:
+        for step in range(1, steps + 1):
+            field.step(interaction_matrix, repulsion_matrix)
+            if recorder:
+                recorder.record(field.store.positions, step)
+            row = None
+            if metrics_writer and step % metrics_every == 0:
+                row = field_metrics(field)           # reuses the pairs of this step
+                metrics_writer.write(start_step + step, row)
+            if convergence is not None and convergence.update(start_step + step, field, row) and stop_on_convergence:
+                steps_run = step
+                break
+    elapsed = time.perf_counter() - start
+    if recorder:
+        recorder.close()
+    if metrics_writer:
+        metrics_writer.close()
+    if checkpoint:
+        save_checkpoint(checkpoint, field, interaction_matrix, repulsion_matrix, params, step=start_step + steps_run)
+
+    summary = {
+        'num_particles': num_particles,
+        'width': width,
+        'height': height,
+        'steps': steps,
+        'steps_run': steps_run,
+        'start_step': start_step,
+        'seed': seed,
+        'backend': backend,
+        'domains': domains,
+        'approximate': approximate,
+        'species': len(field.species),
+        'record': record,
+        'recorded_frames': recorder.frames if recorder else 0,
+        'metrics': metrics,
+        'metrics_rows': metrics_writer.rows if metrics_writer else 0,
+        'converged': convergence.converged if convergence is not None else None,
+        'converged_step': convergence.converged_step if convergence is not None else None,
+        'attract': format_matrix(interaction_matrix),
+        'repel': format_matrix(repulsion_matrix),
+        **params,
+        'setup_seconds': setup_time,
+        'run_seconds': elapsed,
+        'steps_per_second': steps_run / elapsed if elapsed > 0 else float('inf'),
+    }
+    return field, summary
+
+
+def build_parser():
+    """Creates the command line parser of the batch runner."""
+    parser = argparse.ArgumentParser(description="Headless particle simulation without display or frame cap")
+    parser.add_argument("--particles", type=int, default=2000, help="number of particles")
+    parser.add_argument("--width", type=float, default=900, help="field width")
+    parser.add_argument("--height", type=float, default=800, help="field height")
+    parser.add_argument("--steps", type=int, default=1000, help="number of physics steps")
+    parser.add_argument("--attract", default=None,
+                        help="enabled attractions, e.g. A_B,C_D:0.5 or all/none (default none, or the saved ones)")
+    parser.add_argument("--repel", default=None,
+                        help="enabled repulsions, e.g. A_B,C_D or all/none (default none, or the saved ones)")
+    parser.add_argument("--speed", type=float, default=None,
+                        help=f"random walk step size (default {DEFAULT_PARAMS['base_speed']})")
+    parser.add_argument("--radius", type=float, default=None,
+                        help=f"influence radius (default {DEFAULT_PARAMS['influence_radius']})")
+    parser.add_argument("--species-radii", action="store_true", default=None,
+                        help="every species keeps its own influence radius instead of --radius")
+    parser.add_argument("--strength", type=float, default=None,
+                        help=f"interaction strength (default {DEFAULT_PARAMS['attraction_strength']})")
+    parser.add_argument("--seed", type=int, default=None, help="random seed (drawn and reported if omitted)")
+    parser.add_argument("--species", type=int, default=None,
+                        help="number of particle species, the classic A-D first, then E, F, ... (default 4)")
+    parser.add_argument("--backend", choices=interaction_effects.BACKENDS, default="kdtree",
+                        help="force backend")
+    parser.add_argument("--approximate", type=float, default=None, metavar="THETA",
+                        help="aggregate distant neighbors per grid cell and species, smaller THETA is more accurate "
+                             "(e.g. 0.5, default exact forces)")
+    parser.add_argument("--domains", type=int, default=None,
+                        help="split the field into this many strips, each simulated by its own process")
+    parser.add_argument("--record", default=None,
+                        help="record the positions to this trajectory directory (replay with run_sim --replay)")
+    parser.add_argument("--record-every", type=int, default=1, help="record every k-th step")
+    parser.add_argument("--metrics", default=None,
+                        help="append cluster counts, nearest neighbor distance, RDF and density histogram to this CSV")
+    parser.add_argument("--metrics-every", type=int, default=100, help="measure the metrics every k-th step")
+    parser.add_argument("--check-convergence", action="store_true",
+                        help="report whether and when displacement, kinetic energy and cluster count plateaued")
+    parser.add_argument("--stop-on-convergence", action="store_true",
+                        help="end the run once the statistics plateaued (implies --check-convergence)")
+    parser.add_argument("--convergence-window", type=int, default=50,
+                        help="number of samples the plateau is detected over")
+    parser.add_argument("--convergence-every", type=int, default=10, help="take a convergence sample every k-th step")
+    parser.add_argument("--convergence-tolerance", type=float, default=0.02,
+                        help="largest relative drift of a plateaued statistic")
+    parser.add_argument("--resume", default=None, help="continue from this checkpoint file")
+    parser.add_argument("--checkpoint", default=None, help="save the final state to this checkpoint file")
+    parser.add_argument("--output", default=None, help="write the run summary as JSON to this file")
+    return parser
+
+
+def main(argv=None):
+    """Command line entry point of the headless runner."""
+    args = build_parser().parse_args(argv)
+    params = {name: value for name, value in (('base_speed', args.speed),
+                                              ('influence_radius', args.radius),
+                                              ('attraction_strength', args.strength),
+                                              ('species_radii', args.species_radii)) if value is not None}
+    convergence = None
+    if args.check_convergence or args.stop_on_convergence:
+        convergence = ConvergenceMonitor(window=args.convergence_window, tolerance=args.convergence_tolerance,
+                                         every=args.convergence_every)
+    _, summary = run_batch(args.particles, args.width, args.height, args.steps, args.attract, args.repel,
+                           seed=args.seed, backend=args.backend, params=params, domains=args.domains,
+                           record=args.record, record_every=args.record_every,
+                           resume=args.resume, checkpoint=args.checkpoint, species=args.species,
+                           approximate=args.approximate, metrics=args.metrics,
+                           metrics_every=args.metrics_every, convergence=convergence,
+                           stop_on_convergence=args.stop_on_convergence)
+
+    print(json.dumps(summary, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(summary, f, indent=2)
+    return summary
+
+
+if __name__ == "__main__":
+    main()
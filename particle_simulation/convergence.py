@@ -0,0 +1,119 @@
+"""Detection of converged or static simulations
+
+A run has converged when nothing changes any more on average: the field has
+collapsed into static clumps, only random-walks without interactions, or
+settled into a steady flow. ConvergenceMonitor samples a few cheap statistics
+every k steps and reports convergence once none of them drifts over a sliding
+window, so headless runs and sweeps can stop instead of simulating frozen
+states.
+"""
+from collections import deque
+import numpy as np
+from particle_simulation.metrics import field_metrics
+from particle_simulation.spatial_index import minimum_image
+
+STATISTICS = ("mean_displacement", "kinetic_energy", "clusters")
+
+
+class ConvergenceMonitor:
+    """
+    Tracks cheap statistics of a field over a sliding window and detects when they plateau.
+
+    Every every steps one sample is taken:
+    - mean_displacement: mean distance a particle moved per step since the last sample
+    - kinetic_energy: mean squared displacement per step, a proxy of the kinetic energy
+    - clusters: total number of clusters of all species (see metrics.field_metrics)
+
+    A statistic has plateaued when the means of the older and the newer half of the
+    window differ by less than tolerance times the mean of the window. The run has
+    converged once the window is full and every statistic has plateaued.
+
+    Attributes:
+        - window: number of samples compared
+        - tolerance: largest relative drift of a plateaued statistic
+        - every: steps between two samples
+        - history: dict of deques with the last window samples of every statistic
+        - converged_step: step at which convergence was first detected, None before
+    """
+    def __init__(self, window=50, tolerance=0.02, every=10):
+        if window < 2 or every < 1:
+            raise ValueError("window must be at least 2 and every at least 1")
+        self.window = window
+        self.tolerance = tolerance
+        self.every = every
+        self.history = {name: deque(maxlen=window) for name in STATISTICS}
+        self.converged_step = None
+        self._previous = None       # positions at the last sample
+        self._previous_step = None
+
+    @property
+    def converged(self):
+        """True once convergence was detected."""
+        return self.converged_step is not None
+
+    def reset(self):
+        """Forgets all samples, e.g. after the particle count or the matrices changed."""
+        for samples in self.history.values():
+            samples.clear()
+        self.converged_step = None
+        self._previous = None
+        self._previous_step = None
+
+    def update(self, step, field, metrics=None):
+        """
+        Takes a sample if step is a multiple of every and checks for convergence.
+
+        Args:
+            - step: physics steps run so far
+            - field: ParticleField after the step
+            - metrics: dict of field_metrics for this step if it was already computed (avoids computing it twice)
+
+        Returns:
+            - bool: True if the run has converged
+        """
+        if step % self.every:
+            return self.converged
+        positions = field.store.positions
+        if self._previous is None or self._previous.shape != positions.shape:
+            self.reset()            # first sample, or particles were added or removed
+            self._previous = positions.copy()
+            self._previous_step = step
+            return False
+
+        steps = step - self._previous_step
+        delta = minimum_image(positions - self._previous, np.array([field.width, field.height]))
+        moved = np.hypot(delta[:, 0], delta[:, 1]) / steps
+        metrics = metrics if metrics is not None else field_metrics(field)
+        clusters = sum(count for name, count in metrics.items() if name.startswith("clusters_"))
+        for name, value in (("mean_displacement", moved.mean()), ("kinetic_energy", np.mean(moved ** 2)),
+                            ("clusters", clusters)):
+            self.history[name].append(float(value))
+        np.copyto(self._previous, positions)
+        self._previous_step = step
+
+        if self.converged_step is None and all(self._plateaued(samples) for samples in self.history.values()):
+            self.converged_step = step
+        return self.converged
+
+    def _plateaued(self, samples):
+        if len(samples) < self.window:
+            return False
+        values = np.asarray(samples)
+        half = len(values) // 2
+        drift = abs(values[half:].mean() - values[:half].mean())
+        return drift <= self.tolerance * max(abs(values.mean()), 1e-12)
+
+    def statistics(self):
+        """
+        Summary of the current window.
+
+        Returns:
+            - dict: mean of every statistic over the window, the standard deviation of the
+              cluster count and the converged step
+        """
+        summary = {name: float(np.mean(samples)) if samples else float('nan')
+                   for name, samples in self.history.items()}
+        clusters = self.history["clusters"]
+        summary['clusters_std'] = float(np.std(clusters)) if clusters else float('nan')
+        summary['converged_step'] = self.converged_step
+        return summary
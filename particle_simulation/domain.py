@@ -0,0 +1,277 @@
+"""Spatial domain decomposition of a ParticleField over worker processes
+"""
+import multiprocessing
+import os
+from multiprocessing import shared_memory
+import numpy as np
+from scipy.spatial import cKDTree
+from particle_simulation.interaction_kernels import force_matrix, pair_displacements
+from particle_simulation.spatial_index import wrap_into_box
+
+
+def _attach(spec):
+    """Maps a (name, shape, dtype) shared memory spec to an array, returns (SharedMemory, array)."""
+    name, shape, dtype = spec
+    block = shared_memory.SharedMemory(name=name)
+    return block, np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+
+def strip_distance(x, x_min, x_max, width):
+    """
+    Horizontal distance of every x coordinate to the strip [x_min, x_max) on the wrapped field.
+
+    Args:
+        - x: float array of x coordinates
+        - x_min, x_max: borders of the strip
+        - width: field width
+
+    Returns:
+        - numpy.ndarray: 0 inside the strip, otherwise the shorter way to the strip
+    """
+    left = np.mod(x_min - x, width)     # distance when the strip lies to the right
+    right = np.mod(x - x_max, width)    # distance when the strip lies to the left
+    inside = (x >= x_min) & (x < x_max)
+    return np.where(inside, 0.0, np.minimum(left, right))
+
+
+# Per-particle columns kept in shared memory, every one exists twice (the current rows and the migration buffer)
+COLUMNS = (("positions", np.float64, 2), ("type_ids", np.intp, 1), ("step_sizes", np.float64, 1),
+           ("strengths", np.float64, 1), ("radii", np.float64, 1), ("ids", np.intp, 1), ("keys", np.float64, 1))
+
+
+def strip_of(x, width, n_strips):
+    """Number of the vertical strip every x coordinate lies in."""
+    return np.minimum((x * (n_strips / width)).astype(np.intp), n_strips - 1)
+
+
+def band_rows(keys, x_min, x_max, reach, width):
+    """
+    Rows whose key lies within reach of the strip [x_min, x_max) on the wrapped field, the strip itself excluded.
+
+    Args:
+        - keys: float array sorted in ascending order (x coordinates in [0, width))
+        - x_min, x_max: borders of the strip
+        - reach: width of the band on either side
+        - width: field width
+
+    Returns:
+        - numpy.ndarray: int array with the rows of the two bands (binary search, no scan over all keys)
+    """
+    if 2 * reach + (x_max - x_min) >= width:   # the bands cover the whole field
+        return np.concatenate([np.arange(np.searchsorted(keys, x_min)),
+                               np.arange(np.searchsorted(keys, x_max), len(keys))])
+    intervals = []
+    for low, high in ((x_min - reach, x_min), (x_max, x_max + reach)):
+        low, high = low % width, high % width if high % width else width
+        intervals += [(low, high)] if low < high else [(low, width), (0.0, high)]
+    return np.concatenate([np.arange(*np.searchsorted(keys, interval)) for interval in intervals])
+
+
+def _strip_forces(positions, type_ids, strengths, radii, rule_matrix, min_distance, boxsize, n_owned):
+    """Displacement of the first n_owned particles, computed from them plus the halo rows after them."""
+    tree = cKDTree(wrap_into_box(positions, boxsize), boxsize=boxsize)
+    pairs = tree.query_pairs(radii.max(), output_type='ndarray')
+    displacement = pair_displacements(positions, type_ids, strengths, radii, rule_matrix, min_distance,
+                                      pairs[:, 0], pairs[:, 1], boxsize=boxsize)
+    return displacement[:n_owned]
+
+
+def _strip_worker(strip, n_strips, specs, counts_spec, bounds, width, height, min_distance, seed_seq, barrier,
+                  commands, done):
+    """
+    Worker process owning the vertical strip number strip.
+
+    The rows of every buffer are ordered by strip and, within a strip, by the x
+    coordinate at the last migration (the keys), so the rows of a strip are one
+    contiguous range and the border bands of its neighbors are found by binary
+    search. A worker only touches its own rows and the bands it reads. Every step
+    runs in three phases separated by barriers, so no worker reads rows another
+    worker is writing:
+    1. random walk of the owned rows (in place in the current buffer)
+    2. forces from the owned rows plus the halo bands, then the number of moved
+       particles headed for every strip is published
+    3. every worker writes its particles to the range of their new strip in the
+       migration buffer, then sorts its new range back into the current buffer
+       (nobody reads the current buffer before the next random walk barrier)
+    The halo reach (largest influence radius plus twice the largest random walk
+    step, since keys and positions differ by at most one step) comes with the command.
+    """
+    blocks, arrays = zip(*(_attach(spec) for spec in specs))
+    current = dict(zip((name for name, _, _ in COLUMNS), arrays[:len(COLUMNS)]))
+    moving = dict(zip((name for name, _, _ in COLUMNS), arrays[len(COLUMNS):]))
+    counts_block, counts = _attach(counts_spec)     # (n_strips, n_strips): particles of strip k headed for j
+    boxsize = np.array([width, height], dtype=np.float64)
+    x_min, x_max = strip * width / n_strips, (strip + 1) * width / n_strips
+    start, end = bounds[strip], bounds[strip + 1]
+    rng = np.random.default_rng(seed_seq)
+
+    try:
+        while True:
+            command = commands.get()
+            if command[0] == "stop":
+                break
+            _, steps, forces, reach = command
+            for _ in range(steps):
+                own = slice(start, end)
+                step_sizes = current["step_sizes"][own]
+                velocity = rng.uniform(-1.0, 1.0, size=(end - start, 2)) * step_sizes[:, None]
+                current["positions"][own] = np.mod(current["positions"][own] + velocity, boxsize)
+                barrier.wait()
+
+                moved = current["positions"][own]
+                if end > start and forces.any():
+                    rows = np.concatenate([np.arange(start, end),
+                                           band_rows(current["keys"], x_min, x_max, reach, width)])
+                    moved = moved + _strip_forces(current["positions"][rows], current["type_ids"][rows],
+                                                  current["strengths"][rows], current["radii"][rows], forces,
+                                                  min_distance, boxsize, end - start)
+                moved = np.mod(moved, boxsize)
+                target = strip_of(moved[:, 0], width, n_strips)
+                counts[strip] = np.bincount(target, minlength=n_strips)
+                barrier.wait()
+
+                # new range of every strip, this worker writes after the particles of the lower strips
+                totals = counts.sum(axis=0)
+                new_bounds = np.concatenate([[0], np.cumsum(totals)])
+                offsets = new_bounds[:-1] + counts[:strip].sum(axis=0)
+                order = np.argsort(target, kind='stable')
+                first = offsets - np.cumsum(counts[strip]) + counts[strip]
+                rows = np.repeat(first, counts[strip]) + np.arange(end - start)
+                for name, _, _ in COLUMNS:
+                    moving[name][rows] = moved[order] if name == "positions" else current[name][own][order]
+                start, end = new_bounds[strip], new_bounds[strip + 1]
+                barrier.wait()
+
+                own = slice(start, end)
+                order = np.argsort(moving["positions"][own, 0], kind='stable')
+                for name, _, _ in COLUMNS:
+                    current[name][own] = moving[name][own][order]
+                current["keys"][own] = current["positions"][own, 0]
+            done.put(strip)
+    except Exception as error:
+        barrier.abort()   # release the other workers instead of leaving them waiting forever
+        done.put(f"strip {strip}: {error!r}")
+        raise
+    finally:
+        for block in (*blocks, counts_block):
+            block.close()
+
+
+class StripDecomposition:
+    """
+    Runs the physics of a ParticleField in worker processes, one vertical strip each.
+
+    The particle data lives in multiprocessing shared memory, ordered by strip and
+    by x within a strip, so every worker owns one contiguous range of rows and reads
+    the halo as the border bands of its neighbors; no particle data is pickled
+    between processes. Particles that cross a strip border migrate to the range of
+    their new strip at the end of every step, so the work per step is proportional
+    to the particles of a strip plus its halo, not to all particles. Use as a
+    context manager or call close() to copy the positions back into the field and
+    free the shared memory.
+
+    Attributes:
+        - field: ParticleField whose store is simulated
+        - n_strips: number of worker processes / strips
+        - positions: current positions (N, 2) in the order of the field store (a copy)
+    """
+    def __init__(self, field, n_strips=None, seed=None):
+        self.field = field
+        self.n_strips = n_strips or os.cpu_count()
+        store = field.store
+        n = len(store)
+        strips = strip_of(store.positions[:, 0], field.width, self.n_strips)
+        ids = np.lexsort((store.positions[:, 0], strips))   # by strip, then by x
+        sources = {"positions": store.positions, "type_ids": store.type_ids, "step_sizes": store.step_sizes,
+                   "strengths": store.influence_strengths, "radii": store.influence_radii,
+                   "ids": np.arange(n), "keys": store.positions[:, 0]}
+
+        self._blocks = []
+        arrays = []
+        for _ in range(2):
+            for name, dtype, width in COLUMNS:
+                shape = (n, width) if width > 1 else (n,)
+                array = self._shared(shape, dtype)
+                array[...] = sources[name][ids]
+                arrays.append(array)
+        self._current = dict(zip((name for name, _, _ in COLUMNS), arrays[:len(COLUMNS)]))
+        counts = self._shared((self.n_strips, self.n_strips), np.intp)
+        counts[...] = 0
+        specs = [(block.name, array.shape, array.dtype) for block, array in zip(self._blocks, arrays)]
+        counts_spec = (self._blocks[-1].name, counts.shape, counts.dtype)
+
+        # spawn fresh workers: forked children inherit the numba threading layer in a broken state
+        context = multiprocessing.get_context("spawn")
+        bounds = np.concatenate([[0], np.cumsum(np.bincount(strips, minlength=self.n_strips))]).tolist()
+        self._barrier = context.Barrier(self.n_strips)   # keep a reference until the workers have attached
+        self._done = context.Queue()
+        self._commands = [context.Queue() for _ in range(self.n_strips)]
+        seeds = np.random.SeedSequence(seed).spawn(self.n_strips)
+        self._workers = [
+            context.Process(target=_strip_worker, daemon=True,
+                            args=(k, self.n_strips, specs, counts_spec, bounds, field.width, field.height,
+                                  store.min_distance, seeds[k], self._barrier, self._commands[k], self._done))
+            for k in range(self.n_strips)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def _shared(self, shape, dtype):
+        # array in a new shared memory block, freed by close()
+        block = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize))
+        self._blocks.append(block)
+        return np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+    @property
+    def positions(self):
+        """Current positions (N, 2) in the order of the field store."""
+        positions = np.empty_like(self._current["positions"])
+        positions[self._current["ids"]] = self._current["positions"]
+        return positions
+
+    def step(self, interaction_matrix=None, repulsion_matrix=None, steps=1, forces=None):
+        """
+        Advances the simulation by the given number of steps in all workers.
+
+        Args:
+            - interaction_matrix: dict of attractions (e.g. {'A_B': True} or {'A_B': 0.5})
+            - repulsion_matrix: dict of repulsions
+            - steps: number of steps to run before returning
+            - forces: signed float matrix (K, K) used instead of the two dictionaries
+        """
+        store = self.field.store
+        # the workers are idle between calls, so the GUI parameters can be copied in safely (in strip order)
+        ids = self._current["ids"]
+        self._current["step_sizes"][:] = store.step_sizes[ids]
+        self._current["strengths"][:] = store.influence_strengths[ids]
+        self._current["radii"][:] = store.influence_radii[ids]
+        if forces is None:
+            forces = force_matrix(interaction_matrix or {}, repulsion_matrix or {}, store.type_labels)
+        reach = float(store.influence_radii.max() + 2 * store.step_sizes.max()) if len(store) else 0.0
+        for commands in self._commands:
+            commands.put(("run", steps, np.asarray(forces, dtype=np.float64), reach))
+        for _ in self._workers:
+            result = self._done.get()
+            if isinstance(result, str):
+                raise RuntimeError(f"Domain worker failed: {result}")
+
+    def close(self):
+        """Copies the positions back into the field store, stops the workers and frees the shared memory."""
+        if not self._blocks:
+            return
+        self.field.store.positions[:] = self.positions
+        for commands in self._commands:
+            commands.put(("stop",))
+        for worker in self._workers:
+            worker.join()
+        self._current = None
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -1,5 +1,6 @@
 import pygame
 from pygame.locals import *
+from particle_simulation.interaction_matrix import InteractionMatrix
 
 class ParticleGUI:
     """A graphical user interface (GUI) for controlling particle simulation parameters.
@@ -13,13 +14,16 @@ class ParticleGUI:
         gui_width (int): Width reserved for the control panel on the right side.
         font (pygame.Font): Font object used for all text rendering.
         colors (dict): Color scheme dictionary with RGB values for GUI elements.
-        interaction_matrix (dict): Tracks attraction states between particle type pairs.
-        repulsion_matrix (dict): Tracks repulsion states between particle type pairs.
+        interaction_matrix (InteractionMatrix): Attraction states between particle type pairs.
+        repulsion_matrix (InteractionMatrix): Repulsion states between particle type pairs.
         params (dict): Current simulation parameters controlled by GUI elements.
         controls (dict): Geometry and state information for all interactive elements.
+        stage_summary (dict): Rolling stage time percentiles shown in the profiler overlay, None hides it.
+        type_labels (list): Species labels shown as rows and columns of the matrices.
+        panel (pygame.Surface): Cached drawing of the control panel, only changed sections are redrawn.
     """
      
-    def __init__(self, screen_width, screen_height):
+    def __init__(self, screen_width, screen_height, type_labels=("A", "B", "C", "D")):
         """Initialize GUI with default values and layout parameters.
         
         Sets up color schemes, interaction matrices, and default parameter values.
@@ -28,11 +32,17 @@ class ParticleGUI:
         Args:
             screen_width (int): Total width of main application window
             screen_height (int): Total height of main application window
+            type_labels (list): Species labels, one matrix row and column each
         """
         self.screen_width = screen_width
         self.screen_height = screen_height
         self.gui_width = 300
         self.font = pygame.font.Font(None, 24)
+        self.small_font = pygame.font.Font(None, 17)
+        self.stage_summary = None
+        self.panel = None         # created on the first draw
+        self._drawn = {}          # section name -> state the cached panel shows
+        self._text_cache = {}     # (font, text) -> rendered surface
         
         # Colors
         self.colors = {
@@ -42,21 +52,10 @@ class ParticleGUI:
             'active': (100, 150, 200)
         }
         
-        # Interaction matrix state (full 4x4 for attraction)
-        self.interaction_matrix = {
-            'A_A': False, 'A_B': False, 'A_C': False, 'A_D': False,
-            'B_A': False, 'B_B': False, 'B_C': False, 'B_D': False,
-            'C_A': False, 'C_B': False, 'C_C': False, 'C_D': False,
-            'D_A': False, 'D_B': False, 'D_C': False, 'D_D': False
-        }
-
-        # Repulsion matrix state (now full 4x4)
-        self.repulsion_matrix = {
-            'A_A': False, 'A_B': False, 'A_C': False, 'A_D': False,
-            'B_A': False, 'B_B': False, 'B_C': False, 'B_D': False,
-            'C_A': False, 'C_B': False, 'C_C': False, 'C_D': False,
-            'D_A': False, 'D_B': False, 'D_C': False, 'D_D': False
-        }
+        # Interaction matrix states (full K x K for attraction and repulsion)
+        self.type_labels = list(type_labels)
+        self.interaction_matrix = InteractionMatrix(self.type_labels)
+        self.repulsion_matrix = InteractionMatrix(self.type_labels)
 
         # Parameter defaults
         self.params = {
@@ -68,6 +67,7 @@ class ParticleGUI:
 
         self.params['repulsion'] = False
         self.params['attraction'] = False 
+        self.params['species_radii'] = False   # True: every species keeps its own influence radius
 
     def create_controls(self):
         """Initialize positions and dimensions for all GUI components.
@@ -75,15 +75,16 @@ class ParticleGUI:
         Creates three main control sections:
         1. Interaction matrices (attraction and repulsion grids)
         2. Parameter sliders (number of particles, speed, radius, strength)
-        3. Control buttons (reset, pause, repulsion, attract)
+        3. Control buttons (reset, pause, repulsion, attract, species radii) in two columns
         
         Stores geometry in self.controls dictionary for later drawing.
         """
+        button_x = self.screen_width - self.gui_width + 20
         self.controls = {
-            # Interaction Matrix
+            # Interaction Matrix (cells shrink so that up to 16 species fit into 160 pixels)
             'matrix': {
-                'x': 20, 'y': 20, 'cell_size': 40, 
-                'particles': ['A', 'B', 'C', 'D']
+                'x': 20, 'y': 20, 'cell_size': min(40, 160 // max(1, len(self.type_labels))),
+                'particles': list(self.type_labels)
             },
             
             # Sliders
@@ -94,47 +95,93 @@ class ParticleGUI:
                 {'label': "Strength", 'min': 0.1, 'max': 1.0, 'value': 0.5, 'y': 650}
             ],
             
-            # Buttons (added Repulsion and Attract)
+            # Buttons (two columns below the sliders, inside the window)
             'buttons': [
-                {'label': "Reset", 'rect': pygame.Rect(990, 700, 120, 40)},
-                {'label': "Pause", 'rect': pygame.Rect(990, 750, 120, 40)},
-                {'label': "Repulsion", 'rect': pygame.Rect(990, 800, 120, 40)},
-                {'label': "Attract", 'rect': pygame.Rect(990, 850, 120, 40)}
+                {'label': "Reset", 'rect': pygame.Rect(button_x, 680, 125, 34)},
+                {'label': "Pause", 'rect': pygame.Rect(button_x + 135, 680, 125, 34)},
+                {'label': "Repulsion", 'rect': pygame.Rect(button_x, 720, 125, 34)},
+                {'label': "Attract", 'rect': pygame.Rect(button_x + 135, 720, 125, 34)},
+                {'label': "Type radii", 'rect': pygame.Rect(button_x, 760, 125, 34)}
             ]
         }
 
+    def sections(self):
+        """Independently cached parts of the control panel.
+        
+        Returns:
+            list: (name, screen rect, state, draw method) per section, a section is
+            redrawn when its state differs from the state it was last drawn with
+        """
+        x = self.screen_width - self.gui_width
+        return [
+            ('matrices', pygame.Rect(x, 0, self.gui_width, 386),
+             (id(self.interaction_matrix), self.interaction_matrix.version,
+              id(self.repulsion_matrix), self.repulsion_matrix.version),
+             lambda panel: (self.draw_interaction_matrix(panel), self.draw_repulsion_matrix(panel))),
+            ('profile', pygame.Rect(x, 386, self.gui_width, 86), self.stage_summary,
+             lambda panel: self.draw_profile_overlay(panel) if self.stage_summary else None),
+            ('sliders', pygame.Rect(x, 472, self.gui_width, 200),
+             tuple(slider['value'] for slider in self.controls['sliders']), self.draw_sliders),
+            ('buttons', pygame.Rect(x, 672, self.gui_width, self.screen_height - 672),
+             (self.params.get('paused'), self.params['repulsion'], self.params['attraction'],
+              self.params.get('species_radii')), self.draw_buttons),
+        ]
+
+    def invalidate(self):
+        """Forget the cached panel, the next draw() redraws and returns every section."""
+        self._drawn = {}
+
     def draw(self, screen):
-        """Master drawing method that renders all GUI components.
+        """Master drawing method that puts the control panel on the screen.
+        
+        The panel is drawn into a cached surface. Only the sections whose matrix
+        cells, slider values, button states or stage times changed since the last
+        call are redrawn (with their text) and copied to the screen, so an
+        unchanged panel costs nothing per frame.
         
-        Execution order:
-        1. Draw right-side background panel
-        2. Draw interaction matrices
-        3. Draw parameter sliders
-        4. Draw control buttons
+        Sections from top to bottom:
+        1. Interaction matrices
+        2. Profiler overlay (if stage times are set)
+        3. Parameter sliders
+        4. Control buttons
         
         Args:
             screen (pygame.Surface): Main display surface to draw on
+        
+        Returns:
+            list: pygame.Rect areas of the screen that changed, for pygame.display.update
         """
-        # Draw background panel
-        pygame.draw.rect(screen, self.colors['background'], 
-                         (self.screen_width - self.gui_width, 0, 
-                          self.gui_width, self.screen_height))
-        
-        # Draw interaction matrices
-        self.draw_interaction_matrix(screen)
-        self.draw_repulsion_matrix(screen)
+        if self.panel is None or self.panel.get_size() != (self.screen_width, self.screen_height):
+            # screen sized so that the draw methods can use screen coordinates; only the panel area is used
+            self.panel = pygame.Surface((self.screen_width, self.screen_height))
+            self._drawn = {}
+        dirty = []
+        for name, rect, state, draw_section in self.sections():
+            if name in self._drawn and self._drawn[name] == state:
+                continue
+            self.panel.fill(self.colors['background'], rect)
+            draw_section(self.panel)
+            self._drawn[name] = state
+            screen.blit(self.panel, rect, rect)
+            dirty.append(rect)
+        return dirty
 
-        # Draw sliders
-        self.draw_sliders(screen)
-        
-        # Draw buttons
-        self.draw_buttons(screen)
+    def _render_text(self, text, font=None):
+        """Render text in the panel color, cached because font rendering is slow on some machines."""
+        font = font or self.font
+        key = (id(font), text)
+        surface = self._text_cache.get(key)
+        if surface is None:
+            if len(self._text_cache) > 512:
+                self._text_cache.clear()   # slider values produce new strings while dragging
+            surface = self._text_cache[key] = font.render(text, True, self.colors['text'])
+        return surface
 
     def draw_interaction_matrix(self, screen):
         """Render the upper matrix controlling attraction between particles.
         
         Visual layout:
-        - 4x4 grid (A-D x A-D) in upper right panel
+        - K x K grid (one row and column per species) in upper right panel
         - Columns represent other particle types
         - Rows represent current particle type
         - Active cells (interactions) shown in blue
@@ -145,33 +192,33 @@ class ParticleGUI:
         matrix = self.controls['matrix']
         start_x = self.screen_width - self.gui_width + matrix['x']
         start_y = matrix['y']
-        title_text = self.font.render("Attraction", True, self.colors['text'])
+        title_text = self._render_text("Attraction")
         screen.blit(title_text, (start_x + 170, start_y + 70)) # Title position next to matrix
 
         # Draw labels
+        label_font = self.font if matrix['cell_size'] >= 20 else self.small_font
         for i, p in enumerate(matrix['particles']):
-            text = self.font.render(p, True, self.colors['text'])
+            text = self._render_text(p, label_font)
             screen.blit(text, (start_x + i * matrix['cell_size'], start_y - 20))
             screen.blit(text, (start_x - 20, start_y + i * matrix['cell_size']))
         
-        # Draw grid (full 4x4)
-        for i, p1 in enumerate(matrix['particles']):
-            for j, p2 in enumerate(matrix['particles']):
+        # Draw grid (full K x K)
+        for i in range(len(matrix['particles'])):
+            for j in range(len(matrix['particles'])):
                 rect = pygame.Rect(
                     start_x + j * matrix['cell_size'],
                     start_y + i * matrix['cell_size'],
                     matrix['cell_size'] - 2,
                     matrix['cell_size'] - 2
                 )
-                key = f"{p1}_{p2}"
-                color = self.colors['active'] if self.interaction_matrix[key] else self.colors['button']
+                color = self.colors['active'] if self.interaction_matrix.values[i, j] else self.colors['button']
                 pygame.draw.rect(screen, color, rect)
 
     def draw_repulsion_matrix(self, screen):
         """Render the lower matrix controlling repulsion between particles.
         
         Visual layout:
-        - Full 4x4 grid (A-D x A-D) positioned 200px lower than the attraction matrix.
+        - Full K x K grid positioned 200px lower than the attraction matrix.
         - Uses the same color scheme but tracks separate repulsion interaction states.
         
         Args:
@@ -180,28 +227,48 @@ class ParticleGUI:
         matrix = self.controls['matrix']
         start_x = self.screen_width - self.gui_width + matrix['x']
         start_y = matrix['y'] + 200
-        title_text = self.font.render("Repulsion", True, self.colors['text'])
+        title_text = self._render_text("Repulsion")
         screen.blit(title_text, (start_x + 170, start_y + 70)) # Title position next to matrix
 
         # Draw labels
+        label_font = self.font if matrix['cell_size'] >= 20 else self.small_font
         for i, p in enumerate(matrix['particles']):
-            text = self.font.render(p, True, self.colors['text'])
+            text = self._render_text(p, label_font)
             screen.blit(text, (start_x + i * matrix['cell_size'], start_y - 20))
             screen.blit(text, (start_x - 20, start_y + i * matrix['cell_size']))
         
-        # Draw full grid (full 4x4)
-        for i, p1 in enumerate(matrix['particles']):
-            for j, p2 in enumerate(matrix['particles']):
+        # Draw full grid (full K x K)
+        for i in range(len(matrix['particles'])):
+            for j in range(len(matrix['particles'])):
                 rect = pygame.Rect(
                     start_x + j * matrix['cell_size'],
                     start_y + i * matrix['cell_size'],
                     matrix['cell_size'] - 2,
                     matrix['cell_size'] - 2
                 )
-                key = f"{p1}_{p2}"
-                color = self.colors['active'] if self.repulsion_matrix[key] else self.colors['button']
+                color = self.colors['active'] if self.repulsion_matrix.values[i, j] else self.colors['button']
                 pygame.draw.rect(screen, color, rect)
 
+    def draw_profile_overlay(self, screen):
+        """Render the rolling 50th and 95th percentile of every frame stage in milliseconds.
+        
+        Visual layout:
+        - One line per stage below the repulsion matrix (y 388-470)
+        - Stage name, p50 and p95 in separate columns
+        
+        Args:
+            screen (pygame.Surface): Surface to draw the overlay on
+        """
+        x = self.screen_width - self.gui_width + 20
+        y = 388
+        for name, percentiles in list(self.stage_summary.items())[:7]:
+            if not percentiles:
+                continue
+            columns = (name, f"p50 {percentiles[50] * 1e3:6.2f}", f"p95 {percentiles[95] * 1e3:6.2f} ms")
+            for offset, column in zip((0, 110, 180), columns):
+                screen.blit(self._render_text(column, self.small_font), (x + offset, y))
+            y += 12
+
     def draw_sliders(self, screen):
         """Render parameter adjustment sliders with current values.
         
@@ -224,8 +291,7 @@ class ParticleGUI:
                                   (slider['max'] - slider['min']))
             pygame.draw.circle(screen, self.colors['active'], (int(handle_x), y), 8)
             # Draw label
-            label = self.font.render(f"{slider['label']}: {slider['value']:.1f}", 
-                                     True, self.colors['text'])
+            label = self._render_text(f"{slider['label']}: {slider['value']:.1f}")
             screen.blit(label, (x, y - 25))
 
     def draw_buttons(self, screen):
@@ -233,7 +299,7 @@ class ParticleGUI:
         
         Handles two types of buttons:
         - Momentary buttons (Reset) - trigger immediate action
-        - Toggle buttons (Pause, Repulsion, Attract) - show active/inactive state
+        - Toggle buttons (Pause, Repulsion, Attract, Type radii) - show active/inactive state
         - Buttons change color when activated
         
         Args:
@@ -247,9 +313,11 @@ class ParticleGUI:
                 color = self.colors['active']
             elif button['label'] == 'Attract' and self.params['attraction']:
                 color = self.colors['active']
+            elif button['label'] == 'Type radii' and self.params['species_radii']:
+                color = self.colors['active']
 
             pygame.draw.rect(screen, color, button['rect'])
-            text = self.font.render(button['label'], True, self.colors['text'])
+            text = self._render_text(button['label'])
             text_rect = text.get_rect(center=button['rect'].center)
             screen.blit(text, text_rect)
             
@@ -279,8 +347,8 @@ class ParticleGUI:
         start_y_attract = matrix['y']  # Matrix attraction (upper)
         start_y_repel = start_y_attract + 200  # Matrix repulsion (lower)
         
-        for i in range(4):
-            for j in range(4):
+        for i in range(len(matrix['particles'])):
+            for j in range(len(matrix['particles'])):
                 rect_attract = pygame.Rect(
                     start_x + j * matrix['cell_size'],
                     start_y_attract + i * matrix['cell_size'],
@@ -294,14 +362,12 @@ class ParticleGUI:
                     matrix['cell_size']
                 )
 
-                key = f"{matrix['particles'][i]}_{matrix['particles'][j]}"
-
                 # When clicked on the upper matrix, switch attraction
                 if rect_attract.collidepoint(mouse_pos):
-                    self.interaction_matrix[key] = not self.interaction_matrix[key]
+                    self.interaction_matrix.toggle(i, j)
                 # When clicked on the lower matrix, switch repulsion
                 elif rect_repel.collidepoint(mouse_pos):
-                    self.repulsion_matrix[key] = not self.repulsion_matrix[key]
+                    self.repulsion_matrix.toggle(i, j)
 
     def handle_slider_click(self, mouse_pos):
         """Update slider values based on vertical mouse position.
@@ -330,6 +396,35 @@ class ParticleGUI:
                 elif slider['label'] == "Strength":
                     self.params['attraction_strength'] = slider['value']
 
+    def set_type_labels(self, type_labels):
+        """Switch the matrices to another set of species, e.g. after loading a checkpoint.
+        
+        Pairs of species that exist in both sets keep their state, new pairs start disabled.
+        
+        Args:
+            type_labels (list): Species labels, one matrix row and column each
+        """
+        self.type_labels = list(type_labels)
+        self.interaction_matrix = self.interaction_matrix.relabel(self.type_labels)
+        self.repulsion_matrix = self.repulsion_matrix.relabel(self.type_labels)
+        matrix = self.controls['matrix']
+        matrix['particles'] = list(self.type_labels)
+        matrix['cell_size'] = min(40, 160 // max(1, len(self.type_labels)))
+
+    def set_params(self, params):
+        """Apply saved parameter values to the GUI state and move the sliders accordingly.
+        
+        Args:
+            params (dict): Parameter values as stored in self.params (unknown keys are ignored)
+        """
+        slider_params = {"Particles": 'num_particles', "Speed": 'base_speed',
+                         "Radius": 'influence_radius', "Strength": 'attraction_strength'}
+        self.params.update({key: value for key, value in params.items() if key in self.params or key == 'paused'})
+        for slider in self.controls['sliders']:
+            key = slider_params.get(slider['label'])
+            if key in params:
+                slider['value'] = max(slider['min'], min(slider['max'], params[key]))
+
     def handle_button_click(self, mouse_pos):
         """Detect button clicks and trigger corresponding actions.
         
@@ -349,3 +444,5 @@ class ParticleGUI:
                     self.params['repulsion'] = not self.params['repulsion']  # Toggle repulsion state
                 elif button['label'] == "Attract":
                     self.params['attraction'] = not self.params['attraction']  # Toggle attraction state
+                elif button['label'] == "Type radii":
+                    self.params['species_radii'] = not self.params['species_radii']  # per-species radii, slider ignored
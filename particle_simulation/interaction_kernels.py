@@ -0,0 +1,260 @@
+"""Vectorized interaction kernels working on ParticleStore arrays
+"""
+import numpy as np
+from particle_simulation.interaction_matrix import InteractionMatrix
+from particle_simulation.spatial_index import minimum_image
+
+
+def rules_to_matrix(rules, type_labels):
+    """
+    Converts an interaction dictionary into a dense type x type matrix.
+
+    Args:
+        - rules: dict with keys like 'A_B' and boolean (or numeric) values, or an InteractionMatrix
+        - type_labels: list of type labels, the position in the list is the type id
+
+    Returns:
+        - numpy.ndarray: float matrix (K, K), entry [i, j] is the rule for type i reacting to type j
+    """
+    if isinstance(rules, InteractionMatrix):
+        return rules.matrix_for(type_labels).copy()
+    return np.array([[float(rules.get(f"{a}_{b}", False)) for b in type_labels] for a in type_labels],
+                    dtype=np.float64).reshape(len(type_labels), len(type_labels))
+
+
+def force_matrix(interaction_matrix, repulsion_matrix, type_labels):
+    """
+    Combines attraction and repulsion dictionaries into one signed force matrix.
+
+    Args:
+        - interaction_matrix: dict of attractions (e.g. {'A_B': True} or {'A_B': 0.5}) or an InteractionMatrix
+        - repulsion_matrix: dict of repulsions or an InteractionMatrix, same layout
+        - type_labels: list of type labels, the position in the list is the type id
+
+    Returns:
+        - numpy.ndarray: float matrix (K, K), positive entries attract and negative entries repel
+    """
+    return rules_to_matrix(interaction_matrix, type_labels) - rules_to_matrix(repulsion_matrix, type_labels)
+
+
+def pair_displacements(positions, type_ids, strengths, radii, rule_matrix, min_distance, pairs_i, pairs_j,
+                       boxsize=None, directed=False):
+    """
+    Computes the summed displacement of every particle caused by its neighbors.
+
+    Every pair is evaluated in both directions (only from pairs_i towards pairs_j
+    if directed is set): particle a is moved by neighbor b
+    when b lies within the influence radius of a and the rule for (type a, type b)
+    is non zero. The rule value scales the step, positive values pull a towards b
+    and negative values push it away. All displacements are computed from the same
+    positions and reduced per particle, so the result does not depend on the order
+    of the particles.
+
+    Args:
+        - positions: float array (N, 2)
+        - type_ids: int array (N,)
+        - strengths: float array (N,) with the influence strength of each particle
+        - radii: float array (N,) with the influence radius of each particle
+        - rule_matrix: float array (K, K) indexed by type ids
+        - min_distance: distance particles try to keep from each other
+        - pairs_i, pairs_j: int arrays with the candidate neighbor pairs
+        - boxsize: optional (width, height), distances then use the shortest way around the wrapped edges
+        - directed: the pairs are directed, pairs_i is moved by pairs_j (see PeriodicNeighborIndex)
+
+    Returns:
+        - numpy.ndarray: float array (N, 2) with the displacement of every particle
+    """
+    n = len(positions)
+    displacement = np.zeros((n, 2), dtype=np.float64)
+    if len(pairs_i) == 0:
+        return displacement
+
+    if directed:
+        moved, other = pairs_i, pairs_j
+    else:
+        moved = np.concatenate([pairs_i, pairs_j])     # particle that is moved
+        other = np.concatenate([pairs_j, pairs_i])     # neighbor that moves it
+
+    factor = rule_matrix[type_ids[moved], type_ids[other]]
+    delta = positions[other] - positions[moved]
+    if boxsize is not None:
+        delta = minimum_image(delta, boxsize)
+    distance = np.hypot(delta[:, 0], delta[:, 1])
+
+    active = (factor != 0) & (distance <= radii[moved])
+    if not active.any():
+        return displacement
+    moved, factor, delta, distance = moved[active], factor[active], delta[active], distance[active]
+
+    influence = strengths[moved]
+    too_close = distance - influence < min_distance   # make sure particles do not overlap
+    influence = np.where(too_close, np.abs(distance - min_distance), influence)
+
+    scale = np.zeros_like(distance)
+    np.divide(factor * influence, distance, out=scale, where=distance > 0)   # unit vector times influence
+
+    displacement[:, 0] = np.bincount(moved, weights=delta[:, 0] * scale, minlength=n)
+    displacement[:, 1] = np.bincount(moved, weights=delta[:, 1] * scale, minlength=n)
+    return displacement
+
+
+def approximation_zones(radii, theta, near_fraction=0.5):
+    """
+    Splits the influence radius of every particle into an exact near zone and an aggregated far zone.
+
+    The far zone is summed over the cells of a grid whose cells are theta times the
+    largest near zone wide, so every aggregated group is seen under an angle of at
+    most about theta (the Barnes-Hut criterion). Particles whose near zone is too
+    small for that grid keep their whole radius exact.
+
+    Args:
+        - radii: float array (N,) with the influence radius of every particle
+        - theta: accuracy parameter, larger values mean coarser groups (faster, less accurate)
+        - near_fraction: part of the radius that is always evaluated pair by pair
+
+    Returns:
+        - tuple: (near_radii, cell_size), near_radii is a float array (N,)
+    """
+    if len(radii) == 0:
+        return radii, 0.0
+    near = near_fraction * radii
+    cell_size = theta * near.max()
+    return np.where(theta * near >= cell_size, near, radii), cell_size
+
+
+def far_field_displacements(positions, type_ids, strengths, radii, near_radii, rule_matrix, width, height,
+                            cell_size):
+    """
+    Adds the pull of the neighbors between near_radii and radii to the exact near zone.
+
+    The particles are binned into a uniform grid with the count and centre of mass of
+    every species in every cell. Whole cells are classified for every particle, so
+    each neighbor is counted exactly once:
+    - cells entirely inside the near zone are left to the exact kernel
+    - cells entirely between the near zone and the influence radius pull as one group
+      per species, with the summed weight of its members towards their centre of mass
+    - cells that cross the edge of the near zone or of the influence radius are
+      evaluated pair by pair for their members between the two circles
+    The only approximation is the direction of the groups, so the error shrinks with
+    theta (the cell size relative to the near zone) and no neighbor is counted twice
+    or dropped. Neighbors beyond the near zone never come closer than min_distance,
+    so they pull with the full influence strength.
+
+    Args:
+        - positions: float array (N, 2) inside [0, width) x [0, height)
+        - type_ids: int array (N,)
+        - strengths: float array (N,)
+        - radii: float array (N,) with the influence radius of each particle
+        - near_radii: float array (N,), pairs up to this distance are left to the exact kernel
+        - rule_matrix: float array (K, K) indexed by type ids
+        - width, height: size of the (periodic) field
+        - cell_size: minimum edge length of a grid cell (see approximation_zones)
+
+    Returns:
+        - numpy.ndarray: float array (N, 2) with the far field displacement of every particle
+    """
+    n, n_types = len(positions), rule_matrix.shape[0]
+    displacement = np.zeros((n, 2), dtype=np.float64)
+    factors = rule_matrix[type_ids] * strengths[:, None]     # (N, K) weight of every species for every particle
+    active = np.flatnonzero((near_radii < radii) & factors.any(axis=1))
+    if len(active) == 0 or cell_size <= 0:
+        return displacement
+
+    n_cells_x = max(1, int(width // cell_size))
+    n_cells_y = max(1, int(height // cell_size))
+    cell_width, cell_height = width / n_cells_x, height / n_cells_y
+    cx = np.minimum((positions[:, 0] / cell_width).astype(np.intp), n_cells_x - 1)
+    cy = np.minimum((positions[:, 1] / cell_height).astype(np.intp), n_cells_y - 1)
+    n_cells = n_cells_x * n_cells_y
+
+    # count and centre of mass of every species in every cell, cells never straddle the wrapped edge
+    cell = cx * n_cells_y + cy
+    slot = cell * n_types + type_ids
+    counts = np.bincount(slot, minlength=n_cells * n_types).astype(np.float64).reshape(n_cells, n_types)
+    filled = counts > 0
+    centres_x, centres_y = (np.divide(np.bincount(slot, weights=positions[:, axis], minlength=n_cells * n_types)
+                                      .reshape(n_cells, n_types), counts, out=np.zeros_like(counts), where=filled)
+                            for axis in (0, 1))
+    # members of every cell for the pair by pair evaluation of the crossing cells
+    order = np.argsort(cell, kind='stable')
+    cell_start = np.concatenate([[0], np.cumsum(np.bincount(cell, minlength=n_cells))])
+
+    x, y = positions[active, 0], positions[active, 1]
+    near_squared, radius_squared = near_radii[active] ** 2, radii[active] ** 2
+    cx, cy, factors = cx[active], cy[active], factors[active]
+    pull_x, pull_y = np.zeros(len(active)), np.zeros(len(active))
+    largest, smallest_near = radii[active].max(), near_radii[active].min()
+
+    def offsets(reach, n_cells_axis):
+        # when the reach covers the whole axis every cell is visited once instead of wrapping twice
+        if 2 * reach + 1 <= n_cells_axis:
+            return range(-reach, reach + 1), False
+        return range(-(n_cells_axis // 2), n_cells_axis - n_cells_axis // 2), True
+
+    def lower_edge(c, offset, n_cells_axis, size, cell_extent, position, wraps):
+        # lower edge of the cell at the offset relative to the particle, in the image closest to the particle
+        edge = np.floor_divide(c + offset, n_cells_axis) * size + np.mod(c + offset, n_cells_axis) * cell_extent
+        edge = edge - position
+        if wraps:
+            edge -= size * np.round((edge + 0.5 * cell_extent) / size)
+        return edge
+
+    def gap(lower, extent):
+        # distance from the particle to the nearest and to the farthest point of the cell along one axis
+        return np.maximum(np.maximum(lower, -lower - extent), 0.0), np.maximum(np.abs(lower), np.abs(lower + extent))
+
+    offsets_x, wraps_x = offsets(int(np.ceil(largest / cell_width)), n_cells_x)
+    offsets_y, wraps_y = offsets(int(np.ceil(largest / cell_height)), n_cells_y)
+    for ox in offsets_x:
+        tx = np.mod(cx + ox, n_cells_x)
+        lower_x = lower_edge(cx, ox, n_cells_x, width, cell_width, x, wraps_x)
+        closest_x, farthest_x = gap(lower_x, cell_width)
+        shift_x = lower_x + x - tx * cell_width      # image shift of the cell (multiple of the width)
+        for oy in offsets_y:
+            closest = np.hypot(max(abs(ox) - 1, 0) * cell_width, max(abs(oy) - 1, 0) * cell_height)
+            farthest = np.hypot((abs(ox) + 1) * cell_width, (abs(oy) + 1) * cell_height)
+            if closest > largest or farthest <= smallest_near:
+                continue   # the whole cell is out of reach or inside every near zone
+            ty = np.mod(cy + oy, n_cells_y)
+            target = tx * n_cells_y + ty
+            lower_y = lower_edge(cy, oy, n_cells_y, height, cell_height, y, wraps_y)
+            closest_y, farthest_y = gap(lower_y, cell_height)
+            shift_y = lower_y + y - ty * cell_height
+            closest_squared, farthest_squared = closest_x ** 2 + closest_y ** 2, farthest_x ** 2 + farthest_y ** 2
+            # groups: cells entirely between the near zone and the influence radius,
+            # pairs: cells crossing the edge of either circle (and not entirely inside the near zone)
+            outside = (closest_squared > near_squared) & (farthest_squared <= radius_squared)
+            crossing = ~outside & (closest_squared <= radius_squared) & (farthest_squared > near_squared)
+
+            if outside.any():
+                dx = centres_x[target] + shift_x[:, None] - x[:, None]
+                dy = centres_y[target] + shift_y[:, None] - y[:, None]
+                distance_squared = dx * dx + dy * dy
+                inside = filled[target] & outside[:, None]
+                if inside.any():
+                    # summed weight of the group times the unit vector towards its centre of mass
+                    weight = np.divide(factors * counts[target], np.sqrt(distance_squared), out=np.zeros_like(dx),
+                                       where=inside)
+                    pull_x += np.einsum('nk,nk->n', weight, dx)
+                    pull_y += np.einsum('nk,nk->n', weight, dy)
+
+            # members of the crossing cells between the two circles, the exact kernel has the ones in the near zone
+            edge = np.flatnonzero(crossing)
+            first, sizes = cell_start[target[edge]], cell_start[target[edge] + 1] - cell_start[target[edge]]
+            if not sizes.any():
+                continue
+            # one entry per (particle, member) combination, members of a cell are contiguous in order
+            rows = np.repeat(edge, sizes)
+            members = order[np.repeat(first - np.cumsum(sizes) + sizes, sizes) + np.arange(len(rows))]
+            dx = positions[members, 0] + shift_x[rows] - x[rows]
+            dy = positions[members, 1] + shift_y[rows] - y[rows]
+            distance_squared = dx * dx + dy * dy
+            beyond = (distance_squared > near_squared[rows]) & (distance_squared <= radius_squared[rows])
+            rows, members, dx, dy = rows[beyond], members[beyond], dx[beyond], dy[beyond]
+            scale = factors[rows, type_ids[members]] / np.sqrt(distance_squared[beyond])
+            pull_x += np.bincount(rows, weights=dx * scale, minlength=len(active))
+            pull_y += np.bincount(rows, weights=dy * scale, minlength=len(active))
+
+    displacement[active, 0] = pull_x
+    displacement[active, 1] = pull_y
+    return displacement
@@ -0,0 +1,107 @@
+"""Dense interaction matrices indexed by type id, with a dict adapter for the GUI
+"""
+from collections.abc import MutableMapping
+import numpy as np
+
+
+class InteractionMatrix(MutableMapping):
+    """
+    One interaction kind (attraction or repulsion) as a float K x K NumPy array.
+
+    Entry [i, j] is how strongly type i reacts to type j. Every change increments
+    version, so the engine can cache tables derived from the matrix (e.g. the
+    signed force matrix) and rebuild them only after an edit.
+
+    The mapping interface with keys like 'A_B' is a thin adapter for code that
+    still works with the interaction dictionaries (GUI state, checkpoints, the
+    batch runner); the physics only reads values.
+
+    Attributes:
+        - type_labels: list of type labels, the position in the list is the type id
+        - values: float array (K, K), do not write to it directly (use set/toggle so the version changes)
+        - version: number of changes so far
+    """
+    def __init__(self, type_labels, values=None):
+        self.type_labels = list(type_labels)
+        size = len(self.type_labels)
+        self._index = {label: i for i, label in enumerate(self.type_labels)}
+        self.values = np.zeros((size, size)) if values is None else np.array(values, dtype=np.float64).reshape(size, size)
+        self.version = 0
+
+    @classmethod
+    def from_rules(cls, rules, type_labels):
+        """
+        Builds a matrix from an interaction dictionary (e.g. {'A_B': True, 'C_D': 0.5}).
+
+        Keys with labels that are not in type_labels are ignored.
+        """
+        matrix = cls(type_labels)
+        matrix.update({key: value for key, value in rules.items() if matrix._pair(key, strict=False)})
+        matrix.version = 0
+        return matrix
+
+    def _pair(self, key, strict=True):
+        first, _, second = key.partition("_")
+        if first in self._index and second in self._index:
+            return self._index[first], self._index[second]
+        if strict:
+            raise KeyError(key)
+        return None
+
+    def __getitem__(self, key):
+        i, j = self._pair(key)
+        return float(self.values[i, j])
+
+    def __setitem__(self, key, value):
+        i, j = self._pair(key)
+        self.set(i, j, value)
+
+    def __delitem__(self, key):
+        raise TypeError("interaction pairs cannot be removed, set them to 0 instead")
+
+    def __iter__(self):
+        return (f"{a}_{b}" for a in self.type_labels for b in self.type_labels)
+
+    def __len__(self):
+        return self.values.size
+
+    def set(self, i, j, value):
+        """Sets entry [i, j] by type ids."""
+        self.values[i, j] = float(value)
+        self.version += 1
+
+    def toggle(self, i, j):
+        """Switches entry [i, j] between 0 and 1 (a GUI click)."""
+        self.set(i, j, 0.0 if self.values[i, j] else 1.0)
+
+    def copy(self):
+        """Independent copy with the same values and version."""
+        matrix = InteractionMatrix(self.type_labels, self.values)
+        matrix.version = self.version
+        return matrix
+
+    def relabel(self, type_labels):
+        """New matrix for other types, pairs of types that exist in both keep their values."""
+        matrix = InteractionMatrix(type_labels)
+        shared = [label for label in type_labels if label in self._index]
+        new = [matrix._index[label] for label in shared]
+        old = [self._index[label] for label in shared]
+        matrix.values[np.ix_(new, new)] = self.values[np.ix_(old, old)]
+        return matrix
+
+    def matrix_for(self, type_labels):
+        """
+        The values in the type order of a store.
+
+        Returns:
+            - numpy.ndarray: float array (K, K), the stored array itself if the labels match (do not modify)
+        """
+        type_labels = list(type_labels)
+        if type_labels == self.type_labels:
+            return self.values
+        result = np.zeros((len(type_labels), len(type_labels)))
+        rows = [(new, self._index[label]) for new, label in enumerate(type_labels) if label in self._index]
+        if rows:
+            new, old = map(list, zip(*rows))
+            result[np.ix_(new, new)] = self.values[np.ix_(old, old)]
+        return result
@@ -1,10 +1,20 @@
 import random
-import pygame
 import math
-from scipy.spatial import cKDTree
+from collections.abc import Sequence
+import numpy as np
+from particle_simulation.interaction_kernels import (rules_to_matrix, force_matrix, pair_displacements,
+                                                     approximation_zones, far_field_displacements)
+from particle_simulation.interaction_matrix import InteractionMatrix
+from particle_simulation.spatial_index import PeriodicNeighborIndex
+from particle_simulation.profiling import NULL_TIMER
+from particle_simulation.species import SpeciesRegistry, color_range
 
 
 
+def _fresh_seed():
+    return int(np.random.SeedSequence().generate_state(1)[0])
+
+
 class ParticleField:
     """
     Main container for handling all particle interactions.
@@ -16,14 +26,31 @@ class ParticleField:
         - width: width of the particle field
         - height: height of the particle field
         - num_particles: number of particles participating in the simulation
-        - particles: list of all partile instances in the field
+        - particles: sequence of Particle views over the store, created on first access
+        - store: ParticleStore holding the particle data as contiguous arrays
+        - interactions: interaction_effects instance using the chosen backend
+        - seed: seed of the random generator, recorded so that a run can be repeated
+        - rng: numpy.random.Generator used for particle types, palette colors and the random walk
+        - timer: StageTimer the stages of step() are measured with (a no-op timer by default)
+        - species: SpeciesRegistry with the labels and default parameters of the particle types
     """
-    def __init__(self, width, height, num_particles):
+    def __init__(self, width, height, num_particles, backend="kdtree", seed=None, timer=None, store=None,
+                 species=None, approximate=None):
         self.width = width
         self.height = height
-        self.num_particles = num_particles
-        self.particles = self.generate_particles()
-        self.interactions = interaction_effects(self.particles, self.width, self.height)
+        self.num_particles = num_particles if store is None else len(store)
+        self.seed = _fresh_seed() if seed is None else seed  # a drawn seed is still reported
+        self.rng = np.random.default_rng(self.seed)
+        self._velocity = None
+        self._forces_cache = None   # (attraction, its version, repulsion, its version, force matrix)
+        self.timer = timer or NULL_TIMER
+        if species is None:
+            species = SpeciesRegistry.classic() if store is None else SpeciesRegistry.for_labels(store.type_labels)
+        self.species = species
+        self.store = self.generate_particles() if store is None else store  # a given store is restored as is
+        self.particles = ParticleViews(self.store)  # Particle objects are only created when accessed
+        self.interactions = interaction_effects(self.particles, self.width, self.height, backend=backend,
+                                                timer=self.timer, approximate=approximate)
 
 
     def generate_particles(self):
@@ -32,28 +59,177 @@ class ParticleField:
 
         This method generates particles using 3 rules:
         - distributes particles evenly along a grid
-        - randomly assigns particle types A, B, C or D
+        - randomly assigns one of the species of the registry (A, B, C, D, ...)
         - makes sure that the total count is equal to num_particles parameter
-        """
-        from particle_simulation.particle_classes import Particle_A, Particle_B, Particle_C, Particle_D  #lazy import to avoid loop
 
-        particles_list = []
+        The particle data is written straight into the store arrays, no Particle
+        objects are built.
+
+        Returns:
+            - ParticleStore: store holding the generated particles
+        """
+        species = self.species
         grid_size = math.ceil(self.num_particles**0.5)
         spacing_x = self.width / grid_size
         spacing_y = self.height / grid_size
 
-        for i in range(grid_size):
-            for j in range(grid_size):
-                if len(particles_list) < self.num_particles:
-                    x = (i + 0.5) * spacing_x
-                    y = (j + 0.5) * spacing_y
-                    particle_type = random.choice([Particle_A, Particle_B, Particle_C, Particle_D]) # <------------
-                    particles_list.append(particle_type((x, y)))
-        return particles_list
+        # grid cells column by column, cut to the number of particles
+        cell = np.arange(self.num_particles)
+        positions = np.column_stack(((cell // grid_size + 0.5) * spacing_x, (cell % grid_size + 0.5) * spacing_y))
+        type_ids = self.rng.integers(0, len(species), size=self.num_particles).astype(np.intp)
+
+        step_sizes = species.step_sizes[type_ids]
+        strengths = species.influence_strengths[type_ids]
+        radii = species.influence_radii[type_ids]
+        palette_ids = self.rng.integers(0, Particle.PALETTE_SIZE, size=self.num_particles, dtype=np.uint8)
+
+        return ParticleStore(positions, type_ids, step_sizes, strengths, radii, palette_ids,
+                             type_labels=species.labels)
+
+    def _type_values(self):
+        """
+        Per-type step size, strength and radius for new particles.
+
+        Types that already have particles copy the values of their first particle,
+        so slider settings carry over; other types use the defaults of the species registry.
+
+        Returns:
+            - tuple: three float arrays indexed by type id
+        """
+        store = self.store
+        step_sizes = self.species.step_sizes.copy()
+        strengths = self.species.influence_strengths.copy()
+        radii = self.species.influence_radii.copy()
+        types, first = np.unique(store.type_ids, return_index=True)
+        known = types < len(self.species)
+        step_sizes[types[known]] = store.step_sizes[first[known]]
+        strengths[types[known]] = store.influence_strengths[first[known]]
+        radii[types[known]] = store.influence_radii[first[known]]
+        return step_sizes, strengths, radii
+
+    def resize(self, num_particles):
+        """
+        Grows or shrinks the field in place, all remaining particles keep their state.
+
+        Removed particles are drawn at random so that the type mix and the spatial
+        arrangement stay the same on average. New particles get random positions,
+        types and colors and the parameters of their type (see _type_values).
+        The neighbor index is updated incrementally instead of being rebuilt.
+        Particle views created before the call must not be used afterwards.
+
+        Args:
+            - num_particles: new number of particles
+        """
+        store = self.store
+        current = len(store)
+        if num_particles == current:
+            return
+        if num_particles < current:
+            kept = np.sort(self.rng.choice(current, size=num_particles, replace=False))
+            store.take(kept)
+        else:
+            kept = np.arange(current)
+            added = num_particles - current
+            type_ids = self.rng.integers(0, len(self.species), size=added).astype(np.intp)
+            step_sizes, strengths, radii = self._type_values()
+            store.append(
+                positions=self.rng.random((added, 2)) * (self.width, self.height),
+                type_ids=type_ids,
+                step_sizes=step_sizes[type_ids],
+                influence_strengths=strengths[type_ids],
+                influence_radii=radii[type_ids],
+                palette_ids=self.rng.integers(0, Particle.PALETTE_SIZE, size=added, dtype=np.uint8),
+            )
+        self.num_particles = num_particles
+        self.particles.refresh()
+        self.interactions.neighbor_index.resize(store.positions, kept, store.type_ids)
+
+    def reset(self, num_particles=None, seed=None):
+        """
+        Replaces all particles by a newly generated set with a new seed.
+
+        The interaction manager (and its neighbor index) is reused, only its
+        particle data is replaced.
+
+        Args:
+            - num_particles: number of particles, unchanged if None
+            - seed: seed of the new particles, a fresh one is drawn if None
+        """
+        if num_particles is not None:
+            self.num_particles = num_particles
+        self.seed = _fresh_seed() if seed is None else seed
+        self.rng = np.random.default_rng(self.seed)
+        self.store = self.generate_particles()
+        self.particles = ParticleViews(self.store)
+        self.interactions.bind(self.particles)
+
+    def random_walk(self):
+        """
+        Moves every particle by a random step in one vectorized update
+        Each velocity component is drawn uniformly from [-step_size, step_size]
+        with one call to the seeded generator, and the new positions are wrapped
+        around the field edges in place
+        """
+        store = self.store
+        if self._velocity is None or self._velocity.shape != store.positions.shape:
+            self._velocity = np.empty_like(store.positions)
+        velocity = self.rng.random(out=self._velocity)   # uniform in [0, 1)
+        velocity -= 0.5
+        velocity *= 2.0 * store.step_sizes[:, None]
+        store.positions += velocity
+        np.mod(store.positions, (self.width, self.height), out=store.positions)
+
+    def apply_params(self, params):
+        """
+        Sets the GUI controlled parameters on all particles at once
 
+        With 'species_radii' set every particle keeps the influence radius of its
+        species (from the registry) and the radius slider is ignored, so worlds with
+        short and long range species can be simulated.
 
+        Args:
+            - params: dict with the keys 'base_speed', 'influence_radius' and 'attraction_strength',
+              optionally 'species_radii'
+        """
+        store = self.store
+        store.step_sizes.fill(params['base_speed'])
+        if params.get('species_radii'):
+            np.take(self.species.influence_radii, store.type_ids, out=store.influence_radii)
+        else:
+            store.influence_radii.fill(params['influence_radius'])
+        store.influence_strengths.fill(params['attraction_strength'])
+
+    def step(self, interaction_matrix=None, repulsion_matrix=None, forces=None):
+        """
+        Advances the simulation by one step: random movement, then one fused pass of all interaction forces
+
+        Two InteractionMatrix arguments are only combined into the force matrix again
+        after one of them changed (their version counters tell), dictionaries are
+        converted on every call.
 
- 
+        Args:
+            - interaction_matrix: InteractionMatrix or dict of attractions (e.g. {'A_B': True} or {'A_B': 0.5})
+            - repulsion_matrix: InteractionMatrix or dict of repulsions
+            - forces: signed float matrix (K, K) used instead of the two matrices
+        """
+        if forces is None:
+            forces = self._forces_for(interaction_matrix, repulsion_matrix)
+        with self.timer.stage("random_walk"):
+            self.random_walk()
+        with self.timer.stage("forces"):
+            self.interactions.apply_forces(forces)
+
+    def _forces_for(self, interaction_matrix, repulsion_matrix):
+        if not (isinstance(interaction_matrix, InteractionMatrix) and isinstance(repulsion_matrix, InteractionMatrix)):
+            return force_matrix(interaction_matrix or {}, repulsion_matrix or {}, self.store.type_labels)
+        cache = self._forces_cache
+        # the matrices themselves are kept in the cache (compared with is), so a new matrix never hits an old entry
+        if not (cache and cache[0] is interaction_matrix and cache[1] == interaction_matrix.version
+                and cache[2] is repulsion_matrix and cache[3] == repulsion_matrix.version):
+            forces = force_matrix(interaction_matrix, repulsion_matrix, self.store.type_labels)
+            cache = self._forces_cache = (interaction_matrix, interaction_matrix.version,
+                                          repulsion_matrix, repulsion_matrix.version, forces)
+        return cache[4]
 
     @staticmethod
     def move_particle(particle, velocity, width, height):
@@ -74,64 +250,113 @@ class ParticleField:
         new_y = (particle[1] + velocity[1]) % height
         return (new_x, new_y)
 
+class _StoreField:
+    """
+    Particle attribute that lives in a ParticleStore array once the particle is bound to a store.
+
+    Unbound particles keep the value in their own __dict__, so single particles
+    can still be created and used without a store.
+    """
+    def __init__(self, array_name, convert=float):
+        self.array_name = array_name
+        self.convert = convert
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, particle, owner=None):
+        if particle is None:
+            return self
+        store = particle._store
+        if store is None:
+            return particle.__dict__.get(self.name)
+        return self.convert(getattr(store, self.array_name)[particle._index])
+
+    def __set__(self, particle, value):
+        store = particle._store
+        if store is None:
+            particle.__dict__[self.name] = value
+        else:
+            getattr(store, self.array_name)[particle._index] = value
+
+
+def _as_tuple(values):
+    return tuple(float(v) for v in values)
+
+
+def _class_label(name):
+    # species label of a particle class name (Particle_A -> A), str.removeprefix needs Python 3.9
+    return name[len("Particle_"):] if name.startswith("Particle_") else name
+
+
 class Particle:
     """
     Base class representing a single particle in the simulation.
     
     Defines common properties and methods for all particle types.
     Is subclassed for specific particle behaviors.
+    Once bound to a ParticleStore the numeric attributes are read from and
+    written to the store arrays, so the particle is only a lightweight view.
     
     Attributes:
         - position: Current coordinates
         - step_size: Base movement speed per frame
         - influence_strength: Force magnitude for interactions
         - influence_radius: Detection range for other particles
-        - color: RGB color values
+        - palette_index: Index of the particle color in the palette of its type
+        - color: RGB color values, looked up in the palette of the type
         - shape: Symbol representing particle shape
         - particle_label: Type identifier
     """
+    PALETTE_SIZE = 64      # colors per type, must fit into the uint8 palette index
+    _palettes = {}         # cache of the generated palettes per particle type
+
+    position = _StoreField("positions", _as_tuple)
+    step_size = _StoreField("step_sizes")
+    influence_strength = _StoreField("influence_strengths")
+    influence_radius = _StoreField("influence_radii")
+    palette_index = _StoreField("palette_ids", int)
+
     def __init__(self, position):
+        self._store = None                                                # ParticleStore this particle is a view of
+        self._index = None                                                # row of this particle in the store arrays
         # Basic properties of the particle (actual values to be given in the child classes)
         self.particle_label = None                                        # type of the particle (A,B,C,D)
         self.position = position                                          # start position
         self.step_size = None                                             # the step size of the particle in x and y direction
         self.influence_strength = random.uniform(0, 1)**2                 # Random quadratic strength
         self.influence_radius = None                                      # Radius of influence 
-        self.color = None                                                 # color of the particle
+        self.palette_index = None                                         # color of the particle in the palette of its type
         self.shape= "o"
         self.min_distance = 5                                             # Minimum distance between particles to avoid overlap                                           
     
     @staticmethod
-    def generate_particle_colors(particle_type, iterations):
+    def generate_particle_colors(particle_type, iterations, rng=None):
         """
         Generate unique color variations for particle types.
         
-        Uses different color schemes per particle type:
+        Every channel is drawn from the RGB range of the species (see species.color_range):
         - A: Red-dominated colors
         - B: Green-dominated colors
         - C: Blue-dominated colors
         - D: Yellow/Orange colors
+        - further species: colors around their own hue
         
         Args:
-            - particle_type: Particle class name to generate colors for
+            - particle_type: Particle class name to generate colors for (e.g. "Particle_A")
             - iterations: Number of unique colors needed
+            - rng: optional numpy.random.Generator, the global random module is used if None
             
         Returns:
             - list: Unique RGB tuples in 0-1 range
         """
-        color_schemes = {
-            "Particle_A": lambda: (random.uniform(0.6, 1.0), random.uniform(0, 0.4), random.uniform(0, 0.4)),
-            "Particle_B": lambda: (random.uniform(0, 0.4), random.uniform(0.6, 1.0), random.uniform(0, 0.4)),
-            "Particle_C": lambda: (random.uniform(0, 0.4), random.uniform(0, 0.4), random.uniform(0.6, 1.0)),
-            "Particle_D": lambda: (random.uniform(0.6, 1.0), random.uniform(0.6, 1.0), random.uniform(0, 0.2)),
-        }
+        uniform = random.uniform if rng is None else lambda low, high: float(rng.uniform(low, high))
+        ranges = color_range(_class_label(particle_type))   # raises ValueError for unknown types
 
-        if particle_type not in color_schemes:
-            raise ValueError(f"Unknown particle type: {particle_type}")
+        def color_generator():
+            return tuple(uniform(low, high) for low, high in ranges)
 
-        
         unique_colors = set()
-        color_generator = color_schemes[particle_type]
 
         while len(unique_colors) < iterations:
             new_color = color_generator()
@@ -139,25 +364,300 @@ class Particle:
                 unique_colors.add(new_color)
 
         return list(unique_colors)
+
+    @classmethod
+    def color_palette(cls, particle_type):
+        """
+        Returns the fixed color palette of a particle type, generated once and cached.
+
+        The palette is drawn from a generator seeded with the type name, so the
+        colors are the same in every run and only the palette index is random.
+
+        Args:
+            - particle_type: Particle class name (e.g. "Particle_A")
+
+        Returns:
+            - numpy.ndarray: float array (PALETTE_SIZE, 3) with RGB values in 0-1 range
+        """
+        palette = cls._palettes.get(particle_type)
+        if palette is None:
+            rng = np.random.default_rng(int.from_bytes(particle_type.encode(), "little"))
+            palette = np.array(cls.generate_particle_colors(particle_type, cls.PALETTE_SIZE, rng))
+            palette.flags.writeable = False   # shared by all stores
+            cls._palettes[particle_type] = palette
+        return palette
+
+    @property
+    def color(self):
+        """RGB color of the particle in 0-1 range, None if no palette index is set."""
+        if self._store is not None:
+            return _as_tuple(self._store.colors_of(self._index))
+        if self.palette_index is None:
+            return None
+        return _as_tuple(Particle.color_palette(self.particle_label)[self.palette_index])
     
 
 
 
+class ParticleStore:
+    """
+    Structure-of-arrays storage for all particles of a field.
+
+    Keeps every per-particle value in one contiguous NumPy array so that the
+    simulation loop can update all particles at once instead of looping over
+    Particle objects.
+
+    Attributes:
+        - positions: float array (N, 2) with the x/y coordinates
+        - type_ids: int array (N,) indexing into type_labels
+        - step_sizes: float array (N,) with the random walk step sizes
+        - influence_strengths: float array (N,) with the interaction strengths
+        - influence_radii: float array (N,) with the interaction radii
+        - palette_ids: uint8 array (N,) with the index of every particle color in its type palette
+        - palettes: float array (types, PALETTE_SIZE, 3) with the RGB palettes in 0-1 range
+        - palettes_rgb: the palettes converted to uint8 once for drawing
+        - min_distance: minimum distance kept between interacting particles
+        - type_labels: list of type labels, the position in the list is the type id
+    """
+    DEFAULT_TYPE_LABELS = ("A", "B", "C", "D")
+    # per-particle arrays, in constructor order
+    ARRAYS = ("positions", "type_ids", "step_sizes", "influence_strengths", "influence_radii", "palette_ids")
+
+    def __init__(self, positions, type_ids, step_sizes, influence_strengths, influence_radii, palette_ids,
+                 min_distance=5, type_labels=DEFAULT_TYPE_LABELS):
+        self.positions = np.ascontiguousarray(positions, dtype=np.float64).reshape(-1, 2)
+        self.type_ids = np.ascontiguousarray(type_ids, dtype=np.intp)
+        self.step_sizes = np.ascontiguousarray(step_sizes, dtype=np.float64)
+        self.influence_strengths = np.ascontiguousarray(influence_strengths, dtype=np.float64)
+        self.influence_radii = np.ascontiguousarray(influence_radii, dtype=np.float64)
+        self.palette_ids = np.ascontiguousarray(palette_ids, dtype=np.uint8)
+        self.min_distance = min_distance
+        self.type_labels = list(type_labels)
+        self.palettes = np.ones((len(self.type_labels), Particle.PALETTE_SIZE, 3))  # unknown types are drawn white
+        for type_id, label in enumerate(self.type_labels):
+            try:
+                self.palettes[type_id] = Particle.color_palette(f"Particle_{label}")
+            except ValueError:
+                pass
+        self.palettes_rgb = (self.palettes * 255).astype(np.uint8)
+
+    @property
+    def colors(self):
+        """Float array (N, 3) with the RGB color of every particle in 0-1 range."""
+        return self.palettes[self.type_ids, self.palette_ids]
+
+    def colors_of(self, index):
+        """RGB color of the particle in row index."""
+        return self.palettes[self.type_ids[index], self.palette_ids[index]]
+
+    def __len__(self):
+        return len(self.positions)
+
+    def take(self, indices):
+        """
+        Keeps only the particles in the given rows, in place.
+
+        Args:
+            - indices: int array with the rows to keep, in their new order
+        """
+        for name in self.ARRAYS:
+            setattr(self, name, np.ascontiguousarray(getattr(self, name)[indices]))
+
+    def append(self, **arrays):
+        """
+        Appends particles at the end of the store, in place.
+
+        Args:
+            - **arrays: one array per name in ARRAYS with the values of the new particles
+        """
+        for name in self.ARRAYS:
+            current = getattr(self, name)
+            values = np.asarray(arrays[name], dtype=current.dtype).reshape((-1,) + current.shape[1:])
+            setattr(self, name, np.concatenate([current, values]))
+
+    @classmethod
+    def from_particles(cls, particles):
+        """
+        Copies the values of the given particles into a new store and binds them to it.
+
+        After this call every particle reads and writes its position, step size,
+        strength, radius and palette index through the store arrays.
+
+        Args:
+            - particles: list of Particle instances
+
+        Returns:
+            - ParticleStore: store holding the particle data
+        """
+        type_labels = list(cls.DEFAULT_TYPE_LABELS)
+        type_ids = []
+        for particle in particles:
+            label = _class_label(particle.particle_label)   # species label of the class (A, B, ..., AA)
+            if label not in type_labels:
+                type_labels.append(label)
+            type_ids.append(type_labels.index(label))
+
+        store = cls(
+            positions=[p.position for p in particles],
+            type_ids=type_ids,
+            step_sizes=[p.step_size for p in particles],
+            influence_strengths=[p.influence_strength for p in particles],
+            influence_radii=[p.influence_radius for p in particles],
+            palette_ids=[p.palette_index or 0 for p in particles],
+            min_distance=particles[0].min_distance if particles else 5,
+            type_labels=type_labels,
+        )
+        for index, particle in enumerate(particles):
+            particle._store = store
+            particle._index = index
+        return store
+
+    @classmethod
+    def for_particles(cls, particles):
+        """
+        Returns the store the particles are already bound to, or builds a new one.
+
+        Args:
+            - particles: list of Particle instances
+
+        Returns:
+            - ParticleStore: store whose rows match the order of the particles
+        """
+        if isinstance(particles, ParticleViews):
+            return particles.store
+        store = particles[0]._store if particles else None
+        if store is not None and len(store) == len(particles) and \
+                all(p._store is store and p._index == i for i, p in enumerate(particles)):
+            return store
+        return cls.from_particles(particles)
+
+    def view(self, index):
+        """
+        Creates a Particle object that reads and writes row index of the store.
+
+        The object gets the class of its type (Particle_A ... Particle_D, the base
+        class for other species) without running its constructor, so no values are
+        copied or generated.
+
+        Args:
+            - index: row of the particle
+
+        Returns:
+            - Particle: view bound to this store
+        """
+        from particle_simulation import particle_classes  #lazy import to avoid loop
+
+        label = f"Particle_{self.type_labels[self.type_ids[index]]}"
+        particle = Particle.__new__(getattr(particle_classes, label, Particle))
+        particle._store = self
+        particle._index = index
+        particle.particle_label = label
+        particle.shape = "o"
+        particle.min_distance = self.min_distance
+        return particle
+
+    def colors_rgb(self):
+        """
+        Returns the particle colors as 0-255 integers for drawing.
+
+        The values are gathered from the palettes converted once in the
+        constructor, no float conversion happens per frame.
+
+        Returns:
+            - numpy.ndarray: uint8 array (N, 3)
+        """
+        return self.palettes_rgb[self.type_ids, self.palette_ids]
+
+
+class ParticleViews(Sequence):
+    """
+    Read-only list of Particle views over a ParticleStore.
+
+    A view is created the first time its index is accessed and then reused,
+    so code that compares particles by identity keeps working.
+
+    Attributes:
+        - store: ParticleStore the views read from
+    """
+    def __init__(self, store):
+        self.store = store
+        self._views = [None] * len(store)
+
+    def __len__(self):
+        return len(self._views)
+
+    def refresh(self):
+        """Drops the cached views after the store was resized."""
+        self._views = [None] * len(self.store)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("particle index out of range")
+        if self._views[index] is None:
+            self._views[index] = self.store.view(index)
+        return self._views[index]
+
+
 class interaction_effects:
     """Manager class for particle interaction physics.
     
     Handles both attraction and repulsion forces between particles
     using spatial indexing for efficient neighbor detection.
+
+    Two backends compute the forces:
+    - "kdtree": NumPy kernel over the pairs found by scipy's cKDTree
+    - "numba": compiled parallel kernel over a uniform cell grid (wraps around the field edges)
+
+    With approximate set, both backends only evaluate the pairs within near_fraction
+    of the influence radius one by one; farther neighbors pull as aggregated groups
+    (count and centre of mass per grid cell and species, see far_field_displacements).
+    approximate is the accuracy parameter theta: the grid cells are theta times the
+    near zone wide, so smaller values are more accurate and larger values faster.
     
     Attributes:
         particles: Reference to master particle list
+        store: ParticleStore holding the particle arrays
+        backend: Name of the force backend
+        neighbor_index: Periodic Verlet neighbor list, refreshed when particles moved too far
         spatial_tree: Spatial index for neighbor queries
+        timer: StageTimer measuring the index updates as the "spatial_index" stage
+        approximate: None for exact forces, otherwise theta of the approximate far field (e.g. 0.5)
+        near_fraction: part of the influence radius evaluated exactly in approximate mode
     """
-    def __init__(self, particles, width, height):
+    BACKENDS = ("kdtree", "numba")
+
+    def __init__(self, particles, width, height, backend="kdtree", skin=10.0, timer=None, approximate=None,
+                 near_fraction=0.5):
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown interaction backend: {backend}")
+        if approximate is not None and approximate <= 0:
+            raise ValueError(f"The approximation parameter must be positive: {approximate}")
+        self.approximate = approximate
+        self.near_fraction = near_fraction
         self.particles = particles
-        self.build_spatial_index()
+        self.store = ParticleStore.for_particles(particles)
+        self.backend = backend
         self.width = width
         self.height = height
+        self.neighbor_index = PeriodicNeighborIndex(width, height, skin=skin)
+        self.timer = timer or NULL_TIMER
+        self.spatial_tree = None  # built on first use, the numba backend never needs it
+
+    def bind(self, particles):
+        """
+        Switches to a new set of particles, e.g. after a reset of the field.
+
+        Args:
+            particles: ParticleViews or list of Particle instances
+        """
+        self.particles = particles
+        self.store = ParticleStore.for_particles(particles)
+        self.neighbor_index.clear()
+        self.spatial_tree = None
 
     def attract_particles(self, interaction_enabled):
 
@@ -168,35 +668,7 @@ class interaction_effects:
         Args:
             interaction_enabled (dict): Specifies which interactions are enabled (e.g., {'A_A': True, 'A_B': False})
         """
-        for particle in self.particles:
-            neighbors = self.find_particles_within_reactionradius(particle)
-
-            for neighbor in neighbors:
-                interaction_key = f"{particle.particle_label[-1]}_{neighbor.particle_label[-1]}"  # gets the last character of the particle_label and the neighbors particle_label(A_A)
-                
-                if interaction_enabled.get(interaction_key, False):  # Check if interaction is enabled, if key doesnt exist effect gets disabled (set to False) 
-                    dx = neighbor.position[0] - particle.position[0]
-                    dy = neighbor.position[1] - particle.position[1]
-                    distance = math.sqrt(dx**2 + dy**2)
-
-                    if distance > 0:
-                        dx /= distance
-                        dy /= distance
-                    else:
-                        dx = 0
-                        dy = 0
-
-                    influence = particle.influence_strength
-                    if distance - influence < particle.min_distance: # Prüfen, dass Partikel nicht überrlappen
-                        influence = max(0, abs(distance - particle.min_distance))
-                    
-                    particle.position = (
-                        (particle.position[0] + dx * influence) % self.width, # Wrap für X- und Y-Koordinaten
-                        (particle.position[1] + dy * influence) % self.height
-                    )
-                else:
-                    continue  #Skip if interaction is disabled
-
+        self.apply_forces(rules_to_matrix(interaction_enabled, self.store.type_labels))
 
     def repel_particles(self, repulsion_enabled):
         """
@@ -206,52 +678,106 @@ class interaction_effects:
         Args:
             repulsion_enabled (dict): Specifies which repulsions are enabled (e.g., {'A_A': True, 'A_B': False})
         """
-        for particle in self.particles:
-            neighbors = self.find_particles_within_reactionradius(particle)
-
-            for neighbor in neighbors:
-                interaction_key = f"{particle.particle_label[-1]}_{neighbor.particle_label[-1]}"  # gets the last character of the particle_label and the neighbors particle_label(A_A)
-                
-                if repulsion_enabled.get(interaction_key, False):
-                    dx = neighbor.position[0] - particle.position[0]
-                    dy = neighbor.position[1] - particle.position[1]
-                    distance = math.sqrt(dx**2 + dy**2)
-
-                    if distance > 0:
-                        dx /= distance
-                        dy /= distance
-                    else:
-                        dx = 0
-                        dy = 0
-
-                    influence = particle.influence_strength
-                    if distance - influence < particle.min_distance: # Prüfen, dass Partikel nicht überrlappen
-                        influence = max(0, abs(distance - particle.min_distance))
-
-                    particle.position = (
-                        (particle.position[0] - dx * influence) % self.width, # Umgekehrte Bewegung
-                        (particle.position[1] - dy * influence) % self.height # Wrap für X- und Y-Koordinaten
-                    )
-                else:
-                    continue  #Skip if interaction is disabled
-
-                    
-            
+        self.apply_forces(-rules_to_matrix(repulsion_enabled, self.store.type_labels))
 
+    def apply_forces(self, force_matrix):
+        """
+        Moves every particle by the net force of all its neighbors in one fused pass.
+
+        The neighbor pairs are looked up once and the displacements of all particles
+        are computed from the same positions by the selected backend, summed per
+        particle and then applied at once with wraparound. The result does not
+        depend on the order of the particles.
+
+        Args:
+            force_matrix (numpy.ndarray): signed float matrix (K, K), entry [i, j] scales how
+                type i reacts to type j (positive attracts, negative repels)
+        """
+        store = self.store
+        force_matrix = np.asarray(force_matrix, dtype=np.float64)
+        if len(store) == 0 or not force_matrix.any():
+            return  # nothing enabled, skip the neighbor search
+
+        radii, cell_size = self._exact_radii()
+        if self.backend == "numba":
+            from particle_simulation.numba_kernels import cell_list_displacements  # lazy import, compiles on first use
+            displacement = cell_list_displacements(
+                store.positions, store.type_ids, store.influence_strengths, radii,
+                force_matrix, store.min_distance, self.width, self.height
+            )
+        else:
+            with self.timer.stage("spatial_index"):
+                index = self.update_spatial_index()
+            displacement = pair_displacements(
+                store.positions, store.type_ids, store.influence_strengths, radii,
+                force_matrix, store.min_distance, index.pairs_i, index.pairs_j, boxsize=index.boxsize,
+                directed=index.directed
+            )
+        if self.approximate is not None:
+            displacement += far_field_displacements(
+                store.positions, store.type_ids, store.influence_strengths, store.influence_radii, radii,
+                force_matrix, self.width, self.height, cell_size
+            )
+        store.positions += displacement
+        np.mod(store.positions, (self.width, self.height), out=store.positions) # Wrap für X- und Y-Koordinaten
 
     def build_spatial_index(self):
         """
         Rebuild spatial index tree for neighbor detection.
         
-        Should be called before any interaction calculations.
-        Uses scipy's cKDTree for O(log n) nearest neighbor queries.
+        Forces a full rebuild of the periodic neighbor index from the current positions.
+        Uses scipy's cKDTree (with boxsize=(width, height)) for O(log n) nearest neighbor queries.
         """ 
-        positions = [p.position for p in self.particles]
-        self.spatial_tree = cKDTree(positions)
+        self.neighbor_index.build(self.store.positions, self._cutoff(), self.store.type_ids)
+        self.spatial_tree = self.neighbor_index.tree
 
+    def update_spatial_index(self):
+        """
+        Refresh the spatial index if the particles moved too far since the last build.
+
+        Cheap enough to call every step: the tree is only rebuilt when some particle
+        has moved more than half the skin radius or the influence radius grew.
+
+        Returns:
+            PeriodicNeighborIndex: The up to date neighbor index
+        """
+        if self.neighbor_index.update(self.store.positions, self._cutoff(), self.store.type_ids):
+            self.spatial_tree = self.neighbor_index.tree
+        return self.neighbor_index
+
+    def _exact_radii(self):
+        """
+        Radii within which the neighbors are evaluated pair by pair.
+
+        Returns:
+            tuple: (radii, cell_size), the influence radii and 0 in exact mode, the near
+            zones and the grid cell size of the far field in approximate mode
+        """
+        radii = self.store.influence_radii
+        if self.approximate is None:
+            return radii, 0.0
+        return approximation_zones(radii, self.approximate, self.near_fraction)
+
+    def _cutoff(self):
+        """
+        Search distance of the neighbor index.
+
+        Returns:
+            float: The common radius if all particles share one, otherwise a float
+            array (K,) with the largest radius of every type (searched per type)
+        """
+        store = self.store
+        radii = self._exact_radii()[0]
+        if len(radii) == 0 or radii.min() == radii.max():
+            return float(radii.max()) if len(radii) else 0.0
+        cutoffs = np.zeros(len(store.type_labels))
+        np.maximum.at(cutoffs, store.type_ids, radii)
+        return cutoffs
 
     def find_particles_within_reactionradius(self, main_particle):
         """Find particles within influence radius of given particle.
+
+        Neighbors across the wrapped field edges are included.
         
         Args:
             main_particle (Particle): Center particle for search
@@ -259,8 +785,9 @@ class interaction_effects:
         Returns:
             list: Nearby Particle instances (excluding self)
         """        
-        neighbors_idx = self.spatial_tree.query_ball_point(main_particle.position, main_particle.influence_radius)
-
-        return [self.particles[i] for i in neighbors_idx if self.particles[i] != main_particle] #exclude the particle it self ad a neighbor
-
+        neighbors_idx = self.neighbor_index.query_radius(
+            self.store.positions, main_particle.position, main_particle.influence_radius
+        )
+        self.spatial_tree = self.neighbor_index.tree
 
+        return [self.particles[i] for i in neighbors_idx if self.particles[i] is not main_particle] #exclude the particle it self ad a neighbor
@@ -0,0 +1,206 @@
+"""Streaming structure metrics of a ParticleField
+
+The metrics are computed from the pairs of the periodic neighbor index that the
+force step keeps up to date, so measuring a field every k steps does not run a
+second spatial query (the numba backend has no pair list, there the index is
+built when the metrics ask for it). Nothing but the current positions is
+needed, so long runs can be measured without storing their history:
+
+    for step, metrics in stream_metrics(field, 5000, 100, attract, repel):
+        ...
+"""
+import csv
+import os
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from particle_simulation.spatial_index import minimum_image
+
+
+def neighbor_pairs(field):
+    """
+    Unique undirected pairs of the neighbor index with their current distances.
+
+    Args:
+        - field: ParticleField, its neighbor index is refreshed if the particles moved too far
+
+    Returns:
+        - tuple: (pairs_i, pairs_j, distances, reach), every pair closer than reach is included
+    """
+    store = field.store
+    index = field.interactions.update_spatial_index()
+    pairs_i, pairs_j = index.pairs_i, index.pairs_j
+    if index.directed:
+        # within the smallest cutoff every pair was found from both sides, so one direction is enough
+        forward = pairs_i < pairs_j
+        pairs_i, pairs_j = pairs_i[forward], pairs_j[forward]
+        cutoffs = np.asarray(index.cutoff)[np.unique(store.type_ids)]
+        reach = float(cutoffs.min()) if len(cutoffs) else 0.0
+    else:
+        reach = float(index.cutoff)
+    delta = minimum_image(store.positions[pairs_j] - store.positions[pairs_i], index.boxsize)
+    return pairs_i, pairs_j, np.hypot(delta[:, 0], delta[:, 1]), reach
+
+
+def field_metrics(field, link_distance=None, min_cluster_size=3, rdf_bins=20, density_bins=8):
+    """
+    Summary statistics of the current particle arrangement.
+
+    - clusters_<label>: number of clusters of every species, i.e. connected components
+      of at least min_cluster_size particles of that species linked by distances below link_distance
+    - largest_cluster: share of all particles in the largest cluster
+    - mean_nn_distance: mean distance to the nearest neighbor (particles without a neighbor
+      within the index reach are left out and counted in isolated)
+    - clark_evans: mean_nn_distance relative to a uniform random arrangement
+      (about 1 for uniformly spread particles, towards 0 for clustered ones)
+    - rdf: radial distribution function g(r) in rdf_bins bins up to the index reach
+    - density: particle counts of a density_bins x density_bins grid (row major, x first),
+      density_cv is their coefficient of variation
+
+    Args:
+        - field: ParticleField to measure
+        - link_distance: largest distance of two linked particles, twice the minimum distance if None
+          (limited to the reach of the neighbor index)
+        - min_cluster_size: smallest number of particles counted as a cluster
+        - rdf_bins: number of bins of the radial distribution function
+        - density_bins: number of cells per axis of the density histogram
+
+    Returns:
+        - dict: the metrics above (rdf and density as lists)
+    """
+    store = field.store
+    n = len(store)
+    area = field.width * field.height
+    density, _, _ = np.histogram2d(store.positions[:, 0], store.positions[:, 1], bins=density_bins,
+                                   range=[[0, field.width], [0, field.height]])
+    labels = store.type_labels
+    if n < 2:
+        return {'mean_nn_distance': float('nan'), 'clark_evans': float('nan'), 'isolated': n,
+                **{f"clusters_{label}": 0 for label in labels}, 'largest_cluster': 0.0,
+                'rdf': [0.0] * rdf_bins, 'density': density.ravel().tolist(), 'density_cv': 0.0}
+
+    pairs_i, pairs_j, distances, reach = neighbor_pairs(field)
+    in_reach = distances <= reach
+    pairs_i, pairs_j, distances = pairs_i[in_reach], pairs_j[in_reach], distances[in_reach]
+
+    # nearest neighbor from the pair list, every neighbor within reach is in it
+    nearest = np.full(n, np.inf)
+    np.minimum.at(nearest, pairs_i, distances)
+    np.minimum.at(nearest, pairs_j, distances)
+    found = np.isfinite(nearest)
+    mean_nn = float(nearest[found].mean()) if found.any() else float('nan')
+    expected = 0.5 / np.sqrt(n / area)   # uniform random arrangement
+
+    # clusters: connected components of the same-species links
+    link_distance = min(2.0 * store.min_distance if link_distance is None else link_distance, reach)
+    linked = (distances <= link_distance) & (store.type_ids[pairs_i] == store.type_ids[pairs_j])
+    graph = coo_matrix((np.ones(linked.sum()), (pairs_i[linked], pairs_j[linked])), shape=(n, n))
+    _, component = connected_components(graph, directed=False)
+    sizes = np.bincount(component)
+    species = np.zeros(len(sizes), dtype=np.intp)
+    species[component] = store.type_ids          # every component holds a single species
+    clusters = np.bincount(species[sizes >= min_cluster_size], minlength=len(labels))
+
+    # radial distribution function, pair counts relative to a uniform arrangement of the same density
+    rdf = np.zeros(rdf_bins)
+    if reach > 0:
+        edges = np.linspace(0.0, reach, rdf_bins + 1)
+        counts, _ = np.histogram(distances, bins=edges)
+        rdf = counts / (0.5 * n * (n - 1) * np.pi * np.diff(edges ** 2) / area)
+
+    return {
+        'mean_nn_distance': mean_nn,
+        'clark_evans': float(mean_nn / expected),
+        'isolated': int(n - found.sum()),
+        **{f"clusters_{label}": int(count) for label, count in zip(labels, clusters)},
+        'largest_cluster': float(sizes.max() / n),
+        'rdf': rdf.tolist(),
+        'density': density.ravel().tolist(),
+        'density_cv': float(density.std() / density.mean()),
+    }
+
+
+def stream_metrics(field, steps, every, interaction_matrix=None, repulsion_matrix=None, **options):
+    """
+    Runs the simulation and yields the metrics of every every-th step.
+
+    Args:
+        - field: ParticleField to simulate
+        - steps: number of physics steps to run
+        - every: steps between two measurements
+        - interaction_matrix, repulsion_matrix: matrices passed to ParticleField.step
+        - **options: arguments of field_metrics
+
+    Yields:
+        - tuple: (step, metrics dict)
+    """
+    if every < 1:
+        raise ValueError("every must be at least 1")
+    for step in range(1, steps + 1):
+        field.step(interaction_matrix, repulsion_matrix)
+        if step % every == 0:
+            yield step, field_metrics(field, **options)
+
+
+def flatten_metrics(metrics):
+    """Spreads list valued metrics over numbered columns (rdf -> rdf_0, rdf_1, ...) for CSV files."""
+    row = {}
+    for name, value in metrics.items():
+        if isinstance(value, list):
+            row.update((f"{name}_{i}", item) for i, item in enumerate(value))
+        else:
+            row[name] = value
+    return row
+
+
+class MetricsWriter:
+    """
+    Appends one CSV row of metrics per measurement.
+
+    Rows are flushed as soon as they are written, so a running (or crashed) job
+    can be read at any time. An existing file is continued with its own columns.
+
+    Attributes:
+        - path: CSV file
+        - rows: number of rows written by this writer
+    """
+    def __init__(self, path):
+        self.path = path
+        self.rows = 0
+        self._file = None
+        self._writer = None
+
+    def write(self, step, metrics):
+        """
+        Appends the metrics of one step.
+
+        Args:
+            - step: physics steps run so far
+            - metrics: dict returned by field_metrics
+        """
+        row = {'step': step, **flatten_metrics(metrics)}
+        if self._writer is None:
+            fieldnames = list(row)
+            if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+                with open(self.path, newline="") as f:
+                    fieldnames = next(csv.reader(f))   # continue an existing file with its columns
+            self._file = open(self.path, "a", newline="")
+            self._writer = csv.DictWriter(self._file, fieldnames=fieldnames, restval="", extrasaction="ignore")
+            if self._file.tell() == 0:
+                self._writer.writeheader()
+        self._writer.writerow(row)
+        self._file.flush()
+        self.rows += 1
+
+    def close(self):
+        """Closes the file."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
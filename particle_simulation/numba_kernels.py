@@ -0,0 +1,149 @@
+"""Numba compiled cell-list interaction kernels
+"""
+import math
+import numpy as np
+from numba import njit, prange
+
+
+def grid_shape(width, height, cell_size):
+    """
+    Computes a uniform cell grid whose cells are at least cell_size wide.
+
+    Args:
+        - width, height: size of the particle field
+        - cell_size: minimum edge length of a cell (usually the largest influence radius)
+
+    Returns:
+        - tuple: (n_cells_x, n_cells_y, cell_width, cell_height)
+    """
+    n_cells_x = max(1, int(width // cell_size)) if cell_size > 0 else 1
+    n_cells_y = max(1, int(height // cell_size)) if cell_size > 0 else 1
+    return n_cells_x, n_cells_y, width / n_cells_x, height / n_cells_y
+
+
+@njit(cache=True, nogil=True)
+def build_cell_list(positions, n_cells_x, n_cells_y, cell_width, cell_height):
+    """
+    Sorts the particles into grid cells (counting sort).
+
+    Returns:
+        - cell_start: int array, particles of cell c are order[cell_start[c]:cell_start[c + 1]]
+        - order: int array with the particle indices sorted by cell
+    """
+    n = positions.shape[0]
+    cell_of = np.empty(n, np.int64)
+    cell_start = np.zeros(n_cells_x * n_cells_y + 1, np.int64)
+    for i in range(n):
+        cx = min(int(positions[i, 0] / cell_width), n_cells_x - 1)
+        cy = min(int(positions[i, 1] / cell_height), n_cells_y - 1)
+        cell_of[i] = cx * n_cells_y + cy
+        cell_start[cell_of[i] + 1] += 1
+    for c in range(n_cells_x * n_cells_y):
+        cell_start[c + 1] += cell_start[c]
+
+    fill = cell_start[:-1].copy()
+    order = np.empty(n, np.int64)
+    for i in range(n):
+        order[fill[cell_of[i]]] = i
+        fill[cell_of[i]] += 1
+    return cell_start, order
+
+
+@njit(cache=True, nogil=True)
+def _wrap_delta(delta, size):
+    # shortest distance on the torus created by the modulo wraparound
+    if delta > 0.5 * size:
+        return delta - size
+    if delta < -0.5 * size:
+        return delta + size
+    return delta
+
+
+@njit(parallel=True, cache=True, nogil=True)   # releases the GIL for the physics thread
+def cell_list_kernel(positions, type_ids, strengths, radii, rule_matrix, min_distance, width, height,
+                     cell_start, order, n_cells_x, n_cells_y, cell_width, cell_height):
+    """
+    Sums the displacement of every particle over the particles in the neighbouring cells.
+
+    Each particle only visits the cells its own influence radius reaches (the 3x3
+    neighbourhood when the cells are as wide as the radius), so particles with a
+    short radius do not pay for the longest one. Each particle only writes its own
+    row of the result, so the outer loop runs in parallel without locks. Distances
+    use the minimum image on the torus.
+    """
+    n = positions.shape[0]
+    displacement = np.zeros((n, 2))
+
+    for i in prange(n):
+        xi = positions[i, 0]
+        yi = positions[i, 1]
+        ti = type_ids[i]
+        radius = radii[i]
+        cx = min(int(xi / cell_width), n_cells_x - 1)
+        cy = min(int(yi / cell_height), n_cells_y - 1)
+        reach_x = int(math.ceil(radius / cell_width))
+        reach_y = int(math.ceil(radius / cell_height))
+        # when the reach covers the whole axis every cell is visited once instead of wrapping twice
+        x_lo, x_hi = (cx - reach_x, cx + reach_x) if 2 * reach_x + 1 <= n_cells_x else (0, n_cells_x - 1)
+        y_lo, y_hi = (cy - reach_y, cy + reach_y) if 2 * reach_y + 1 <= n_cells_y else (0, n_cells_y - 1)
+        sum_x = 0.0
+        sum_y = 0.0
+
+        for gx in range(x_lo, x_hi + 1):
+            for gy in range(y_lo, y_hi + 1):
+                cell = (gx % n_cells_x) * n_cells_y + (gy % n_cells_y)
+                for k in range(cell_start[cell], cell_start[cell + 1]):
+                    j = order[k]
+                    if j == i:
+                        continue
+                    factor = rule_matrix[ti, type_ids[j]]
+                    if factor == 0.0:
+                        continue
+                    dx = _wrap_delta(positions[j, 0] - xi, width)
+                    dy = _wrap_delta(positions[j, 1] - yi, height)
+                    distance = math.sqrt(dx * dx + dy * dy)
+                    if distance > radius or distance == 0.0:
+                        continue
+
+                    influence = strengths[i]
+                    if distance - influence < min_distance:  # make sure particles do not overlap
+                        influence = abs(distance - min_distance)
+                    scale = factor * influence / distance
+                    sum_x += dx * scale
+                    sum_y += dy * scale
+
+        displacement[i, 0] = sum_x
+        displacement[i, 1] = sum_y
+    return displacement
+
+
+def cell_list_displacements(positions, type_ids, strengths, radii, rule_matrix, min_distance, width, height):
+    """
+    Computes the displacement of every particle using a uniform cell grid.
+
+    With one common radius the grid is sized to it, so all neighbors of a particle
+    lie in its own or the 8 surrounding cells, wrapped around the field edges. With
+    different radii the cells are sized to the smallest radius (but at least a
+    quarter of the largest one), and every particle scans as many rings of cells
+    as its own radius needs.
+
+    Args:
+        - positions: float array (N, 2) inside [0, width) x [0, height)
+        - type_ids: int array (N,)
+        - strengths: float array (N,)
+        - radii: float array (N,)
+        - rule_matrix: float array (K, K) indexed by type ids
+        - min_distance: distance particles try to keep from each other
+        - width, height: size of the (periodic) field
+
+    Returns:
+        - numpy.ndarray: float array (N, 2) with the displacement of every particle
+    """
+    if len(positions) == 0:
+        return np.zeros((0, 2))
+    cell_size = max(radii.min(), 0.25 * radii.max())   # at most 9 x 9 cells for the longest radius
+    n_cells_x, n_cells_y, cell_width, cell_height = grid_shape(width, height, cell_size)
+    cell_start, order = build_cell_list(positions, n_cells_x, n_cells_y, cell_width, cell_height)
+    return cell_list_kernel(positions, type_ids, strengths, radii, np.ascontiguousarray(rule_matrix, dtype=np.float64),
+                            float(min_distance), float(width), float(height),
+                            cell_start, order, n_cells_x, n_cells_y, cell_width, cell_height)
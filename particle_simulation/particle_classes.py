@@ -1,6 +1,7 @@
 """Particles that use the main particle class
 """
-from particle_simulation.main_classes import Particle, ParticleField
+import random
+from particle_simulation.main_classes import Particle
 
 class Particle_A(Particle):
     """
@@ -10,15 +11,21 @@ class Particle_A(Particle):
         step_size (0.2): Base movement speed
         influence_strength (0.5): Moderate attraction/repulsion force
         influence_radius (25): Medium detection radius
-        color: Generated red-dominated color
+        color: red-dominated color from the precomputed type palette
     """
+    label = "Particle_A"
+    color_range = ((0.6, 1.0), (0, 0.4), (0, 0.4))   # RGB ranges of the palette
+    default_step_size = 0.2
+    default_influence_strength = 0.5
+    default_influence_radius = 25
+
     def __init__(self, position):
         super().__init__(position)
-        self.particle_label = "Particle_A"
-        self.step_size = 0.2
-        self.influence_strength = 0.5
-        self.influence_radius = 25
-        self.color = Particle.generate_particle_colors(self.particle_label, 1)[0] #gets a colorway for this spicific type (red)
+        self.particle_label = self.label
+        self.step_size = self.default_step_size
+        self.influence_strength = self.default_influence_strength
+        self.influence_radius = self.default_influence_radius
+        self.palette_index = random.randrange(Particle.PALETTE_SIZE)  # picks a color from the palette of this type
         
 
 
@@ -29,15 +36,21 @@ class Particle_B(Particle):
     Attributes:
         influence_strength (1.0): Stronger interaction force
         influence_radius (50): Larger detection radius
-        color: Generated green-dominated color
+        color: green-dominated color from the precomputed type palette
     """
+    label = "Particle_B"
+    color_range = ((0, 0.4), (0.6, 1.0), (0, 0.4))   # RGB ranges of the palette
+    default_step_size = 0.2
+    default_influence_strength = 1
+    default_influence_radius = 50
+
     def __init__(self, position):
         super().__init__(position)
-        self.particle_label = "Particle_B"
-        self.step_size = 0.2
-        self.influence_strength = 1
-        self.influence_radius = 50
-        self.color = Particle.generate_particle_colors(self.particle_label, 1)[0]  #gets a colorway for this spicific type
+        self.particle_label = self.label
+        self.step_size = self.default_step_size
+        self.influence_strength = self.default_influence_strength
+        self.influence_radius = self.default_influence_radius
+        self.palette_index = random.randrange(Particle.PALETTE_SIZE)  # picks a color from the palette of this type
         
 
 
@@ -49,15 +62,21 @@ class Particle_C(Particle):
     Attributes:
         influence_strength (5.0): Very strong interaction force
         influence_radius (75): Largest detection radius
-        color: Generated blue-dominated color
+        color: blue-dominated color from the precomputed type palette
     """
+    label = "Particle_C"
+    color_range = ((0, 0.4), (0, 0.4), (0.6, 1.0))   # RGB ranges of the palette
+    default_step_size = 0.2
+    default_influence_strength = 5
+    default_influence_radius = 75
+
     def __init__(self, position):
         super().__init__(position)
-        self.particle_label = "Particle_C"
-        self.step_size = 0.2
-        self.influence_strength = 5
-        self.influence_radius = 75
-        self.color = Particle.generate_particle_colors(self.particle_label, 1)[0]  #gets a colorway for this spicific type
+        self.particle_label = self.label
+        self.step_size = self.default_step_size
+        self.influence_strength = self.default_influence_strength
+        self.influence_radius = self.default_influence_radius
+        self.palette_index = random.randrange(Particle.PALETTE_SIZE)  # picks a color from the palette of this type
         
 
 
@@ -68,12 +87,21 @@ class Particle_D(Particle):
     Attributes:
         influence_strength (5.0): Very strong interaction force
         influence_radius (75): Largest detection radius
-        color: Generated yellow-dominated color
+        color: yellow-dominated color from the precomputed type palette
     """
+    label = "Particle_D"
+    color_range = ((0.6, 1.0), (0.6, 1.0), (0, 0.2))   # RGB ranges of the palette
+    default_step_size = 0.2
+    default_influence_strength = 0
+    default_influence_radius = 100
+
     def __init__(self, position):
         super().__init__(position)
-        self.particle_label = "Particle_D"
-        self.step_size = 0.2
-        self.influence_strength = 0
-        self.influence_radius = 100
-        self.color = Particle.generate_particle_colors(self.particle_label, 1)[0]  #gets a colorway for this spicific type
\ No newline at end of file
+        self.particle_label = self.label
+        self.step_size = self.default_step_size
+        self.influence_strength = self.default_influence_strength
+        self.influence_radius = self.default_influence_radius
+        self.palette_index = random.randrange(Particle.PALETTE_SIZE)  # picks a color from the palette of this type
+
+
+PARTICLE_TYPES = [Particle_A, Particle_B, Particle_C, Particle_D]   # classic species, see species.SpeciesRegistry
@@ -0,0 +1,198 @@
+"""Physics of a ParticleField running in a background thread
+"""
+import queue
+import threading
+import time
+import numpy as np
+from particle_simulation.interaction_matrix import InteractionMatrix
+
+
+def _copy_matrix(rules):
+    # the thread gets its own copy, so clicks in the GUI never change a matrix during a step
+    return rules.copy() if isinstance(rules, InteractionMatrix) else dict(rules)
+
+
+class Snapshot:
+    """
+    Copy of the particle state published by the physics thread for drawing.
+
+    Attributes:
+        - positions: float array (N, 2) with the particle positions
+        - colors: uint8 array (N, 3) with the particle colors
+        - steps: physics steps run when the snapshot was taken
+        - seed: seed of the field the snapshot belongs to
+    """
+    __slots__ = ("positions", "colors", "steps", "seed")
+
+    def __init__(self):
+        self.positions = None
+        self.colors = None
+        self.steps = 0
+        self.seed = None
+
+    def fill(self, field, steps):
+        """Copies the current positions and colors of the field, reusing the arrays if the size did not change."""
+        store = field.store
+        if self.positions is None or self.positions.shape != store.positions.shape:
+            self.positions = np.empty_like(store.positions)
+        np.copyto(self.positions, store.positions)
+        self.colors = store.colors_rgb()
+        self.steps = steps
+        self.seed = field.seed
+
+
+class PhysicsWorker:
+    """
+    Runs the physics steps of a ParticleField in a background thread.
+
+    The render loop never waits for a physics step: after every step the thread
+    copies the positions into a snapshot buffer and swaps it with the published
+    one (two snapshot buffers plus the one the render loop is reading, so a
+    published snapshot is never overwritten while it is drawn). GUI changes
+    reach the thread through a command queue and are applied between steps.
+    NumPy, cKDTree and the numba kernels release the GIL for the heavy work,
+    so the event loop stays responsive while a step runs.
+
+    Attributes:
+        - field: ParticleField simulated by the thread (replaced when a checkpoint is loaded)
+        - steps: number of physics steps run so far (starts at the step of a restored checkpoint)
+        - steps_per_second: optional cap of the physics rate, None runs as fast as possible
+    """
+    def __init__(self, field, interaction_matrix, repulsion_matrix, steps_per_second=None, steps=0):
+        self.field = field
+        self.steps = steps
+        self.steps_per_second = steps_per_second
+        self._interaction_matrix = _copy_matrix(interaction_matrix)
+        self._repulsion_matrix = _copy_matrix(repulsion_matrix)
+        self._params = None
+        self._paused = False
+        self._commands = queue.Queue()
+        self._lock = threading.Lock()          # only held while swapping snapshot buffers
+        self._back, self._front, self._reading = Snapshot(), Snapshot(), Snapshot()
+        self._fresh = False
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name="physics", daemon=True)
+        self._publish()
+
+    def start(self):
+        """Starts the physics thread."""
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stops the physics thread after the current step and waits for it."""
+        self._commands.put(("stop",))
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    # ===== commands from the GUI thread =====
+
+    def set_params(self, params):
+        """Sends the slider values ('num_particles', 'base_speed', 'influence_radius', 'attraction_strength')."""
+        self._commands.put(("params", dict(params)))
+
+    def set_matrices(self, interaction_matrix, repulsion_matrix):
+        """Sends the enabled attractions and repulsions."""
+        self._commands.put(("matrices", _copy_matrix(interaction_matrix), _copy_matrix(repulsion_matrix)))
+
+    def set_paused(self, paused):
+        """Pauses or resumes the physics steps."""
+        self._commands.put(("pause", bool(paused)))
+
+    def reset(self, num_particles, seed=None):
+        """Replaces the field by a new one with the given number of particles."""
+        self._commands.put(("reset", num_particles, seed))
+
+    def set_field(self, field, steps=0):
+        """Replaces the simulated field, e.g. by one restored from a checkpoint."""
+        self._commands.put(("field", field, steps))
+
+    def call(self, function):
+        """Runs function(worker) in the physics thread between two steps, e.g. to save a checkpoint."""
+        self._commands.put(("call", function))
+
+    def snapshot(self):
+        """
+        Returns the latest published snapshot without waiting for the physics.
+
+        The returned snapshot stays valid until the next call.
+
+        Raises:
+            - RuntimeError: if the physics thread failed
+        """
+        if self._error is not None:
+            raise RuntimeError("Physics thread failed") from self._error
+        with self._lock:
+            if self._fresh:
+                self._reading, self._front = self._front, self._reading
+                self._fresh = False
+        return self._reading
+
+    # ===== physics thread =====
+
+    def _publish(self):
+        self._back.fill(self.field, self.steps)
+        with self._lock:
+            self._back, self._front = self._front, self._back
+            self._fresh = True
+
+    def _handle(self, command):
+        """Applies one command, returns False for the stop command."""
+        kind = command[0]
+        if kind == "stop":
+            return False
+        if kind == "params":
+            self._params = command[1]
+            if self._params.get('num_particles', self.field.num_particles) != self.field.num_particles:
+                self.field.resize(self._params['num_particles'])   # the Particles slider acts right away
+            self.field.apply_params(self._params)
+        elif kind == "matrices":
+            self._interaction_matrix, self._repulsion_matrix = command[1], command[2]
+        elif kind == "pause":
+            self._paused = command[1]
+        elif kind == "field":
+            _, self.field, self.steps = command
+            self._publish()
+        elif kind == "call":
+            command[1](self)
+        elif kind == "reset":
+            _, num_particles, seed = command
+            self.field.reset(num_particles, seed=seed)
+            print(f"Particle field seed: {self.field.seed}")
+            if self._params is not None:
+                self.field.apply_params(self._params)   # the sliders keep their values
+            self._publish()
+        return True
+
+    def _run(self):
+        try:
+            while True:
+                # wait for commands while paused, otherwise only take the queued ones
+                try:
+                    command = self._commands.get(timeout=0.05) if self._paused else self._commands.get_nowait()
+                except queue.Empty:
+                    command = None
+                while command is not None:
+                    if not self._handle(command):
+                        return
+                    try:
+                        command = self._commands.get_nowait()
+                    except queue.Empty:
+                        command = None
+                if self._paused:
+                    continue
+
+                start = time.perf_counter()
+                self.field.step(self._interaction_matrix, self._repulsion_matrix)
+                self.steps += 1
+                self._publish()
+                if self.steps_per_second:
+                    time.sleep(max(0.0, 1.0 / self.steps_per_second - (time.perf_counter() - start)))
+        except Exception as error:
+            self._error = error   # raised in the GUI thread by snapshot()
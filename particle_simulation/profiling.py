@@ -0,0 +1,122 @@
+"""Lightweight per-stage timers for the simulation loop
+"""
+import csv
+import json
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+import numpy as np
+
+# Stages of a GUI frame in drawing order of the overlay
+FRAME_STAGES = ("events", "params", "random_walk", "spatial_index", "forces", "draw")
+
+
+class StageTimer:
+    """
+    Measures how long every stage of a frame takes.
+
+    Stages are timed with `with timer.stage("name"):` blocks. Nested stages are
+    subtracted from the enclosing one, so every second is counted for exactly
+    one stage. end_frame() closes the current frame: its stage times are added
+    to a rolling window (for the percentiles shown in the GUI) and, if
+    keep_trace is set, to the trace that can be written to CSV or JSON.
+
+    A timer is not thread-safe, every thread needs its own one.
+
+    Attributes:
+        - window: number of frames the rolling percentiles are computed over
+        - frames: number of finished frames
+        - trace: list of dicts, one per finished frame, with the stage times in seconds
+          (stays empty unless keep_trace is set, a long GUI session would otherwise grow it without bound)
+    """
+    def __init__(self, window=120, keep_trace=True):
+        self.window = window
+        self.keep_trace = keep_trace
+        self.frames = 0
+        self.trace = []
+        self._samples = {}
+        self._current = {}
+        self._nested = []   # time spent in nested stages, one entry per open stage
+
+    @contextmanager
+    def stage(self, name):
+        """Context manager timing one stage of the current frame."""
+        self._nested.append(0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            nested = self._nested.pop()
+            self._current[name] = self._current.get(name, 0.0) + elapsed - nested
+            if self._nested:
+                self._nested[-1] += elapsed
+
+    def end_frame(self):
+        """Finishes the current frame and starts the next one."""
+        for name, seconds in self._current.items():
+            if name not in self._samples:
+                self._samples[name] = deque(maxlen=self.window)
+            self._samples[name].append(seconds)
+        if self.keep_trace:
+            self.trace.append({'frame': self.frames, **self._current})
+        self.frames += 1
+        self._current = {}
+
+    def stages(self):
+        """Names of all stages seen so far, the known frame stages first."""
+        known = [name for name in FRAME_STAGES if name in self._samples]
+        return known + [name for name in self._samples if name not in FRAME_STAGES]
+
+    def percentiles(self, name, q=(50, 95, 99)):
+        """
+        Rolling percentiles of one stage.
+
+        Args:
+            - name: stage name
+            - q: percentiles to compute
+
+        Returns:
+            - dict: percentile -> seconds (empty if the stage was never timed)
+        """
+        samples = self._samples.get(name)
+        if not samples:
+            return {}
+        return dict(zip(q, np.percentile(np.fromiter(samples, dtype=np.float64), q).tolist()))
+
+    def summary(self, q=(50, 95, 99)):
+        """Rolling percentiles of all stages, see percentiles()."""
+        return {name: self.percentiles(name, q) for name in self.stages()}
+
+    def write_trace(self, path):
+        """
+        Writes the per-frame stage times to a file, CSV if the path ends with .csv, otherwise JSON.
+
+        Args:
+            - path: output file
+        """
+        stages = self.stages()
+        if str(path).endswith(".csv"):
+            with open(path, "w", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=["frame", *stages], restval=0.0)
+                writer.writeheader()
+                writer.writerows(self.trace)
+        else:
+            with open(path, "w") as f:
+                json.dump({'stages': stages, 'frames': self.trace,
+                           'summary': {name: {str(k): v for k, v in p.items()}
+                                       for name, p in self.summary().items()}}, f, indent=2)
+
+
+class NullTimer:
+    """Timer that does nothing, used when no stage times are collected."""
+    _context = nullcontext()
+
+    def stage(self, name):
+        return self._context
+
+    def end_frame(self):
+        pass
+
+
+NULL_TIMER = NullTimer()
@@ -1,8 +1,8 @@
 """
 FULLY INTEGRATED SIMULATION WITH PYGAME GUI
 """
+import argparse
 import pygame
-import random
 import os
 import sys
 sys.path.append(os.path.abspath(os.path.dirname(__file__)))
@@ -10,13 +10,74 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from pygame.locals import *
 from particle_simulation.main_classes import ParticleField, interaction_effects
 from particle_simulation.particle_classes import Particle_A, Particle_B, Particle_C, Particle_D
+from particle_simulation.species import SpeciesRegistry
 from particle_simulation.gui import ParticleGUI  # Make sure gui.py is in same directory
+from particle_simulation.renderer import ParticleRenderer, fit_scale
+from particle_simulation.scheduler import StepScheduler
+from particle_simulation.physics_worker import PhysicsWorker
+from particle_simulation.profiling import StageTimer
+from particle_simulation.trajectory import TrajectoryReader
+from particle_simulation.checkpoint import load_checkpoint, save_checkpoint
 import cProfile
 import pstats
 import sys
 
 
-def main():
+def _window_size(text):
+    width, _, height = text.lower().partition("x")
+    return int(width), int(height)
+
+
+def parse_args(argv=None):
+    """Parse the command line options of the GUI simulation.
+
+    Args:
+        argv (list): Arguments to parse, defaults to sys.argv
+
+    Returns:
+        argparse.Namespace: Parsed options
+    """
+    parser = argparse.ArgumentParser(description="Particle simulator with Pygame controls")
+    parser.add_argument("--backend", choices=interaction_effects.BACKENDS, default="kdtree",
+                        help="force backend used for the particle interactions")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="seed of the first particle field (drawn and printed if omitted)")
+    parser.add_argument("--approximate", type=float, default=None, metavar="THETA",
+                        help="aggregate distant neighbors per grid cell and species for dense large-radius runs, "
+                             "smaller THETA is more accurate (e.g. 0.5)")
+    parser.add_argument("--species", type=int, default=4,
+                        help="number of particle species, the classic A-D first, then generated ones (up to 16 fit the GUI)")
+    parser.add_argument("--substeps", type=int, default=1,
+                        help="physics steps per rendered frame")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="run the physics at --physics-hz and drop frames when it falls behind")
+    parser.add_argument("--physics-hz", type=float, default=60.0,
+                        help="adaptive mode: physics steps per wall second")
+    parser.add_argument("--min-fps", type=float, default=15.0,
+                        help="adaptive mode: lowest display rate while the physics catches up")
+    parser.add_argument("--threaded", action="store_true",
+                        help="run the physics in a background thread so the controls never freeze")
+    parser.add_argument("--stats", action="store_true",
+                        help="show the stage time overlay from the start (toggle with F3)")
+    parser.add_argument("--trace", default=None,
+                        help="write the per-frame stage times to this .csv or .json file on exit")
+    parser.add_argument("--profile", nargs="?", const="run_sim.prof", default=None,
+                        help="run under cProfile, print the top functions and dump the stats to this file")
+    parser.add_argument("--checkpoint", default="particle_field.npz",
+                        help="checkpoint file written with F5 and before every Reset, loaded with F9")
+    parser.add_argument("--resume", default=None,
+                        help="start from this checkpoint file instead of a new field")
+    parser.add_argument("--replay", default=None,
+                        help="play a trajectory recorded by the batch runner instead of simulating")
+    parser.add_argument("--replay-fps", type=float, default=60.0,
+                        help="frames per second of the replay")
+    parser.add_argument("--replay-size", type=_window_size, default=None, metavar="WIDTHxHEIGHT",
+                        help="largest replay window, larger fields are shrunk to fit (default: desktop size)")
+    return parser.parse_args(argv)
+
+
+def main(backend="kdtree", seed=None, scheduler=None, threaded=False, show_stats=False, trace=None,
+         checkpoint="particle_field.npz", resume=None, species=4, approximate=None):
     """Main simulation loop integrating Pygame GUI and particle physics.
     
     Execution flow:
@@ -26,12 +87,23 @@ def main():
     4. Enter main loop:
         a) Process input events
         b) Update simulation parameters from GUI
-        c) Calculate particle movement
-        d) Apply interaction forces
-        e) Render particles and GUI
+        c) Run the physics steps the scheduler asks for
+        d) Render particles and the changed parts of the GUI
     5. Clean up on exit
     
-    Handles real-time parameter adjustments and smooth rendering at 60 FPS.
+    Handles real-time parameter adjustments and smooth rendering at up to 60 FPS.
+
+    Args:
+        backend (str): Force backend of interaction_effects ("kdtree" or "numba")
+        seed (int): Seed of the first particle field, later resets draw new seeds
+        scheduler (StepScheduler): Decides how many physics steps run per frame, one by default
+        threaded (bool): Run the physics in a PhysicsWorker thread, the loop only draws its snapshots
+        show_stats (bool): Show the rolling stage times in the control panel (F3 toggles it)
+        trace (str): Write the per-frame stage times to this .csv or .json file on exit
+        checkpoint (str): Checkpoint file written with F5 and before every Reset, loaded with F9
+        resume (str): Checkpoint file to start from instead of a new field
+        species (int): Number of particle species K, the classic A-D first (see SpeciesRegistry.generate)
+        approximate (float): Theta of the approximate far field forces, None for exact forces
     """
     # ===== PYGAME INIT ===== 
     pygame.init()
@@ -42,89 +114,261 @@ def main():
     clock = pygame.time.Clock()
 
     # ===== GUI SETUP =====
-    gui = ParticleGUI(screen_width, screen_height)
+    registry = SpeciesRegistry.generate(species)
+    gui = ParticleGUI(screen_width, screen_height, registry.labels)
     gui.create_controls()
     simulation_width = screen_width - gui.gui_width  # Left area for simulation
 
     # ===== SIMULATION INIT =====
-    field = ParticleField(simulation_width, screen_height, gui.params['num_particles'])
-    effect = interaction_effects(field.particles, width=simulation_width, height=screen_height)
+    timer = StageTimer(keep_trace=bool(trace))  # stage times of every frame, shown with F3
+    # the timer is not thread-safe, in threaded mode only the render loop is timed
+    field_timer = None if threaded else timer
+    scheduler = scheduler or StepScheduler()
+    if resume:
+        restored = restore_state(resume, gui, backend, field_timer, approximate)
+        field = restored.field
+        scheduler.total_steps = restored.step
+    else:
+        field = ParticleField(simulation_width, screen_height, gui.params['num_particles'], backend=backend,
+                              seed=seed, timer=field_timer, species=registry, approximate=approximate)
+        print(f"Particle field seed: {field.seed}")
+    renderer = ParticleRenderer(simulation_width, screen_height)  # draws all particles in one array pass
+    worker = None
+    if threaded:
+        worker = PhysicsWorker(field, gui.interaction_matrix, gui.repulsion_matrix, steps=scheduler.total_steps).start()
+    sent_controls = None  # last GUI state sent to the worker
+    save_requested = False
     paused = False
 
     # ===== MAIN LOOP =====
     running = True
-    frame_counter = 0  # count Frames
 
     while running:
-        frame_counter += 1  
 
         # === Handle Events ===
-        for event in pygame.event.get():
-            if event.type == QUIT:
-                running = False
-            elif event.type == KEYDOWN:
-                if event.key == K_ESCAPE:
+        with timer.stage("events"):
+            for event in pygame.event.get():
+                if event.type == QUIT:
                     running = False
-            else:
-                gui.handle_input(event)  # Pass events to GUI
+                elif event.type == KEYDOWN:
+                    if event.key == K_ESCAPE:
+                        running = False
+                    elif event.key == K_F3:
+                        show_stats = not show_stats  # toggle the profiler overlay
+                    elif event.key == K_F5:
+                        save_requested = True
+                    elif event.key == K_F9 and os.path.exists(checkpoint):
+                        restored = restore_state(checkpoint, gui, backend, field_timer, approximate)
+                        if worker:
+                            worker.set_field(restored.field, restored.step)
+                        else:
+                            field = restored.field
+                            scheduler.total_steps = restored.step
+                else:
+                    gui.handle_input(event)  # Pass events to GUI
 
         # === Handle GUI Controls ===
-        # Apply parameter changes to all particles
-        for particle in field.particles:
-            particle.step_size = gui.params['base_speed']
-            particle.influence_radius = gui.params['influence_radius']
-            particle.influence_strength = gui.params['attraction_strength']
+        with timer.stage("params"):
+            # Save the current state on F5 and before a reset, so a Reset can be undone with F9
+            if save_requested or gui.params.get('reset'):
+                state = (dict(gui.interaction_matrix), dict(gui.repulsion_matrix), dict(gui.params))
+                if worker:
+                    worker.call(lambda w, state=state: save_state(checkpoint, w.field, *state, step=w.steps))
+                else:
+                    save_state(checkpoint, field, *state, step=scheduler.total_steps)
+                save_requested = False
 
-        # Reset simulation if requested
-        if gui.params.get('reset'):
-            field = ParticleField(simulation_width, screen_height, gui.params['num_particles'])
-            effect = interaction_effects(field.particles, width=simulation_width, height=screen_height)
-            gui.params['reset'] = False
+            # Reset simulation if requested
+            if gui.params.get('reset'):
+                if worker:
+                    worker.reset(gui.params['num_particles'])
+                else:
+                    field.reset(gui.params['num_particles'])  # reuses the interaction manager
+                    print(f"Particle field seed: {field.seed}")
+                gui.params['reset'] = False
 
-        # Pause state
-        paused = gui.params.get('paused', False)
+            # Pause state
+            paused = gui.params.get('paused', False)
+
+            if worker:
+                # Physics runs in the worker, only send what changed
+                # the matrices are compared by identity and version counter instead of copying them every frame
+                controls = (dict(gui.params), gui.interaction_matrix, gui.interaction_matrix.version,
+                            gui.repulsion_matrix, gui.repulsion_matrix.version, paused)
+                if controls != sent_controls:
+                    worker.set_params(gui.params)
+                    worker.set_matrices(gui.interaction_matrix, gui.repulsion_matrix)
+                    worker.set_paused(paused)
+                    sent_controls = controls
+            else:
+                # The Particles slider adds or removes particles right away
+                if gui.params['num_particles'] != field.num_particles:
+                    field.resize(gui.params['num_particles'])
+                # Apply parameter changes to all particles at once
+                field.apply_params(gui.params)
 
         # === Physics Update ===
-        if not paused:
-            # random movement
-            for particle in field.particles:
-                velocity = (
-                    random.uniform(-particle.step_size, particle.step_size),
-                    random.uniform(-particle.step_size, particle.step_size)
-                )
-                particle.position = field.move_particle(
-                    particle.position, velocity, simulation_width, screen_height
-                )
-
-            # only after each 30 Frames build special index
-            if frame_counter % 30 == 0:  
-                effect.build_spatial_index()
-
-            # Particle interaktion
-            effect.repel_particles(gui.repulsion_matrix)
-            effect.attract_particles(gui.interaction_matrix)
+        if worker:
+            snapshot = worker.snapshot()
+            positions, colors = snapshot.positions, snapshot.colors
+        else:
+            if paused:
+                scheduler.resync()  # no catch-up burst after unpausing
+            else:
+                for _ in scheduler.frame_steps():
+                    # random movement, then repulsion and attraction (same step as the headless runner)
+                    field.step(gui.interaction_matrix, gui.repulsion_matrix)
+            positions, colors = field.store.positions, field.store.colors_rgb()
 
         # === Rendering ===
-        screen.fill((0, 0, 0))  
+        with timer.stage("draw"):
+            # draw particles (the renderer clears the whole simulation area, no screen.fill needed)
+            dirty_rects = [renderer.draw(screen, positions, colors)]
 
-        # draw particle
-        simulation_surface = screen.subsurface((0, 0, simulation_width, screen_height))
-        for p in field.particles:
-            y_pos = screen_height - p.position[1]
-            color = tuple(int(255 * c) for c in p.color)
+            if not show_stats:
+                gui.stage_summary = None
+            elif gui.stage_summary is None or timer.frames % 15 == 0:
+                gui.stage_summary = timer.summary()  # percentiles are refreshed four times a second
+            dirty_rects += gui.draw(screen)  # only the panel sections that changed
 
-            if p.shape == "o":
-                pygame.draw.circle(simulation_surface, color, 
-                                (int(p.position[0]), int(y_pos)), 3)
+            pygame.display.update(dirty_rects)  # push the simulation area and changed widgets only
+        timer.end_frame()
+        clock.tick(60)
 
+    if worker:
+        worker.stop()
+    if trace:
+        timer.write_trace(trace)
+        print(f"Stage trace written to {trace}")
+    pygame.quit()
+    sys.exit()
 
-        gui.draw(screen)
 
-        pygame.display.flip()
-        clock.tick(60)
+def save_state(path, field, interaction_matrix, repulsion_matrix, params, step):
+    """Write the field, both matrices, the slider values and the step counter to a checkpoint file.
+
+    Args:
+        path (str): Checkpoint file
+        field (ParticleField): Field to save
+        interaction_matrix (InteractionMatrix): Enabled attractions
+        repulsion_matrix (InteractionMatrix): Enabled repulsions
+        params (dict): Slider values
+        step (int): Physics steps run so far
+    """
+    save_checkpoint(path, field, interaction_matrix, repulsion_matrix, params, step=step)
+    print(f"Checkpoint written to {path} (step {step})")
+
+
+def restore_state(path, gui, backend, timer=None, approximate=None):
+    """Load a checkpoint and put its matrices and slider values into the GUI.
+
+    Args:
+        path (str): Checkpoint file
+        gui (ParticleGUI): GUI whose matrices and sliders are updated
+        backend (str): Force backend of the restored field
+        timer (StageTimer): Stage timer of the restored field
+        approximate (float): Theta of the approximate far field forces of the restored field
+
+    Returns:
+        Checkpoint: Restored state, the field is in restored.field
+    """
+    restored = load_checkpoint(path, backend=backend, timer=timer, approximate=approximate)
+    if restored.field.species.labels != gui.type_labels:
+        gui.set_type_labels(restored.field.species.labels)   # the checkpoint has other species
+    gui.interaction_matrix.update(restored.interaction_matrix)
+    gui.repulsion_matrix.update(restored.repulsion_matrix)
+    gui.set_params(restored.params)
+    print(f"Checkpoint {path} loaded (step {restored.step}, seed {restored.field.seed})")
+    return restored
+
+
+def replay(path, fps=60, max_size=None):
+    """Plays a recorded trajectory without computing any physics.
+    
+    Frames are streamed from the memory-mapped positions file, so only the
+    frame on screen is read from disk. Space pauses, the arrow keys step
+    through the frames while paused, Escape quits. Fields larger than the
+    window are shown shrunk to fit.
+
+    Args:
+        path (str): Trajectory directory written by TrajectoryWriter
+        fps (float): Frames shown per second
+        max_size (tuple): Largest window size (width, height), the desktop size if None
+    """
+    trajectory = TrajectoryReader(path)
+    if len(trajectory) == 0:
+        raise ValueError(f"No frames recorded in {path}")
+    width, height = float(trajectory.meta['width']), float(trajectory.meta['height'])
+
+    pygame.init()
+    if max_size is None:
+        info = pygame.display.Info()   # desktop size, leave room for the title bar and task bar
+        max_size = (info.current_w - 80, info.current_h - 120) if info.current_w > 0 else (1200, 800)
+    scale = fit_scale(width, height, *max_size)
+    window = (max(1, int(width * scale)), max(1, int(height * scale)))
+    screen = pygame.display.set_mode(window)
+    clock = pygame.time.Clock()
+    renderer = ParticleRenderer(*window, radius=max(1, round(3 * scale)), scale=scale)
+    colors = trajectory.colors_rgb()  # types and colors do not change during a run
+    frame = 0
+    paused = False
+    running = True
+
+    while running:
+        for event in pygame.event.get():
+            if event.type == QUIT:
+                running = False
+            elif event.type == KEYDOWN:
+                if event.key == K_ESCAPE:
+                    running = False
+                elif event.key == K_SPACE:
+                    paused = not paused
+                elif event.key == K_RIGHT:
+                    frame = (frame + 1) % len(trajectory)
+                elif event.key == K_LEFT:
+                    frame = (frame - 1) % len(trajectory)
+
+        rect = renderer.draw(screen, trajectory[frame], colors)
+        pygame.display.set_caption(f"Replay {path}: frame {frame + 1}/{len(trajectory)} "
+                                   f"(step {trajectory.step_of(frame)})")
+        pygame.display.update(rect)
+        if not paused:
+            frame = (frame + 1) % len(trajectory)  # loops at the end
+        clock.tick(fps)
 
     pygame.quit()
     sys.exit()
 
+
+def run_profiled(output, **kwargs):
+    """Runs main() under cProfile, prints the slowest functions and dumps the pstats file.
+
+    Args:
+        output (str): File the profile is dumped to (readable with pstats or snakeviz)
+        **kwargs: Arguments of main()
+    """
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        main(**kwargs)
+    finally:
+        profiler.disable()
+        stats = pstats.Stats(profiler).sort_stats("cumulative")
+        stats.print_stats(25)
+        stats.dump_stats(output)
+        print(f"Profile written to {output}")
+
+
 if __name__ == "__main__":
-        main()  # CRUCIAL: This launches everything
\ No newline at end of file
+        args = parse_args()
+        scheduler = StepScheduler(substeps=args.substeps, adaptive=args.adaptive,
+                                  physics_hz=args.physics_hz, min_fps=args.min_fps)
+        options = dict(backend=args.backend, seed=args.seed, scheduler=scheduler, threaded=args.threaded,
+                       show_stats=args.stats, trace=args.trace, checkpoint=args.checkpoint, resume=args.resume,
+                       species=args.species, approximate=args.approximate)
+        if args.replay:
+            replay(args.replay, fps=args.replay_fps, max_size=args.replay_size)
+        elif args.profile:
+            run_profiled(args.profile, **options)
+        else:
+            main(**options)  # CRUCIAL: This launches everything
@@ -0,0 +1,88 @@
+"""Scheduling of physics steps and rendered frames in the GUI loop
+"""
+import time
+
+
+class StepScheduler:
+    """
+    Decides how many physics steps run before the next frame is drawn.
+
+    Two modes:
+    - fixed: every frame runs exactly substeps physics steps, the frame rate is
+      paced by the caller (clock.tick), so the simulation runs at fps * substeps
+      steps per second as long as the machine keeps up
+    - adaptive: the physics runs at a fixed timestep of 1 / physics_hz wall seconds.
+      Steps that are due are run before the next frame; when the physics falls
+      behind, frames are dropped instead of slowing down the simulation, but the
+      display is still redrawn (and events handled) at least min_fps times per second.
+      The backlog is capped at max_backlog steps, so a field that is too large for
+      the target rate slows down instead of never drawing again.
+
+    Usage in the main loop:
+
+        for _ in scheduler.frame_steps():
+            field.step(...)
+        render()
+
+    Attributes:
+        - adaptive: True for the adaptive mode
+        - substeps: steps per frame in the fixed mode
+        - physics_hz: target physics steps per wall second in the adaptive mode
+        - min_fps: lowest display rate in the adaptive mode
+        - max_backlog: largest number of due steps carried over to the next frames
+        - total_steps: physics steps run so far
+        - frames: frames scheduled so far
+    """
+    def __init__(self, substeps=1, adaptive=False, physics_hz=60.0, min_fps=15.0, max_backlog=None,
+                 clock=time.perf_counter):
+        if substeps < 1:
+            raise ValueError("substeps must be at least 1")
+        if physics_hz <= 0 or min_fps <= 0:
+            raise ValueError("physics_hz and min_fps must be positive")
+        self.substeps = substeps
+        self.adaptive = adaptive
+        self.physics_hz = physics_hz
+        self.min_fps = min_fps
+        self.max_backlog = max_backlog if max_backlog is not None else max(1.0, physics_hz / min_fps)
+        self.total_steps = 0
+        self.frames = 0
+        self._clock = clock
+        self._last = clock()
+        self._backlog = 0.0   # physics steps that are due but not run yet
+
+    @property
+    def backlog(self):
+        """Number of due physics steps that were not run yet (adaptive mode)."""
+        return self._backlog
+
+    def resync(self):
+        """Forgets the backlog, e.g. while the simulation is paused, so no burst of steps follows."""
+        self._last = self._clock()
+        self._backlog = 0.0
+
+    def frame_steps(self):
+        """
+        Yields once for every physics step to run before the next frame is drawn.
+
+        Yields:
+            - int: number of the step within this frame
+        """
+        self.frames += 1
+        if not self.adaptive:
+            for substep in range(self.substeps):
+                self.total_steps += 1
+                yield substep
+            return
+
+        now = self._clock()
+        self._backlog = min(self._backlog + (now - self._last) * self.physics_hz, self.max_backlog)
+        self._last = now
+        deadline = now + 1.0 / self.min_fps   # draw at least min_fps frames per second
+        substep = 0
+        while self._backlog >= 1.0:
+            self._backlog -= 1.0
+            self.total_steps += 1
+            yield substep
+            substep += 1
+            if self._clock() >= deadline:
+                break   # remaining steps run after the next frame
@@ -0,0 +1,243 @@
+"""Periodic spatial index with a Verlet (skin radius) neighbor list
+"""
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+def minimum_image(delta, boxsize):
+    """
+    Maps coordinate differences to the shortest vector on the torus.
+
+    Args:
+        - delta: float array (..., 2) with coordinate differences
+        - boxsize: array (2,) with the field width and height
+
+    Returns:
+        - numpy.ndarray: wrapped differences, every component within [-size/2, size/2]
+    """
+    return delta - boxsize * np.round(delta / boxsize)
+
+
+def wrap_into_box(positions, boxsize):
+    """
+    Returns a copy of the positions wrapped into [0, size) as required by a periodic cKDTree.
+
+    Args:
+        - positions: float array (N, 2)
+        - boxsize: array (2,) with the field width and height
+
+    Returns:
+        - numpy.ndarray: wrapped copy of the positions
+    """
+    data = np.mod(positions, boxsize)
+    data[data >= boxsize] = 0.0   # modulo of tiny negative numbers can return the box size itself
+    return data
+
+
+class PeriodicNeighborIndex:
+    """
+    Neighbor list for a field that wraps around its edges.
+
+    The pairs are searched with a periodic cKDTree (boxsize=(width, height)) up to
+    cutoff + skin. As long as no particle has moved more than half the skin since
+    the last build, every pair that is now closer than cutoff is still in the list,
+    so the expensive tree build only happens when particles have moved far enough.
+
+    With one cutoff per particle type the pairs are directed instead: the particles
+    of every type are searched with their own cutoff + skin, so types with a short
+    influence radius do not pay for the longest radius of the field.
+
+    Attributes:
+        - boxsize: array (2,) with the field width and height
+        - skin: extra search distance that makes the pair list valid for several steps
+        - tree: periodic cKDTree over the positions of the last build
+        - pairs_i, pairs_j: int arrays with the candidate pairs (i < j), or with directed
+          pairs (pairs_i is moved by pairs_j) if directed is set
+        - directed: True if the pairs were searched with per-type cutoffs
+        - cutoff: largest interaction distance the pair list is valid for, or float array (K,)
+          with the cutoff of every type
+        - builds: number of tree builds so far
+    """
+    def __init__(self, width, height, skin=10.0):
+        self.boxsize = np.array([width, height], dtype=np.float64)
+        self.skin = skin
+        self.builds = 0
+        self.clear()
+
+    def clear(self):
+        """Forgets the tree and the pair list, the next update builds them again."""
+        self.tree = None
+        self.pairs_i = np.empty(0, dtype=np.intp)
+        self.pairs_j = np.empty(0, dtype=np.intp)
+        self.directed = False
+        self.cutoff = 0.0
+        self._reference = None
+        self._type_ids = None
+
+    def build(self, positions, cutoff, type_ids=None):
+        """
+        Builds the periodic tree and the pair list from the current positions.
+
+        Args:
+            - positions: float array (N, 2) inside the field
+            - cutoff: largest interaction distance, or float array (K,) with the distance of every type
+            - type_ids: int array (N,), required with per-type cutoffs
+        """
+        data = wrap_into_box(positions, self.boxsize)
+        self.tree = cKDTree(data, boxsize=self.boxsize)
+        if np.ndim(cutoff) == 0:
+            pairs = self.tree.query_pairs(cutoff + self.skin, output_type='ndarray')
+            self.pairs_i, self.pairs_j = pairs[:, 0], pairs[:, 1]
+            self.directed = False
+            self.cutoff = float(cutoff)
+        else:
+            self.cutoff = np.array(cutoff, dtype=np.float64)
+            self.pairs_i, self.pairs_j = self._typed_pairs(data, type_ids)
+            self.directed = True
+        self._type_ids = None if type_ids is None else np.array(type_ids, dtype=np.intp)
+        self._reference = positions.copy()
+        self.builds += 1
+
+    def _typed_pairs(self, data, type_ids):
+        """Directed pairs (moved, other), the particles of every type searched with their own cutoff + skin."""
+        moved, other = [np.empty(0, dtype=np.intp)], [np.empty(0, dtype=np.intp)]
+        for type_id in np.flatnonzero(self.cutoff > 0):
+            members = np.flatnonzero(type_ids == type_id)
+            if len(members) == 0:
+                continue
+            group = cKDTree(data[members], boxsize=self.boxsize)
+            found = group.sparse_distance_matrix(self.tree, self.cutoff[type_id] + self.skin, output_type='ndarray')
+            i, j = members[found['i']], found['j'].astype(np.intp)
+            keep = i != j
+            moved.append(i[keep])
+            other.append(j[keep])
+        return np.concatenate(moved), np.concatenate(other)
+
+    def resize(self, positions, kept, type_ids=None):
+        """
+        Updates the pair list after particles were removed and/or appended, without a full rebuild.
+
+        Pairs between kept particles are renumbered. Pairs of the appended particles
+        (the rows after the kept ones) are searched up to cutoff + skin plus the largest
+        displacement of the kept particles since the last build, so the list stays
+        valid until the usual half-skin rebuild criterion triggers.
+
+        Args:
+            - positions: float array (M, 2), the kept particles first (in the order of kept),
+              then the appended ones
+            - kept: int array with the former rows of the kept particles
+            - type_ids: int array (M,) with the types after the resize, required for per-type
+              cutoffs (the index is cleared without them)
+        """
+        if self._reference is None:
+            return   # nothing built yet, the next update does a full build
+        if self.directed and type_ids is None:
+            self.clear()
+            return
+        kept = np.asarray(kept, dtype=np.intp)
+        n_kept = len(kept)
+        renumber = np.full(len(self._reference), -1, dtype=np.intp)
+        renumber[kept] = np.arange(n_kept)
+        pairs_i, pairs_j = renumber[self.pairs_i], renumber[self.pairs_j]
+        valid = (pairs_i >= 0) & (pairs_j >= 0)
+        pairs_i, pairs_j = pairs_i[valid], pairs_j[valid]
+        reference = np.concatenate([self._reference[kept], positions[n_kept:]])
+
+        if len(positions) > n_kept and len(positions) > 1:
+            moved = minimum_image(positions[:n_kept] - reference[:n_kept], self.boxsize)
+            max_moved = float(np.sqrt(np.einsum('ij,ij->i', moved, moved).max())) if n_kept else 0.0
+            current = cKDTree(wrap_into_box(positions, self.boxsize), boxsize=self.boxsize)
+            if self.directed:
+                added_i, added_j = self._added_typed_pairs(positions, n_kept, current, type_ids, max_moved)
+            else:
+                added_i, added_j = self._added_pairs(positions, n_kept, current, max_moved)
+            pairs_i = np.concatenate([pairs_i, added_i])
+            pairs_j = np.concatenate([pairs_j, added_j])
+
+        self.pairs_i, self.pairs_j = pairs_i, pairs_j
+        self._reference = reference
+        if type_ids is not None:
+            self._type_ids = np.array(type_ids, dtype=np.intp)
+        self.tree = cKDTree(wrap_into_box(reference, self.boxsize), boxsize=self.boxsize)   # for query_radius
+
+    def _added_pairs(self, positions, n_kept, current, max_moved):
+        """Pairs (i < j) of the appended particles."""
+        neighbors = current.query_ball_point(wrap_into_box(positions[n_kept:], self.boxsize),
+                                             self.cutoff + self.skin + max_moved)
+        counts = np.fromiter(map(len, neighbors), dtype=np.intp, count=len(neighbors))
+        other = np.concatenate(neighbors).astype(np.intp) if counts.sum() else np.empty(0, dtype=np.intp)
+        new = np.repeat(np.arange(n_kept, len(positions)), counts)
+        lower = other < new   # every pair once, no self pairs
+        return other[lower], new[lower]
+
+    def _added_typed_pairs(self, positions, n_kept, current, type_ids, max_moved):
+        """Directed pairs in both directions between the appended particles and all others."""
+        type_ids = np.asarray(type_ids, dtype=np.intp)
+        cutoff = self.cutoff[type_ids] + self.skin + max_moved   # search distance of every particle
+        added = cKDTree(wrap_into_box(positions[n_kept:], self.boxsize), boxsize=self.boxsize)
+        found = added.sparse_distance_matrix(current, cutoff.max(), output_type='ndarray')
+        new, other, distance = found['i'].astype(np.intp) + n_kept, found['j'].astype(np.intp), found['v']
+        pulled = (new != other) & (distance <= cutoff[new])       # appended particle moved by any other one
+        pushed = (other < n_kept) & (distance <= cutoff[other])   # kept particle moved by an appended one
+        return (np.concatenate([new[pulled], other[pushed]]),
+                np.concatenate([other[pulled], new[pushed]]))
+
+    def needs_rebuild(self, positions, cutoff, type_ids=None):
+        """
+        Checks whether the pair list is still valid for the given positions and cutoff.
+
+        Args:
+            - positions: float array (N, 2)
+            - cutoff: largest interaction distance, or float array (K,) with the distance of every type
+            - type_ids: int array (N,) for per-type cutoffs
+
+        Returns:
+            - bool: True if some particle moved more than half the skin or the cutoff grew
+        """
+        if self.tree is None or len(positions) != len(self._reference):
+            return True
+        if np.ndim(cutoff) != np.ndim(self.cutoff) or np.shape(cutoff) != np.shape(self.cutoff):
+            return True   # switched between one cutoff and per-type cutoffs
+        if np.any(np.asarray(cutoff) > self.cutoff):
+            return True
+        if np.ndim(cutoff) and (self._type_ids is None or not np.array_equal(type_ids, self._type_ids)):
+            return True
+        if len(positions) == 0:
+            return False
+        moved = minimum_image(positions - self._reference, self.boxsize)
+        return np.einsum('ij,ij->i', moved, moved).max() > (0.5 * self.skin) ** 2
+
+    def update(self, positions, cutoff, type_ids=None):
+        """
+        Rebuilds the index only if the pair list is no longer valid.
+
+        Args:
+            - positions: float array (N, 2)
+            - cutoff: largest interaction distance, or float array (K,) with the distance of every type
+            - type_ids: int array (N,), required with per-type cutoffs
+
+        Returns:
+            - bool: True if the index was rebuilt
+        """
+        if self.needs_rebuild(positions, cutoff, type_ids):
+            self.build(positions, cutoff, type_ids)
+            return True
+        return False
+
+    def query_radius(self, positions, point, radius):
+        """
+        Finds all particles within radius of a point, across the wrapped edges.
+
+        Args:
+            - positions: float array (N, 2) with the current positions
+            - point: (x, y) center of the search
+            - radius: search radius
+
+        Returns:
+            - numpy.ndarray: indices of the particles within radius
+        """
+        self.update(positions, self.cutoff, self._type_ids)   # only the tree is needed here, the cutoffs stay as they are
+        candidates = np.asarray(self.tree.query_ball_point(np.mod(point, self.boxsize), radius + 0.5 * self.skin),
+                                dtype=np.intp)
+        delta = minimum_image(positions[candidates] - np.asarray(point, dtype=np.float64), self.boxsize)
+        return candidates[np.einsum('ij,ij->i', delta, delta) <= radius ** 2]
@@ -0,0 +1,153 @@
+"""Table-driven registry of the particle species
+
+A species is one row of the registry: a label, the default step size, influence
+strength and influence radius, and the RGB ranges its color palette is drawn
+from. The row index is the integer type id used by the ParticleStore and the
+force kernels, so the kernels never look at labels and the cost per pair does
+not depend on the number of species.
+
+The first four species are the classic types of particle_classes (A, B, C, D).
+Further species are labelled E ... Z, AA, AB, ... and get evenly spread hues.
+"""
+import colorsys
+import re
+import numpy as np
+
+_LABEL_PATTERN = re.compile(r"^[A-Z]+$")
+_GOLDEN_RATIO = 0.618033988749895   # hue step that keeps neighbouring species far apart on the color wheel
+
+
+def species_label(index):
+    """
+    Label of the species with the given type id: A ... Z, AA, AB, ...
+
+    Labels never contain an underscore, so interaction keys like 'AA_B' stay unambiguous.
+    """
+    label = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        label = chr(ord("A") + remainder) + label
+    return label
+
+
+def label_index(label):
+    """Inverse of species_label, None for labels that are not of the form A ... Z, AA, ..."""
+    if not _LABEL_PATTERN.match(label):
+        return None
+    index = 0
+    for character in label:
+        index = index * 26 + ord(character) - ord("A") + 1
+    return index - 1
+
+
+def _classic_types():
+    from particle_simulation.particle_classes import PARTICLE_TYPES  #lazy import to avoid loop
+    return PARTICLE_TYPES
+
+
+def color_range(label):
+    """
+    RGB ranges the palette of a species is drawn from.
+
+    Args:
+        - label: species label (e.g. "A" or "F")
+
+    Returns:
+        - tuple: ((r_low, r_high), (g_low, g_high), (b_low, b_high)) in 0-1 range
+
+    Raises:
+        - ValueError: for labels that are neither classic types nor generated species labels
+    """
+    classic = _classic_types()
+    index = label_index(label)
+    if index is None:
+        raise ValueError(f"Unknown particle species: {label}")
+    if index < len(classic):
+        return classic[index].color_range
+    red, green, blue = colorsys.hsv_to_rgb((index * _GOLDEN_RATIO) % 1.0, 0.75, 0.9)
+    return tuple((max(0.0, value - 0.15), min(1.0, value + 0.15)) for value in (red, green, blue))
+
+
+class SpeciesRegistry:
+    """
+    Labels and default parameters of all species of a field, stored as arrays indexed by type id.
+
+    Attributes:
+        - labels: list of species labels, the position in the list is the type id
+        - step_sizes: float array (K,) with the default random walk step sizes
+        - influence_strengths: float array (K,) with the default interaction strengths
+        - influence_radii: float array (K,) with the default interaction radii
+    """
+    # parameters of species that are not described anywhere (e.g. restored from a file with foreign labels)
+    FALLBACK = (0.2, 1.0, 50.0)
+
+    def __init__(self, labels, step_sizes, influence_strengths, influence_radii):
+        self.labels = list(labels)
+        if len(set(self.labels)) != len(self.labels) or any("_" in label for label in self.labels):
+            raise ValueError("Species labels must be unique and must not contain '_'")
+        self.step_sizes = np.array(step_sizes, dtype=np.float64).reshape(len(self.labels))
+        self.influence_strengths = np.array(influence_strengths, dtype=np.float64).reshape(len(self.labels))
+        self.influence_radii = np.array(influence_radii, dtype=np.float64).reshape(len(self.labels))
+
+    def __len__(self):
+        return len(self.labels)
+
+    def index(self, label):
+        """Type id of the species with the given label."""
+        return self.labels.index(label)
+
+    @classmethod
+    def classic(cls):
+        """The four classic types A, B, C and D with the defaults of their particle classes."""
+        return cls.generate(len(_classic_types()))
+
+    @classmethod
+    def generate(cls, count, seed=0):
+        """
+        Creates count species: the classic types first, then generated ones.
+
+        Generated species walk with the common step size and draw their strength
+        and radius reproducibly from the seed.
+
+        Args:
+            - count: number of species K
+            - seed: seed of the generated parameters
+
+        Returns:
+            - SpeciesRegistry: registry with K species
+        """
+        classic = _classic_types()[:count]
+        extra = count - len(classic)
+        rng = np.random.default_rng(seed)
+        step_sizes = [t.default_step_size for t in classic] + [0.2] * extra
+        strengths = [t.default_influence_strength for t in classic] + rng.uniform(0.0, 5.0, extra).tolist()
+        radii = [t.default_influence_radius for t in classic] + rng.uniform(25.0, 100.0, extra).tolist()
+        return cls([species_label(i) for i in range(count)], step_sizes, strengths, radii)
+
+    @classmethod
+    def for_labels(cls, labels):
+        """
+        Registry for a given list of labels, e.g. the type labels of a restored store.
+
+        Labels of classic or generated species get the same defaults as in generate(),
+        other labels get the FALLBACK parameters.
+        """
+        indices = [label_index(label) for label in labels]
+        known = [index for index in indices if index is not None]
+        generated = cls.generate(max(known) + 1 if known else 0)
+        rows = [(generated.step_sizes[i], generated.influence_strengths[i], generated.influence_radii[i])
+                if i is not None else cls.FALLBACK for i in indices]
+        step_sizes, strengths, radii = zip(*rows) if rows else ((), (), ())
+        return cls(labels, step_sizes, strengths, radii)
+
+    def to_dict(self):
+        """Plain dict of the table, e.g. for a JSON checkpoint header."""
+        return {'labels': self.labels, 'step_sizes': self.step_sizes.tolist(),
+                'influence_strengths': self.influence_strengths.tolist(),
+                'influence_radii': self.influence_radii.tolist()}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Inverse of to_dict."""
+        return cls(data['labels'], data['step_sizes'], data['influence_strengths'], data['influence_radii'])
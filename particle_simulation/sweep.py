@@ -0,0 +1,197 @@
+"""
+PARAMETER SWEEP OVER INTERACTION MATRICES
+
+Runs many independent headless simulations in a process pool and streams one
+JSON line per finished run to a results file:
+
+    python -m particle_simulation.sweep random --runs 256 --workers 64 --steps 500 --output sweep.jsonl
+    python -m particle_simulation.sweep grid --attract "none;A_B;A_B,B_A" --radius 25,50 --output grid.jsonl
+    python -m particle_simulation.sweep random --runs 256 --steps 20000 --stop-on-convergence --output long.jsonl
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from particle_simulation.batch import DEFAULT_PARAMS, TYPE_LABELS, format_matrix, parse_matrix, run_batch
+from particle_simulation.main_classes import interaction_effects
+from particle_simulation.metrics import field_metrics
+
+# Slider ranges of the GUI, used for random sampling
+PARAM_RANGES = {
+    'base_speed': (0.1, 2.0),
+    'influence_radius': (10, 100),
+    'attraction_strength': (0.1, 1.0),
+}
+
+
+def grid_configs(attract_options, repel_options, param_grid=None):
+    """
+    Builds every combination of the given matrices and parameter values.
+
+    Args:
+        - attract_options: list of attraction matrices in parse_matrix format (e.g. ["none", "A_B"])
+        - repel_options: list of repulsion matrices in parse_matrix format
+        - param_grid: dict mapping parameter names to lists of values
+
+    Returns:
+        - list: config dicts with 'attract', 'repel' and the parameter values
+    """
+    param_grid = param_grid or {}
+    names = list(param_grid)
+    configs = []
+    for attract, repel in itertools.product(attract_options, repel_options):
+        for values in itertools.product(*(param_grid[name] for name in names)):
+            config = {'attract': format_matrix(parse_matrix(attract)), 'repel': format_matrix(parse_matrix(repel))}
+            config.update(zip(names, values))
+            configs.append(config)
+    return configs
+
+
+def random_configs(runs, density=0.25, seed=None, sample_params=True):
+    """
+    Draws random matrix and slider configurations.
+
+    Args:
+        - runs: number of configurations
+        - density: probability of every matrix entry being enabled
+        - seed: seed of the sampler
+        - sample_params: also draw the slider values uniformly from their GUI ranges
+
+    Returns:
+        - list: config dicts with 'attract', 'repel' and the parameter values
+    """
+    rng = np.random.default_rng(seed)
+    keys = [f"{a}_{b}" for a in TYPE_LABELS for b in TYPE_LABELS]
+    configs = []
+    for _ in range(runs):
+        attract = rng.random(len(keys)) < density
+        repel = rng.random(len(keys)) < density
+        config = {
+            'attract': format_matrix(dict(zip(keys, attract))),
+            'repel': format_matrix(dict(zip(keys, repel))),
+        }
+        if sample_params:
+            for name, (low, high) in PARAM_RANGES.items():
+                config[name] = float(rng.uniform(low, high))
+        configs.append(config)
+    return configs
+
+
+def run_config(job):
+    """
+    Runs a single sweep configuration (executed in a worker process).
+
+    Args:
+        - job: dict with 'run', 'config', 'seed' and the shared run settings
+
+    Returns:
+        - dict: configuration, seed, timing and field metrics of the run (see metrics.field_metrics,
+          computed from the neighbor pairs of the last force step)
+    """
+    config = job['config']
+    params = {name: config.get(name, default) for name, default in DEFAULT_PARAMS.items()}
+    field, summary = run_batch(job['num_particles'], job['width'], job['height'], job['steps'],
+                               parse_matrix(config['attract']), parse_matrix(config['repel']),
+                               seed=job['seed'], backend=job['backend'], params=params,
+                               stop_on_convergence=job.get('stop_on_convergence', False))
+    return {'run': job['run'], **summary, **field_metrics(field)}
+
+
+def run_sweep(configs, num_particles, width, height, steps, output, workers=None, seed=None, backend="kdtree",
+              stop_on_convergence=False):
+    """
+    Runs all configurations in a process pool and streams the results to a JSON lines file.
+
+    Every run gets its own seed spawned from the sweep seed, so single runs can be
+    reproduced with the batch runner.
+
+    Args:
+        - configs: list of config dicts (see grid_configs / random_configs)
+        - num_particles, width, height, steps: settings shared by all runs
+        - output: path of the results file, one JSON object per line is appended
+        - workers: number of worker processes (defaults to the number of cores)
+        - seed: seed of the sweep
+        - backend: force backend of interaction_effects
+        - stop_on_convergence: end every run as soon as it converged (see convergence.ConvergenceMonitor),
+          steps is then the largest number of steps of a run
+
+    Returns:
+        - list: result dicts in completion order
+    """
+    run_seeds = np.random.SeedSequence(seed).spawn(len(configs))
+    jobs = [
+        {
+            'run': run, 'config': config, 'seed': int(run_seed.generate_state(1)[0]),
+            'num_particles': num_particles, 'width': width, 'height': height,
+            'steps': steps, 'backend': backend, 'stop_on_convergence': stop_on_convergence,
+        }
+        for run, (config, run_seed) in enumerate(zip(configs, run_seeds))
+    ]
+
+    results = []
+    # spawn fresh workers: forked children inherit the numba threading layer in a broken state
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), mp_context=context) as pool, \
+            open(output, "a") as out:
+        futures = [pool.submit(run_config, job) for job in jobs]
+        for future in as_completed(futures):
+            result = future.result()
+            out.write(json.dumps(result) + "\n")
+            out.flush()   # results are visible while the sweep is still running
+            results.append(result)
+    return results
+
+
+def _float_list(text):
+    return [float(value) for value in text.split(",")]
+
+
+def build_parser():
+    """Creates the command line parser of the sweep."""
+    parser = argparse.ArgumentParser(description="Parallel parameter sweep over interaction matrices")
+    parser.add_argument("mode", choices=("grid", "random"), help="full grid or random sample of configurations")
+    parser.add_argument("--output", default="sweep.jsonl", help="JSON lines file the results are appended to")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes")
+    parser.add_argument("--seed", type=int, default=None, help="seed of the sweep")
+    parser.add_argument("--particles", type=int, default=2000, help="number of particles per run")
+    parser.add_argument("--width", type=float, default=900, help="field width")
+    parser.add_argument("--height", type=float, default=800, help="field height")
+    parser.add_argument("--steps", type=int, default=500, help="physics steps per run")
+    parser.add_argument("--backend", choices=interaction_effects.BACKENDS, default="kdtree", help="force backend")
+    parser.add_argument("--stop-on-convergence", action="store_true",
+                        help="end a run early once it converged, --steps is then the upper limit")
+    # random mode
+    parser.add_argument("--runs", type=int, default=64, help="random mode: number of configurations")
+    parser.add_argument("--density", type=float, default=0.25, help="random mode: share of enabled matrix entries")
+    # grid mode
+    parser.add_argument("--attract", default="none", help="grid mode: attraction matrices separated by ';'")
+    parser.add_argument("--repel", default="none", help="grid mode: repulsion matrices separated by ';'")
+    parser.add_argument("--speed", type=_float_list, default=None, help="grid mode: comma separated speeds")
+    parser.add_argument("--radius", type=_float_list, default=None, help="grid mode: comma separated radii")
+    parser.add_argument("--strength", type=_float_list, default=None, help="grid mode: comma separated strengths")
+    return parser
+
+
+def main(argv=None):
+    """Command line entry point of the sweep."""
+    args = build_parser().parse_args(argv)
+    if args.mode == "grid":
+        param_grid = {name: values for name, values in (('base_speed', args.speed),
+                                                        ('influence_radius', args.radius),
+                                                        ('attraction_strength', args.strength)) if values}
+        configs = grid_configs(args.attract.split(";"), args.repel.split(";"), param_grid)
+    else:
+        configs = random_configs(args.runs, density=args.density, seed=args.seed)
+
+    results = run_sweep(configs, args.particles, args.width, args.height, args.steps, args.output,
+                        workers=args.workers, seed=args.seed, backend=args.backend,
+                        stop_on_convergence=args.stop_on_convergence)
+    print(f"{len(results)} runs written to {args.output}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
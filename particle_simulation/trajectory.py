@@ -0,0 +1,124 @@
+"""Memory-mapped recording and replay of particle trajectories
+
+A trajectory is a directory with:
+- positions.npy: float32 array [frames, N, 2], preallocated and written through a memmap
+- type_ids.npy, palette_ids.npy: particle types and colors (they do not change during a run)
+- meta.json: field size, step interval, seed, type labels and the number of written frames
+"""
+import json
+import os
+import numpy as np
+from numpy.lib.format import open_memmap
+from particle_simulation.main_classes import ParticleStore
+
+
+class TrajectoryWriter:
+    """
+    Records the positions of every k-th step into a preallocated memory-mapped file.
+
+    Attributes:
+        - path: trajectory directory
+        - every: steps between two recorded frames
+        - capacity: number of frames the file was allocated for
+        - frames: number of frames written so far
+    """
+    def __init__(self, path, store, width, height, steps, every=1, seed=None):
+        """
+        Args:
+            - path: directory to create (existing files are overwritten)
+            - store: ParticleStore of the recorded field
+            - width, height: field size
+            - steps: number of steps that will be run, the start positions are frame 0
+            - every: record every k-th step
+            - seed: seed of the run, stored in the metadata
+        """
+        if every < 1:
+            raise ValueError("every must be at least 1")
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.every = every
+        self.capacity = steps // every + 1
+        self.frames = 0
+        self._positions = open_memmap(os.path.join(path, "positions.npy"), mode="w+", dtype=np.float32,
+                                      shape=(self.capacity, len(store), 2))
+        np.save(os.path.join(path, "type_ids.npy"), store.type_ids)
+        np.save(os.path.join(path, "palette_ids.npy"), store.palette_ids)
+        self.meta = {
+            'width': width, 'height': height, 'num_particles': len(store), 'every': every,
+            'seed': seed, 'type_labels': list(store.type_labels), 'frames': 0,
+        }
+        self._write_meta()
+
+    def _write_meta(self):
+        with open(os.path.join(self.path, "meta.json"), "w") as f:
+            json.dump(self.meta, f, indent=2)
+
+    def record(self, positions, step):
+        """
+        Writes the positions if step is a multiple of every.
+
+        Args:
+            - positions: float array (N, 2)
+            - step: number of steps run so far (0 for the start positions)
+
+        Returns:
+            - bool: True if a frame was written
+        """
+        if step % self.every or self.frames >= self.capacity:
+            return False
+        self._positions[self.frames] = positions
+        self.frames += 1
+        return True
+
+    def close(self):
+        """Flushes the memmap and stores the number of written frames."""
+        if self._positions is None:
+            return
+        self._positions.flush()
+        self._positions = None
+        self.meta['frames'] = self.frames
+        self._write_meta()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class TrajectoryReader:
+    """
+    Streams recorded frames from disk; only the frames that are accessed are read.
+
+    Attributes:
+        - meta: metadata dict of the recording
+        - positions: read-only memmap [frames, N, 2] cut to the written frames
+        - type_ids, palette_ids: particle types and palette indices
+    """
+    def __init__(self, path):
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+        positions = np.load(os.path.join(path, "positions.npy"), mmap_mode="r")
+        self.positions = positions[:self.meta['frames']]
+        self.type_ids = np.load(os.path.join(path, "type_ids.npy"))
+        self.palette_ids = np.load(os.path.join(path, "palette_ids.npy"))
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __getitem__(self, frame):
+        return self.positions[frame]
+
+    def __iter__(self):
+        return iter(self.positions)
+
+    def step_of(self, frame):
+        """Simulation step the frame was recorded at."""
+        return frame * self.meta['every']
+
+    def colors_rgb(self):
+        """uint8 array (N, 3) with the particle colors, taken from the same palettes as in the run."""
+        n = len(self.type_ids)
+        store = ParticleStore(np.zeros((n, 2)), self.type_ids, np.zeros(n), np.zeros(n), np.zeros(n),
+                              self.palette_ids, type_labels=self.meta['type_labels'])
+        return store.colors_rgb()
@@ -0,0 +1,63 @@
+import json
+import numpy as np
+import pytest
+from particle_simulation.batch import parse_matrix, format_matrix, run_batch, main
+
+# Test parsing of the enabled interaction pairs
+def test_parse_matrix():
+    matrix = parse_matrix("A_B, c_d")
+
+    assert len(matrix) == 16
+    assert matrix["A_B"] and matrix["C_D"]
+    assert sum(matrix.values()) == 2
+    assert format_matrix(matrix) == "A_B,C_D"
+    assert all(parse_matrix("all").values())
+    assert not any(parse_matrix("none").values())
+
+    with pytest.raises(ValueError):
+        parse_matrix("A_X")
+
+# Test weighted pairs of the continuous force matrix
+def test_parse_weighted_matrix():
+    matrix = parse_matrix("A_B:0.5,C_A:-1,D_D")
+
+    assert matrix["A_B"] == 0.5 and matrix["C_A"] == -1.0 and matrix["D_D"] is True
+    assert format_matrix(matrix) == "A_B:0.5,C_A:-1,D_D"
+    assert parse_matrix(format_matrix(matrix)) == matrix
+
+    with pytest.raises(ValueError):
+        parse_matrix("A_B:strong")
+
+# Test that a seeded headless run is reproducible
+def test_run_batch_is_reproducible():
+    rules = parse_matrix("A_B,B_A,C_C")
+    field_1, summary = run_batch(200, 200, 200, 5, rules, parse_matrix("D_A"), seed=11)
+    field_2, _ = run_batch(200, 200, 200, 5, rules, parse_matrix("D_A"), seed=11)
+
+    assert summary["steps"] == 5 and summary["seed"] == 11
+    assert np.array_equal(field_1.store.positions, field_2.store.positions)
+
+# Test the command line entry point
+def test_batch_cli(tmp_path):
+    output = tmp_path / "summary.json"
+    main(["--particles", "100", "--steps", "3", "--attract", "A_A", "--seed", "1", "--output", str(output)])
+
+    summary = json.loads(output.read_text())
+    assert summary["num_particles"] == 100
+    assert summary["attract"] == "A_A"
+
+# Test a headless run with approximate far field forces
+def test_run_batch_approximate():
+    _, summary = run_batch(300, 200, 200, 3, "all", None, seed=2, params={'influence_radius': 80}, approximate=0.5)
+
+    assert summary["approximate"] == 0.5
+    with pytest.raises(ValueError):
+        run_batch(300, 200, 200, 1, None, None, domains=2, approximate=0.5)
+
+# Test that a headless run streams metrics to a CSV file
+def test_run_batch_metrics(tmp_path):
+    path = tmp_path / "metrics.csv"
+    _, summary = run_batch(200, 200, 200, 10, "A_A", None, seed=3, metrics=str(path), metrics_every=5)
+
+    assert summary["metrics_rows"] == 2
+    assert path.read_text().splitlines()[0].startswith("step,mean_nn_distance")
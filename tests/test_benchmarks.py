@@ -0,0 +1,36 @@
+import json
+from benchmarks.run_benchmarks import compare, main, random_forces, random_rules, run_benchmarks
+
+# Test that every stage is measured for a tiny parameter matrix
+def test_run_benchmarks_covers_all_stages():
+    report = run_benchmarks(counts=[200], radii=[20], densities=[0.5], repeat=1, min_time=0.0)
+    names = {result['name'] for result in report['results']}
+
+    assert names == {"generate_particles", "random_walk", "render_offscreen", "build_spatial_index",
+                     "find_particles_within_reactionradius", "attract_particles", "repel_particles",
+                     "apply_forces", "apply_forces_approximate"}
+    assert all(result['median'] > 0 for result in report['results'])
+
+# Test the matrix density of the generated rules
+def test_random_rules_density():
+    assert not any(random_rules(0.0).values())
+    assert all(random_rules(1.0).values())
+    assert not random_forces(0.0).any()
+    assert (random_forces(1.0) != 0).all()
+
+# Test the regression check
+def test_compare_flags_slower_cases():
+    case = {'name': "random_walk", 'backend': "kdtree", 'params': {'particles': 10}}
+    baseline = {'results': [dict(case, median=1.0)]}
+
+    assert compare({'results': [dict(case, median=1.1)]}, baseline) == []
+    assert len(compare({'results': [dict(case, median=2.0)]}, baseline)) == 1
+
+# Test the JSON output of the command line
+def test_main_writes_json(tmp_path):
+    output = tmp_path / "bench.json"
+    main(["--counts", "100", "--radii", "20", "--densities", "1", "--repeat", "1", "--min-time", "0",
+          "--only", "random_walk,attract_particles", "--output", str(output)])
+
+    report = json.loads(output.read_text())
+    assert [result['name'] for result in report['results']] == ["random_walk", "attract_particles"]
@@ -0,0 +1,58 @@
+import numpy as np
+from particle_simulation.batch import parse_matrix, run_batch
+from particle_simulation.checkpoint import load_checkpoint, save_checkpoint
+from particle_simulation.main_classes import ParticleField
+
+ATTRACT = {"A_B": True, "C_C": True}
+REPEL = {"D_A": True}
+
+# Test that a restored field continues exactly like the original one
+def test_resume_continues_identically(tmp_path):
+    path = tmp_path / "field.npz"
+    field = ParticleField(120, 100, 60, seed=4)
+    field.step(ATTRACT, REPEL)
+    save_checkpoint(path, field, ATTRACT, REPEL, params={'base_speed': 0.2, 'reset': True}, step=1)
+
+    restored = load_checkpoint(path)
+    assert restored.step == 1
+    assert restored.interaction_matrix == ATTRACT and restored.repulsion_matrix == REPEL
+    assert restored.params == {'base_speed': 0.2}   # the momentary reset flag is not saved
+    assert restored.field.width == 120 and restored.field.seed == 4
+    assert np.array_equal(restored.field.store.palette_ids, field.store.palette_ids)
+
+    for f in (field, restored.field):
+        for _ in range(3):
+            f.step(ATTRACT, REPEL)
+    assert np.allclose(restored.field.store.positions, field.store.positions)   # pair order may differ
+
+# Test that no temporary file is left behind
+def test_checkpoint_is_replaced_atomically(tmp_path):
+    path = tmp_path / "field.npz"
+    field = ParticleField(50, 50, 10, seed=1)
+    save_checkpoint(path, field, {}, {})
+    save_checkpoint(path, field, {}, {}, step=5)
+
+    assert [p.name for p in tmp_path.iterdir()] == ["field.npz"]
+    assert load_checkpoint(path).step == 5
+
+# Test that a batch run split in two equals one long run
+def test_batch_resume(tmp_path):
+    path = tmp_path / "run.npz"
+    attract, repel = parse_matrix("A_B,B_C"), parse_matrix("C_A")
+    full, _ = run_batch(80, 150, 150, 10, attract, repel, seed=9)
+
+    run_batch(80, 150, 150, 4, attract, repel, seed=9, checkpoint=str(path))
+    resumed, summary = run_batch(None, None, None, 6, None, None, resume=str(path))
+
+    assert summary['start_step'] == 4 and summary['attract'] == "A_B,B_C"
+    assert np.allclose(resumed.store.positions, full.store.positions)
+
+# Test that sliders given on resume override the saved ones
+def test_batch_resume_overrides_params(tmp_path):
+    path = tmp_path / "run.npz"
+    run_batch(50, 100, 100, 2, "A_B", None, seed=3, params={'base_speed': 0.3}, checkpoint=str(path))
+    resumed, summary = run_batch(None, None, None, 2, None, None, resume=str(path), params={'base_speed': 0.5})
+
+    assert summary['base_speed'] == 0.5 and summary['start_step'] == 2
+    assert (resumed.store.step_sizes == 0.5).all()
+    assert load_checkpoint(path).params['base_speed'] == 0.3
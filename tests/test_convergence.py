@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+from particle_simulation.convergence import ConvergenceMonitor
+from particle_simulation.main_classes import ParticleField
+from particle_simulation.batch import run_batch
+
+# Field without interactions whose particles only random-walk
+def random_walk(n=400, seed=1):
+    field = ParticleField(300, 300, n, seed=seed)
+    field.apply_params({'base_speed': 0.2, 'influence_radius': 30, 'attraction_strength': 0.5})
+    return field
+
+# Test that a pure random walk is detected as converged once the window is full
+def test_random_walk_converges():
+    field = random_walk()
+    monitor = ConvergenceMonitor(window=10, tolerance=0.05, every=5)
+    for step in range(1, 201):
+        field.step({}, {})
+        if monitor.update(step, field):
+            break
+
+    assert monitor.converged and monitor.converged_step == 55   # first sample at 5, ten more to fill the window
+    summary = monitor.statistics()
+    assert summary['clusters'] == 0 and summary['mean_displacement'] > 0
+
+# Test that a steadily accelerating field never plateaus
+def test_drift_does_not_converge():
+    field = random_walk(100)
+    monitor = ConvergenceMonitor(window=6, tolerance=0.05, every=1)
+    for step in range(1, 40):
+        field.store.positions[:] = np.mod(field.store.positions + 0.05 * step, 300)
+        assert not monitor.update(step, field)
+
+    assert len(monitor.history['mean_displacement']) == 6
+
+# Test that adding particles starts the window over
+def test_resize_resets():
+    field = random_walk(100)
+    monitor = ConvergenceMonitor(window=4, every=1)
+    for step in range(1, 4):
+        field.step({}, {})
+        monitor.update(step, field)
+    field.resize(150)
+    monitor.update(4, field)
+
+    assert all(len(samples) == 0 for samples in monitor.history.values())
+    with pytest.raises(ValueError):
+        ConvergenceMonitor(window=1)
+
+# Test that the batch runner stops a converged run early
+def test_batch_stops_on_convergence():
+    monitor = ConvergenceMonitor(window=6, tolerance=0.1, every=5)
+    _, summary = run_batch(300, 200, 200, 500, None, None, seed=4, convergence=monitor, stop_on_convergence=True)
+
+    assert summary["converged"] and summary["steps_run"] == summary["converged_step"] < 500
+    with pytest.raises(ValueError):
+        run_batch(300, 200, 200, 1, None, None, domains=2, stop_on_convergence=True)
@@ -0,0 +1,54 @@
+import numpy as np
+from particle_simulation.domain import StripDecomposition, band_rows, strip_distance, strip_of
+from particle_simulation.main_classes import ParticleField
+
+# Test the distance to a strip on the wrapped field
+def test_strip_distance():
+    x = np.array([10.0, 25.0, 45.0, 95.0])
+    assert np.allclose(strip_distance(x, 20.0, 40.0, 100.0), [10.0, 0.0, 5.0, 25.0])
+
+# Test that the strips give the same result as a single process
+def test_decomposition_matches_single_process():
+    attract = {"A_B": True, "B_A": True, "C_C": True, "D_A": True}
+    repel = {"A_A": True, "B_C": True, "D_D": True}
+    single = ParticleField(300, 200, 400)
+    single.store.step_sizes.fill(0)   # no random walk, the random streams differ
+    split = ParticleField(300, 200, 400)
+    for name in ("positions", "type_ids", "influence_radii", "influence_strengths", "step_sizes"):
+        getattr(split.store, name)[:] = getattr(single.store, name)
+
+    with StripDecomposition(split, n_strips=3, seed=1) as decomposition:
+        decomposition.step(attract, repel, steps=3)
+    for _ in range(3):
+        single.step(attract, repel)
+
+    assert np.allclose(split.store.positions, single.store.positions)
+
+# Test that the halo bands are found by binary search on the sorted keys, across the wrapped edge
+def test_band_rows():
+    keys = np.array([2.0, 15.0, 25.0, 41.0, 55.0, 80.0, 97.0])
+    assert list(band_rows(keys, 20.0, 40.0, 6.0, 100.0)) == [1, 3]
+    assert sorted(band_rows(keys, 0.0, 20.0, 5.0, 100.0)) == [6]
+    assert sorted(band_rows(keys, 20.0, 40.0, 45.0, 100.0)) == [0, 1, 3, 4, 5, 6]   # everything else
+
+# Test that particles crossing strip borders migrate and keep their identity
+def test_particles_migrate_between_strips():
+    attract = {"A_A": True, "B_B": True, "C_C": True, "D_D": True}
+    single = ParticleField(300, 200, 400, seed=3)
+    single.store.step_sizes.fill(0)
+    single.store.influence_strengths.fill(2.0)   # strong pull, many particles change their strip
+    split = ParticleField(300, 200, 400, seed=3)
+    for name in ("positions", "type_ids", "influence_radii", "influence_strengths", "step_sizes"):
+        getattr(split.store, name)[:] = getattr(single.store, name)
+    before = strip_of(single.store.positions[:, 0], 300, 4)
+
+    with StripDecomposition(split, n_strips=4, seed=1) as decomposition:
+        decomposition.step(attract, {}, steps=10)
+        keys = decomposition._current["keys"]
+        assert (np.diff(keys) >= 0).all()   # rows stay ordered by strip and x
+        assert sorted(decomposition._current["ids"]) == list(range(400))
+    for _ in range(10):
+        single.step(attract, {})
+
+    assert (strip_of(single.store.positions[:, 0], 300, 4) != before).sum() > 20
+    assert np.allclose(split.store.positions, single.store.positions)
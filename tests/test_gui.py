@@ -0,0 +1,44 @@
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import pygame
+import pytest
+from particle_simulation.gui import ParticleGUI
+
+
+@pytest.fixture
+def gui():
+    pygame.init()
+    gui = ParticleGUI(1200, 800)
+    gui.create_controls()
+    return gui
+
+# Test that an unchanged panel is not drawn again
+def test_panel_is_cached(gui):
+    screen = pygame.Surface((1200, 800))
+    first = gui.draw(screen)
+
+    assert {rect.x for rect in first} == {900}
+    assert sum(rect.height for rect in first) == 800   # the whole panel on the first frame
+    assert gui.draw(screen) == []
+    gui.invalidate()
+    assert len(gui.draw(screen)) == len(first)
+
+# Test that only the changed section is redrawn
+def test_changed_widget_is_dirty(gui):
+    screen = pygame.Surface((1200, 800))
+    gui.draw(screen)
+    matrix = gui.controls['matrix']
+    gui.handle_matrix_click((900 + matrix['x'] + 5, matrix['y'] + 5))   # first attraction cell
+
+    assert gui.interaction_matrix['A_A']
+    dirty = gui.draw(screen)
+    assert len(dirty) == 1 and dirty[0].collidepoint(900 + matrix['x'] + 5, matrix['y'] + 5)
+    assert screen.get_at((900 + matrix['x'] + 5, matrix['y'] + 5))[:3] == gui.colors['active']
+
+    gui.repulsion_matrix['B_C'] = True    # changed from outside, e.g. by loading a checkpoint
+    gui.params['paused'] = True
+    assert len(gui.draw(screen)) == 2
+
+# Test that rendered labels are reused
+def test_text_cache(gui):
+    assert gui._render_text("Reset") is gui._render_text("Reset")
@@ -0,0 +1,129 @@
+import math
+import numpy as np
+from scipy.spatial import cKDTree
+from particle_simulation.interaction_kernels import (rules_to_matrix, force_matrix, pair_displacements,
+                                                     approximation_zones, far_field_displacements)
+
+LABELS = ["A", "B", "C", "D"]
+
+# All pairs closer than max_radius from one tree query
+def find_pairs(positions, max_radius):
+    pairs = cKDTree(positions).query_pairs(max_radius, output_type='ndarray')
+    return pairs[:, 0], pairs[:, 1]
+
+# Straightforward per-pair reference of the interaction rule
+def reference_displacements(positions, type_ids, strengths, radii, rule_matrix, min_distance):
+    displacement = np.zeros_like(positions)
+    for i in range(len(positions)):
+        for j in range(len(positions)):
+            factor = rule_matrix[type_ids[i], type_ids[j]]
+            if i == j or factor == 0:
+                continue
+            dx = positions[j, 0] - positions[i, 0]
+            dy = positions[j, 1] - positions[i, 1]
+            distance = math.sqrt(dx**2 + dy**2)
+            if distance > radii[i] or distance == 0:
+                continue
+            influence = strengths[i]
+            if distance - influence < min_distance:
+                influence = abs(distance - min_distance)
+            displacement[i, 0] += factor * dx / distance * influence
+            displacement[i, 1] += factor * dy / distance * influence
+    return displacement
+
+# Test conversion of the GUI dictionaries into a matrix
+def test_rules_to_matrix():
+    matrix = rules_to_matrix({"A_B": True, "D_A": True, "C_C": False}, LABELS)
+
+    assert matrix.shape == (4, 4)
+    assert matrix[0, 1] == 1 and matrix[3, 0] == 1
+    assert matrix.sum() == 2
+
+# Test the signed force matrix of weighted attractions and repulsions
+def test_force_matrix():
+    forces = force_matrix({"A_B": 0.5, "C_C": True}, {"A_B": True, "D_A": 2.0}, LABELS)
+
+    assert forces[0, 1] == -0.5 and forces[2, 2] == 1.0 and forces[3, 0] == -2.0
+    assert np.count_nonzero(forces) == 3
+
+# Test that the batched kernel matches the per-pair rule
+def test_pair_displacements_match_reference():
+    rng = np.random.default_rng(1)
+    positions = rng.uniform(0, 200, size=(150, 2))
+    type_ids = rng.integers(0, 4, size=150)
+    strengths = rng.uniform(0, 2, size=150)
+    radii = np.array([25.0, 50.0, 75.0, 100.0])[type_ids]
+    rule_matrix = rng.choice([-1.0, 0.0, 1.0], size=(4, 4))
+
+    pairs_i, pairs_j = find_pairs(positions, radii.max())
+    result = pair_displacements(positions, type_ids, strengths, radii, rule_matrix, 5, pairs_i, pairs_j)
+
+    expected = reference_displacements(positions, type_ids, strengths, radii, rule_matrix, 5)
+    assert np.allclose(result, expected)
+
+# Test that only the reacting type is moved
+def test_pair_displacements_direction():
+    positions = np.array([[10.0, 10.0], [30.0, 10.0]])
+    type_ids = np.array([0, 1])
+    strengths = np.array([1.0, 1.0])
+    radii = np.array([50.0, 50.0])
+    rule_matrix = rules_to_matrix({"A_B": True}, LABELS)
+
+    pairs_i, pairs_j = find_pairs(positions, 50)
+    attract = pair_displacements(positions, type_ids, strengths, radii, rule_matrix, 5, pairs_i, pairs_j)
+    repel = pair_displacements(positions, type_ids, strengths, radii, -rule_matrix, 5, pairs_i, pairs_j)
+
+    assert attract[0, 0] > 0 and attract[0, 1] == 0  # A is pulled towards B
+    assert repel[0, 0] < 0                            # A is pushed away from B
+    assert (attract[1] == 0).all()                    # B does not react to A
+
+# Test that only radii large enough for the far field grid are split
+def test_approximation_zones():
+    near, cell_size = approximation_zones(np.array([25.0, 100.0, 100.0]), 0.5)
+
+    assert cell_size == 25.0
+    assert list(near) == [25.0, 50.0, 50.0]   # the short radius stays exact
+
+# Exact displacements and near zone plus far field of the same arrangement
+def exact_and_approximate(positions, type_ids, radii, rule_matrix, width, height, theta):
+    strengths = np.full(len(positions), 0.5)
+    boxsize = np.array([width, height])
+    pairs = cKDTree(positions, boxsize=boxsize).query_pairs(radii.max(), output_type='ndarray')
+    exact = pair_displacements(positions, type_ids, strengths, radii, rule_matrix, 5, pairs[:, 0], pairs[:, 1],
+                               boxsize=boxsize)
+    near, cell_size = approximation_zones(radii, theta)
+    approximate = pair_displacements(positions, type_ids, strengths, near, rule_matrix, 5, pairs[:, 0],
+                                     pairs[:, 1], boxsize=boxsize)
+    approximate += far_field_displacements(positions, type_ids, strengths, radii, near, rule_matrix,
+                                           width, height, cell_size)
+    return exact, approximate
+
+# Test that near zone plus aggregated far field stay close to the exact forces
+def test_far_field_approximates_exact_forces():
+    rng = np.random.default_rng(4)
+    blobs = rng.random((8, 2)) * 400
+    clustered = np.mod(blobs[rng.integers(0, 8, 3000)] + rng.normal(0, 10, (3000, 2)), 400)
+    uniform = rng.random((4000, 2)) * 1000      # the pulls nearly cancel, so the net force is small
+    for positions, size, radius in ((clustered, 400.0, 80.0), (uniform, 1000.0, 100.0)):
+        type_ids = rng.integers(0, 4, len(positions))
+        radii = np.full(len(positions), radius)
+        for theta in (0.25, 0.5, 1.0):
+            exact, approximate = exact_and_approximate(positions, type_ids, radii, rng.uniform(-1, 1, (4, 4)),
+                                                       size, size, theta)
+            assert np.linalg.norm(approximate - exact) < 0.02 * np.linalg.norm(exact)
+
+    strengths = np.full(3000, 0.5)
+    radii = np.full(3000, 80.0)
+    near, cell_size = approximation_zones(radii, 0.5)
+    assert not far_field_displacements(clustered, type_ids[:3000], strengths, radii, radii, np.ones((4, 4)),
+                                       400.0, 400.0, cell_size).any()   # nothing beyond the near zone
+
+# Test that a cell on the edge of the near zone is neither counted twice nor dropped
+def test_far_field_counts_every_neighbor_once():
+    positions = np.array([[10.0, 10.0], [50.5, 10.0], [72.0, 8.0], [72.0, 9.0], [72.0, 11.0], [72.0, 12.0]])
+    radii = np.full(6, 100.0)
+    # one neighbor inside the near zone (radius 50) and four beyond it, all in the cell [50, 100) x [0, 50)
+    exact, approximate = exact_and_approximate(positions, np.zeros(6, dtype=int), radii, np.ones((1, 1)),
+                                               400.0, 400.0, 1.0)
+
+    assert np.allclose(approximate, exact)
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+from particle_simulation.interaction_matrix import InteractionMatrix
+from particle_simulation.interaction_kernels import force_matrix, rules_to_matrix
+from particle_simulation.main_classes import ParticleField
+
+# Test the dict adapter over the dense array
+def test_dict_view():
+    matrix = InteractionMatrix.from_rules({'A_B': True, 'C_D': 0.5, 'X_A': True}, ["A", "B", "C", "D"])
+
+    assert matrix.values[0, 1] == 1.0 and matrix.values[2, 3] == 0.5
+    assert matrix['A_B'] == 1.0 and not matrix['B_A']
+    assert len(dict(matrix)) == 16 and matrix.version == 0
+    with pytest.raises(KeyError):
+        matrix['A_X'] = True
+    np.testing.assert_array_equal(rules_to_matrix(matrix, ["A", "B", "C", "D"]),
+                                  rules_to_matrix(dict(matrix), ["A", "B", "C", "D"]))
+
+# Test that every change increments the version
+def test_version_counter():
+    matrix = InteractionMatrix(["A", "B"])
+    matrix.toggle(0, 1)
+    matrix['B_A'] = 0.5
+    copy = matrix.copy()
+    matrix.toggle(0, 1)
+
+    assert matrix.version == 3 and copy.version == 2
+    assert matrix['A_B'] == 0.0 and copy['A_B'] == 1.0
+
+# Test switching to other labels
+def test_relabel_and_reorder():
+    matrix = InteractionMatrix(["A", "B", "C"])
+    matrix['A_C'] = True
+    matrix['C_B'] = -1
+    relabelled = matrix.relabel(["C", "A", "E"])
+
+    assert relabelled['A_C'] == 1.0 and relabelled['C_A'] == 0.0
+    assert not relabelled.values[2].any()
+    np.testing.assert_array_equal(matrix.matrix_for(["C", "B"]), [[0.0, -1.0], [0.0, 0.0]])
+
+# Test that the field reuses the force matrix until one of the matrices changes
+def test_field_caches_force_matrix():
+    field = ParticleField(200, 200, 300, seed=1)
+    attract = InteractionMatrix(field.store.type_labels)
+    repel = InteractionMatrix(field.store.type_labels)
+    attract['A_B'] = True
+    repel['B_A'] = True
+
+    first = field._forces_for(attract, repel)
+    assert field._forces_for(attract, repel) is first
+    repel.toggle(1, 0)
+    second = field._forces_for(attract, repel)
+    assert second is not first and second[1, 0] == 0.0
+    np.testing.assert_array_equal(field._forces_for(attract.copy(), repel),
+                                  force_matrix(dict(attract), dict(repel), field.store.type_labels))
@@ -2,7 +2,8 @@ import pytest
 import random
 import pygame
 import math
-from particle_simulation.main_classes import ParticleField, Particle, interaction_effects
+import numpy as np
+from particle_simulation.main_classes import ParticleField, Particle, ParticleStore, interaction_effects
 
 # Mock Particle class for testing purposes
 class TestParticle(Particle):
@@ -98,6 +99,175 @@ def test_particle_min_distance():
                 # Particles should not overlap; the minimum distance should be respected
                 assert distance >= p1.min_distance
 
+# Test that the field keeps its particle data in a shared store
+def test_particle_store_views():
+    field = ParticleField(100, 100, 10)
+    store = field.store
+
+    assert len(store) == 10
+    assert store.positions.shape == (10, 2)
+    assert field.interactions.store is store  # interactions reuse the field's store
+
+    # Particles read and write through the store arrays
+    particle = field.particles[3]
+    particle.position = (12.5, 40.0)
+    assert tuple(store.positions[3]) == (12.5, 40.0)
+    store.influence_radii[3] = 77
+    assert particle.influence_radius == 77
+
+# Test that the field creates its Particle views lazily
+def test_particle_views_are_lazy():
+    from particle_simulation.particle_classes import PARTICLE_TYPES
+    field = ParticleField(100, 100, 10)
+
+    assert field.particles._views == [None] * 10   # nothing created yet
+    particle = field.particles[4]
+    assert particle is field.particles[4]           # views are reused
+    assert isinstance(particle, PARTICLE_TYPES[field.store.type_ids[4]])
+    assert particle.influence_radius == field.store.influence_radii[4]
+
+# Test the vectorized random walk
+def test_random_walk_wraps_positions():
+    field = ParticleField(100, 100, 50)
+    field.store.step_sizes.fill(500)  # large steps so that particles cross the edges
+    field.random_walk()
+
+    assert (field.store.positions >= 0).all()
+    assert (field.store.positions[:, 0] < field.width).all()
+    assert (field.store.positions[:, 1] < field.height).all()
+
+# Test that a seeded field is reproducible
+def test_seeded_field_is_reproducible():
+    rules = {"A_B": True, "C_C": True}
+    field_1 = ParticleField(100, 100, 50, seed=5)
+    field_2 = ParticleField(100, 100, 50, seed=5)
+    for field in (field_1, field_2):
+        for _ in range(3):
+            field.step(rules, {"D_A": True})
+
+    assert field_1.seed == 5
+    assert np.array_equal(field_1.store.type_ids, field_2.store.type_ids)
+    assert np.array_equal(field_1.store.colors, field_2.store.colors)
+    assert np.array_equal(field_1.store.positions, field_2.store.positions)
+    assert not np.array_equal(ParticleField(100, 100, 50, seed=6).store.type_ids, field_1.store.type_ids)
+
+# Test that the fused force pass does not depend on the particle order
+def test_apply_forces_is_order_independent():
+    forces = np.array([[0.5, -1.0, 0.0, 0.2], [1.0, 0.0, -0.3, 0.0], [0.0, 0.7, -1.0, 0.0], [-0.5, 0.0, 0.0, 1.0]])
+    field = ParticleField(200, 200, 300, seed=3)
+    order = np.random.default_rng(0).permutation(300)
+    arrays = {name: getattr(field.store, name)[order] for name in ParticleStore.ARRAYS}
+    shuffled = ParticleField(200, 200, 300, store=ParticleStore(**arrays))
+    field.interactions.apply_forces(forces)
+    shuffled.interactions.apply_forces(forces)
+
+    assert np.allclose(shuffled.store.positions, field.store.positions[order])
+
+# Test that one step applies attraction and repulsion as one signed matrix
+def test_step_uses_signed_force_matrix():
+    field_1 = ParticleField(150, 150, 200, seed=4)
+    field_2 = ParticleField(150, 150, 200, seed=4)
+    field_1.step({"A_B": True, "C_C": 0.5}, {"A_B": 0.25, "D_A": True})
+    forces = np.zeros((4, 4))
+    forces[0, 1], forces[2, 2], forces[3, 0] = 0.75, 0.5, -1.0
+    field_2.step(forces=forces)
+
+    assert np.allclose(field_1.store.positions, field_2.store.positions)
+
+# Test that unknown labels get their own type id
+def test_particle_store_type_ids():
+    particles = [TestParticle((10, 10), "A"), TestParticle((20, 20), "D"), TestParticle((30, 30), "E")]
+    store = ParticleStore.from_particles(particles)
+
+    assert list(store.type_ids) == [0, 3, 4]
+    assert store.type_labels[4] == "E"
+
+# Test that colors come from the cached per-type palettes
+def test_color_palettes():
+    palette = Particle.color_palette("Particle_A")
+    assert palette.shape == (Particle.PALETTE_SIZE, 3)
+    assert Particle.color_palette("Particle_A") is palette   # generated only once
+
+    field = ParticleField(100, 100, 50, seed=3)
+    store = field.store
+    assert store.palette_ids.dtype == np.uint8
+    rgb = store.colors_rgb()
+    assert rgb.dtype == np.uint8 and rgb.shape == (50, 3)
+    assert np.array_equal(rgb[7], store.palettes_rgb[store.type_ids[7], store.palette_ids[7]])
+    assert field.particles[7].color == tuple(store.colors[7])
+
+# Test growing and shrinking a field in place
+def test_resize_keeps_existing_particles():
+    field = ParticleField(200, 200, 100, seed=7)
+    field.apply_params({'base_speed': 0.7, 'influence_radius': 30, 'attraction_strength': 0.4})
+    field.step({"A_B": True}, {})
+    interactions, store = field.interactions, field.store
+    before = store.positions.copy()
+
+    field.resize(150)
+    assert len(field.particles) == len(store) == field.num_particles == 150
+    assert np.array_equal(store.positions[:100], before)      # existing particles are untouched
+    assert (store.step_sizes == 0.7).all() and (store.influence_radii == 30).all()
+    assert field.interactions is interactions and interactions.store is store
+
+    field.resize(40)
+    assert len(store) == 40 and store.palette_ids.dtype == np.uint8
+    assert all(any(np.array_equal(p, q) for q in before) for p in store.positions[:10])
+    field.step({"A_B": True}, {"C_D": True})
+
+# Test that the incrementally updated pair list matches a full rebuild
+def test_resize_updates_neighbor_pairs():
+    from particle_simulation.spatial_index import PeriodicNeighborIndex
+    field = ParticleField(300, 300, 200, seed=8)
+    field.step({"A_B": True}, {})   # builds the index
+    index = field.interactions.neighbor_index
+    builds = index.builds
+    field.resize(260)
+    field.resize(180)
+    assert index.builds == builds   # no full rebuild
+
+    positions, type_ids = field.store.positions, field.store.type_ids
+    reference = PeriodicNeighborIndex(300, 300, skin=index.skin)
+    reference.build(positions, index.cutoff, type_ids)
+    full = set(zip(reference.pairs_i.tolist(), reference.pairs_j.tolist()))
+    incremental = set(zip(index.pairs_i.tolist(), index.pairs_j.tolist()))
+    assert index.directed   # the classic species have different radii
+    close = {(i, j) for i, j in full   # not wrapped, a subset is enough
+             if np.linalg.norm(positions[i] - positions[j]) <= index.cutoff[type_ids[i]]}
+    assert close <= incremental
+
+# Test that the species radii survive the GUI parameters
+def test_apply_params_keeps_species_radii():
+    field = ParticleField(100, 100, 200, seed=2)
+    params = {'base_speed': 0.3, 'influence_radius': 40, 'attraction_strength': 0.5}
+    field.apply_params(params)
+    assert (field.store.influence_radii == 40).all()
+
+    field.apply_params(dict(params, species_radii=True))
+    assert np.array_equal(field.store.influence_radii, field.species.influence_radii[field.store.type_ids])
+    assert (field.store.step_sizes == 0.3).all()
+
+# Test that a reset reuses the interaction manager and draws a new seed
+def test_reset_reuses_interactions():
+    field = ParticleField(100, 100, 50, seed=1)
+    interactions = field.interactions
+    field.reset(80, seed=2)
+
+    assert field.interactions is interactions
+    assert interactions.store is field.store and len(field.store) == 80
+    assert field.seed == 2
+    assert interactions.neighbor_index.tree is None   # rebuilt lazily on the next step
+
+# Test that an unknown force backend is rejected
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        ParticleField(100, 100, 10, backend="gpu")
+
+# Test that the approximation parameter is validated
+def test_invalid_approximation():
+    with pytest.raises(ValueError):
+        ParticleField(100, 100, 10, approximate=0)
+
 # Run the tests
 if __name__ == "__main__":
     pytest.main()
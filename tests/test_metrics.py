@@ -0,0 +1,70 @@
+import csv
+import numpy as np
+from scipy.spatial import cKDTree
+from particle_simulation.main_classes import ParticleField
+from particle_simulation.metrics import MetricsWriter, field_metrics, flatten_metrics, stream_metrics
+
+PARAMS = {'base_speed': 0.2, 'influence_radius': 40, 'attraction_strength': 0.5}
+
+# Field with uniformly random positions
+def random_field(n=1500, seed=1):
+    field = ParticleField(400, 300, n, seed=seed)
+    field.apply_params(PARAMS)
+    field.store.positions[:] = np.random.default_rng(seed).random((n, 2)) * (400, 300)
+    return field
+
+# Test the nearest neighbor distance against a direct tree query
+def test_nearest_neighbor_distance():
+    field = random_field()
+    metrics = field_metrics(field)
+
+    distances, _ = cKDTree(field.store.positions, boxsize=(400, 300)).query(field.store.positions, k=2)
+    assert np.isclose(metrics['mean_nn_distance'], distances[:, 1].mean())
+    assert 0.8 < metrics['clark_evans'] < 1.2 and metrics['isolated'] == 0
+
+# Test that a uniform arrangement has a flat radial distribution function
+def test_rdf_of_uniform_field():
+    metrics = field_metrics(random_field(4000), rdf_bins=8)
+
+    assert len(metrics['rdf']) == 8
+    assert np.allclose(metrics['rdf'][2:], 1.0, atol=0.15)
+    assert len(metrics['density']) == 64 and sum(metrics['density']) == 4000
+
+# Test the cluster counts of hand placed clumps
+def test_cluster_counts():
+    field = ParticleField(400, 300, 100, seed=2)
+    field.apply_params(PARAMS)
+    rng = np.random.default_rng(2)
+    field.store.type_ids[:] = 1                      # scattered B particles
+    field.store.positions[:] = rng.random((100, 2)) * (400, 300)
+    for clump, centre in enumerate([(50, 50), (200, 150), (398, 150)]):   # the last one wraps around the edge
+        rows = slice(clump * 10, clump * 10 + 10)
+        field.store.type_ids[rows] = 0
+        field.store.positions[rows] = np.mod(centre + rng.normal(0, 1.0, (10, 2)), (400, 300))
+
+    metrics = field_metrics(field, link_distance=6)
+    assert metrics['clusters_A'] == 3
+    assert metrics['largest_cluster'] == 0.1
+
+# Test that measuring after a force step reuses the neighbor index of that step
+def test_metrics_reuse_force_pairs():
+    field = random_field(500)
+    field.step({'A_B': 0.01}, {})
+    tree = field.interactions.neighbor_index.tree
+    field_metrics(field)
+
+    assert field.interactions.neighbor_index.tree is tree
+
+# Test the generator and the append-only CSV file
+def test_stream_and_write(tmp_path):
+    field = random_field(300)
+    path = tmp_path / "metrics.csv"
+    with MetricsWriter(str(path)) as writer:
+        for step, metrics in stream_metrics(field, 6, 3, {'A_A': True}, {}):
+            writer.write(step, metrics)
+    with MetricsWriter(str(path)) as writer:   # a second run continues the file
+        writer.write(9, field_metrics(field))
+
+    rows = list(csv.DictReader(path.open()))
+    assert [row['step'] for row in rows] == ["3", "6", "9"]
+    assert set(flatten_metrics(field_metrics(field))) | {'step'} == set(rows[0])
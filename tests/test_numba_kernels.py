@@ -0,0 +1,102 @@
+import math
+import numpy as np
+from particle_simulation.numba_kernels import grid_shape, cell_list_displacements
+from particle_simulation.main_classes import ParticleField
+
+# Per-pair reference of the interaction rule on a torus
+def periodic_reference(positions, type_ids, strengths, radii, rule_matrix, min_distance, width, height):
+    displacement = np.zeros_like(positions)
+    for i in range(len(positions)):
+        for j in range(len(positions)):
+            factor = rule_matrix[type_ids[i], type_ids[j]]
+            if i == j or factor == 0:
+                continue
+            dx = positions[j, 0] - positions[i, 0]
+            dy = positions[j, 1] - positions[i, 1]
+            dx -= width * round(dx / width)  # minimum image
+            dy -= height * round(dy / height)
+            distance = math.sqrt(dx**2 + dy**2)
+            if distance > radii[i] or distance == 0:
+                continue
+            influence = strengths[i]
+            if distance - influence < min_distance:
+                influence = abs(distance - min_distance)
+            displacement[i, 0] += factor * dx / distance * influence
+            displacement[i, 1] += factor * dy / distance * influence
+    return displacement
+
+# Test the grid is never finer than the largest radius
+def test_grid_shape():
+    assert grid_shape(300, 200, 100) == (3, 2, 100.0, 100.0)
+    assert grid_shape(250, 50, 100) == (2, 1, 125.0, 50.0)
+
+# Test the cell list kernel against the periodic reference
+def test_cell_list_matches_periodic_reference():
+    rng = np.random.default_rng(7)
+    width, height = 320.0, 240.0
+    positions = rng.uniform(0, 1, size=(200, 2)) * (width, height)
+    type_ids = rng.integers(0, 4, size=200)
+    strengths = rng.uniform(0, 2, size=200)
+    radii = np.array([25.0, 50.0, 75.0, 100.0])[type_ids]
+    rule_matrix = rng.choice([-1.0, 0.0, 1.0], size=(4, 4))
+
+    result = cell_list_displacements(positions, type_ids, strengths, radii, rule_matrix, 5, width, height)
+    expected = periodic_reference(positions, type_ids, strengths, radii, rule_matrix, 5, width, height)
+    assert np.allclose(result, expected)
+
+# Test the per-particle cell reach with very different radii
+def test_cell_list_mixed_radii():
+    rng = np.random.default_rng(9)
+    width, height = 400.0, 300.0
+    positions = rng.uniform(0, 1, size=(300, 2)) * (width, height)
+    type_ids = rng.integers(0, 3, size=300)
+    radii = np.array([8.0, 30.0, 140.0])[type_ids]
+    strengths = np.ones(300)
+    rule_matrix = rng.uniform(-1, 1, size=(3, 3))
+
+    result = cell_list_displacements(positions, type_ids, strengths, radii, rule_matrix, 5, width, height)
+    expected = periodic_reference(positions, type_ids, strengths, radii, rule_matrix, 5, width, height)
+    assert np.allclose(result, expected)
+
+# Test that neighbours across the field edge interact
+def test_cell_list_wraps_around_edges():
+    positions = np.array([[2.0, 50.0], [398.0, 50.0]])
+    result = cell_list_displacements(positions, np.array([0, 0]), np.ones(2), np.full(2, 20.0),
+                                     np.ones((1, 1)), 1, 400.0, 100.0)
+
+    assert result[0, 0] < 0  # pulled to the left, across the edge
+    assert result[1, 0] > 0
+
+# Test the numba backend through the interaction_effects API
+def test_numba_backend_field():
+    field = ParticleField(200, 200, 100, backend="numba")
+    field.interactions.attract_particles({"A_A": True, "B_B": True, "C_C": True, "D_D": True})
+
+    assert field.interactions.backend == "numba"
+    assert (field.store.positions >= 0).all()
+    assert (field.store.positions[:, 0] < 200).all()
+
+# Test that both backends give the same periodic result
+def test_backends_agree():
+    rules = {f"{a}_{b}": (i + j) % 2 == 1 for i, a in enumerate("ABCD") for j, b in enumerate("ABCD")}
+    kdtree_field = ParticleField(300, 200, 300)
+    numba_field = ParticleField(300, 200, 300, backend="numba")
+    for name in ("positions", "type_ids", "influence_radii", "influence_strengths"):
+        getattr(numba_field.store, name)[:] = getattr(kdtree_field.store, name)
+
+    kdtree_field.interactions.attract_particles(rules)
+    numba_field.interactions.attract_particles(rules)
+    assert np.allclose(kdtree_field.store.positions, numba_field.store.positions)
+
+# Test that both backends agree in approximate mode (same near zone, same far field)
+def test_backends_agree_approximate():
+    forces = np.random.default_rng(5).uniform(-1, 1, (4, 4))
+    kdtree_field = ParticleField(300, 200, 600, seed=3, approximate=0.5)
+    numba_field = ParticleField(300, 200, 600, seed=3, backend="numba", approximate=0.5)
+    kdtree_field.store.influence_radii.fill(80)
+    numba_field.store.influence_radii.fill(80)
+
+    kdtree_field.interactions.apply_forces(forces)
+    numba_field.interactions.apply_forces(forces)
+    assert np.allclose(kdtree_field.store.positions, numba_field.store.positions)
+    assert kdtree_field.interactions.neighbor_index.cutoff == 40   # only the near zone is searched
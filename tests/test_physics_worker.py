@@ -0,0 +1,63 @@
+import time
+import numpy as np
+import pytest
+from particle_simulation.main_classes import ParticleField
+from particle_simulation.physics_worker import PhysicsWorker
+
+# Wait until the worker published a snapshot matching the condition
+def wait_for(worker, condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        snapshot = worker.snapshot()
+        if condition(snapshot):
+            return snapshot
+        time.sleep(0.01)
+    raise AssertionError("worker did not publish the expected snapshot")
+
+# Test that the worker steps the field and publishes copies of the positions
+def test_worker_publishes_snapshots():
+    field = ParticleField(100, 100, 50, seed=1)
+    start = field.store.positions.copy()
+    worker = PhysicsWorker(field, {"A_B": True}, {})
+    first = worker.snapshot()   # before the thread starts, it may step right away
+    assert np.array_equal(first.positions, start)
+    assert first.colors.shape == (50, 3)
+
+    with worker:
+        snapshot = wait_for(worker, lambda s: s.steps >= 5)
+        assert snapshot.positions is not field.store.positions   # the render loop reads a copy
+        assert not np.array_equal(snapshot.positions, start)
+    assert worker.steps >= 5
+
+# Test that commands reach the physics thread
+def test_worker_commands():
+    field = ParticleField(100, 100, 50, seed=1)
+    with PhysicsWorker(field, {}, {}) as worker:
+        worker.set_paused(True)
+        worker.set_params({'base_speed': 1.5, 'influence_radius': 30, 'attraction_strength': 0.2})
+        worker.reset(20, seed=4)
+        snapshot = wait_for(worker, lambda s: s.seed == 4)
+        assert len(snapshot.positions) == 20
+
+        steps = worker.steps
+        time.sleep(0.1)
+        assert worker.steps == steps   # paused
+    assert (worker.field.store.step_sizes == 1.5).all()   # sliders are kept after the reset
+
+# Test that an error in the physics thread surfaces in the GUI thread
+def test_worker_error_is_raised():
+    field = ParticleField(100, 100, 10, seed=1)
+    worker = PhysicsWorker(field, {"A_B": "on"}, {}).start()   # not a number, fails in the thread
+    with pytest.raises(RuntimeError):
+        wait_for(worker, lambda s: False, timeout=5.0)
+    worker.stop()
+
+# Test that a worker on a restored field continues the step counter of the checkpoint
+def test_worker_continues_step_count():
+    field = ParticleField(100, 100, 10, seed=1)
+    worker = PhysicsWorker(field, {}, {}, steps=40)
+
+    assert worker.snapshot().steps == 40
+    with worker:
+        snapshot = wait_for(worker, lambda s: s.steps > 40)
+    assert snapshot.steps > 40
@@ -0,0 +1,61 @@
+import csv
+import json
+import time
+from particle_simulation.main_classes import ParticleField
+from particle_simulation.profiling import NULL_TIMER, StageTimer
+
+# Test that nested stages are not counted twice
+def test_nested_stages_are_exclusive():
+    timer = StageTimer()
+    with timer.stage("outer"):
+        time.sleep(0.01)
+        with timer.stage("inner"):
+            time.sleep(0.02)
+    timer.end_frame()
+
+    frame = timer.trace[0]
+    assert 0.009 < frame['outer'] < 0.019
+    assert frame['inner'] >= 0.02
+
+# Test the rolling window and percentiles
+def test_rolling_percentiles():
+    timer = StageTimer(window=3, keep_trace=False)
+    for seconds in (10.0, 1.0, 2.0, 3.0):
+        timer._current["draw"] = seconds
+        timer.end_frame()
+
+    assert timer.percentiles("draw", q=(50,)) == {50: 2.0}   # the first frame left the window
+    assert timer.percentiles("unknown") == {}
+    assert timer.frames == 4
+    assert timer.trace == []   # only kept when a trace file is requested
+
+# Test that a field step reports its physics stages
+def test_field_step_stages():
+    timer = StageTimer()
+    field = ParticleField(100, 100, 50, seed=1, timer=timer)
+    field.step({"A_B": True}, {"C_D": True})
+    timer.end_frame()
+
+    assert {"random_walk", "spatial_index", "forces"} <= set(timer.trace[0])
+    assert ParticleField(100, 100, 5).timer is NULL_TIMER
+
+# Test the CSV and JSON traces
+def test_write_trace(tmp_path):
+    timer = StageTimer()
+    for _ in range(2):
+        with timer.stage("events"):
+            pass
+        timer.end_frame()
+    with timer.stage("draw"):
+        pass
+    timer.end_frame()
+
+    timer.write_trace(tmp_path / "trace.csv")
+    rows = list(csv.DictReader(open(tmp_path / "trace.csv")))
+    assert [row['frame'] for row in rows] == ["0", "1", "2"]
+    assert rows[0]['draw'] == "0.0"
+
+    timer.write_trace(tmp_path / "trace.json")
+    trace = json.loads((tmp_path / "trace.json").read_text())
+    assert trace['stages'] == ["events", "draw"]
+    assert len(trace['frames']) == 3 and "50" in trace['summary']['draw']
@@ -0,0 +1,53 @@
+import numpy as np
+import pygame
+from particle_simulation.renderer import ParticleRenderer, disc_offsets, fit_scale
+
+# Test the shape of the disc sprite
+def test_disc_offsets():
+    dx, dy = disc_offsets(3)
+
+    assert len(dx) == len(dy)
+    assert (dx**2 + dy**2 <= 9).all()
+    assert (0, 0) in zip(dx.tolist(), dy.tolist())
+    assert (3, 0) in zip(dx.tolist(), dy.tolist())
+
+# Test that particles are drawn with their color at the flipped position
+def test_render_stamps_particles():
+    renderer = ParticleRenderer(100, 50)
+    positions = np.array([[10.0, 10.0], [90.0, 45.0]])
+    colors = np.array([[255, 0, 0], [0, 255, 0]], dtype=np.uint8)
+    surface = renderer.render(positions, colors)
+
+    assert tuple(surface.get_at((10, 40)))[:3] == (255, 0, 0)   # y = 10 is 10 pixels above the bottom
+    assert tuple(surface.get_at((90, 5)))[:3] == (0, 255, 0)
+    assert tuple(surface.get_at((50, 25)))[:3] == (0, 0, 0)
+
+# Test that discs crossing the border are clipped and the frame is cleared
+def test_render_clips_and_clears():
+    renderer = ParticleRenderer(20, 20)
+    colors = np.array([[0, 0, 255]], dtype=np.uint8)
+    renderer.render(np.array([[0.0, 0.5]]), colors)
+    assert tuple(renderer.surface.get_at((0, 19)))[:3] == (0, 0, 255)
+
+    surface = renderer.render(np.empty((0, 2)), np.empty((0, 3), dtype=np.uint8))
+    assert tuple(surface.get_at((0, 19)))[:3] == (0, 0, 0)
+
+# Test blitting onto a larger target
+def test_draw_blits_onto_target():
+    target = pygame.Surface((60, 30))
+    renderer = ParticleRenderer(40, 30)
+    rect = renderer.draw(target, np.array([[5.0, 5.0]]), np.array([[9, 9, 9]], dtype=np.uint8))
+
+    assert rect.width == 40
+    assert tuple(target.get_at((5, 25)))[:3] == (9, 9, 9)
+
+# Test that a field larger than the window is shrunk to fit
+def test_render_scaled_field():
+    scale = fit_scale(20000, 10000, 800, 800)
+    renderer = ParticleRenderer(800, 400, radius=1, scale=scale)
+    colors = np.array([[255, 0, 0], [0, 255, 0]], dtype=np.uint8)
+    surface = renderer.render(np.array([[10000.0, 5000.0], [19900.0, 100.0]]), colors)
+
+    assert scale == 0.04 and fit_scale(300, 200, 800, 800) == 1.0
+    assert tuple(surface.get_at((400, 200)))[:3] == (255, 0, 0)   # the centre stays the centre
+    assert tuple(surface.get_at((796, 396)))[:3] == (0, 255, 0)
@@ -0,0 +1,60 @@
+import pytest
+from particle_simulation.scheduler import StepScheduler
+
+# Manually advanced clock for deterministic timing
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+# Test the fixed number of substeps per frame
+def test_fixed_substeps():
+    scheduler = StepScheduler(substeps=4)
+
+    assert list(scheduler.frame_steps()) == [0, 1, 2, 3]
+    assert scheduler.total_steps == 4 and scheduler.frames == 1
+
+# Test that the adaptive mode runs the steps that are due
+def test_adaptive_runs_due_steps():
+    clock = FakeClock()
+    scheduler = StepScheduler(adaptive=True, physics_hz=8, min_fps=1, clock=clock)
+
+    clock.now = 0.5
+    assert len(list(scheduler.frame_steps())) == 4
+    clock.now = 0.5625
+    assert len(list(scheduler.frame_steps())) == 0   # half a step is carried over
+    clock.now = 0.625
+    assert len(list(scheduler.frame_steps())) == 1
+
+# Test that slow steps drop frames instead of slowing the simulation
+def test_adaptive_drops_frames_when_behind():
+    clock = FakeClock()
+    scheduler = StepScheduler(adaptive=True, physics_hz=100, min_fps=10, max_backlog=1000, clock=clock)
+
+    clock.now = 1.0
+    steps = 0
+    for _ in scheduler.frame_steps():
+        clock.now += 0.02   # every step takes two timesteps of wall time
+        steps += 1
+    assert steps == 5       # the frame is drawn after 1 / min_fps seconds
+    assert scheduler.backlog == 95
+
+# Test the backlog cap and resync
+def test_backlog_cap_and_resync():
+    clock = FakeClock()
+    scheduler = StepScheduler(adaptive=True, physics_hz=100, min_fps=10, clock=clock)
+
+    clock.now = 10.0
+    assert len(list(scheduler.frame_steps())) == scheduler.max_backlog == 10
+    clock.now = 20.0
+    scheduler.resync()
+    assert list(scheduler.frame_steps()) == []
+
+# Test invalid settings
+def test_invalid_settings():
+    with pytest.raises(ValueError):
+        StepScheduler(substeps=0)
+    with pytest.raises(ValueError):
+        StepScheduler(physics_hz=0)
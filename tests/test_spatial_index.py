@@ -0,0 +1,75 @@
+import numpy as np
+from particle_simulation.spatial_index import PeriodicNeighborIndex, minimum_image
+from particle_simulation.main_classes import ParticleField
+
+# Test the shortest vector on the torus
+def test_minimum_image():
+    boxsize = np.array([100.0, 50.0])
+    delta = np.array([[90.0, -40.0], [10.0, 5.0]])
+
+    assert np.allclose(minimum_image(delta, boxsize), [[-10.0, 10.0], [10.0, 5.0]])
+
+# Test that pairs across the wrapped edges are found
+def test_pairs_across_edges():
+    index = PeriodicNeighborIndex(100, 100, skin=0)
+    index.build(np.array([[1.0, 50.0], [99.0, 50.0], [50.0, 50.0]]), cutoff=5)
+
+    assert list(zip(index.pairs_i, index.pairs_j)) == [(0, 1)]
+
+# Test that the tree is only rebuilt after particles moved more than half the skin
+def test_verlet_rebuild_threshold():
+    rng = np.random.default_rng(3)
+    positions = rng.uniform(0, 100, size=(50, 2))
+    index = PeriodicNeighborIndex(100, 100, skin=4)
+    index.build(positions, cutoff=10)
+
+    assert not index.update(np.mod(positions + 1.0, 100), cutoff=10)  # moved sqrt(2) < 2
+    assert index.update(np.mod(positions + 3.0, 100), cutoff=10)      # moved sqrt(18) > 2
+    assert index.update(np.mod(positions + 3.0, 100), cutoff=20)      # cutoff grew
+    assert index.builds == 3
+
+# Test that the pair list stays complete while particles move within the skin
+def test_verlet_pairs_remain_complete():
+    rng = np.random.default_rng(4)
+    positions = rng.uniform(0, 100, size=(200, 2))
+    index = PeriodicNeighborIndex(100, 100, skin=6)
+    index.build(positions, cutoff=10)
+
+    moved = np.mod(positions + rng.uniform(-2, 2, size=positions.shape), 100)
+    assert not index.update(moved, cutoff=10)
+
+    delta = minimum_image(moved[:, None, :] - moved[None, :, :], index.boxsize)
+    close = np.argwhere(np.triu(np.hypot(delta[..., 0], delta[..., 1]) <= 10, k=1))
+    listed = set(zip(index.pairs_i.tolist(), index.pairs_j.tolist()))
+    assert all((i, j) in listed for i, j in close.tolist())
+
+# Test that per-type cutoffs find every directed pair with fewer candidates
+def test_per_type_cutoffs():
+    rng = np.random.default_rng(5)
+    positions = rng.uniform(0, 200, size=(400, 2))
+    type_ids = rng.integers(0, 3, size=400)
+    cutoffs = np.array([5.0, 10.0, 30.0])
+    index = PeriodicNeighborIndex(200, 200, skin=2)
+    index.build(positions, cutoffs, type_ids)
+    uniform = PeriodicNeighborIndex(200, 200, skin=2)
+    uniform.build(positions, cutoffs.max())
+
+    delta = minimum_image(positions[:, None, :] - positions[None, :, :], index.boxsize)
+    distance = np.hypot(delta[..., 0], delta[..., 1])
+    needed = np.argwhere((distance <= cutoffs[type_ids][:, None]) & ~np.eye(400, dtype=bool))
+    listed = set(zip(index.pairs_i.tolist(), index.pairs_j.tolist()))
+    assert index.directed
+    assert all((i, j) in listed for i, j in needed.tolist())
+    assert len(index.pairs_i) < 2 * len(uniform.pairs_i)   # directed pairs of the uniform search
+    assert not index.update(positions, cutoffs, type_ids)
+    assert index.update(positions, cutoffs * 2, type_ids)
+
+# Test that neighbor search sees particles across the wrapped boundary
+def test_find_particles_across_boundary():
+    field = ParticleField(100, 100, 4)
+    effect = field.interactions
+    field.store.positions[:] = [[1.0, 50.0], [98.0, 50.0], [50.0, 1.0], [50.0, 50.0]]
+    field.store.influence_radii.fill(10)
+
+    neighbors = effect.find_particles_within_reactionradius(field.particles[0])
+    assert neighbors == [field.particles[1]]
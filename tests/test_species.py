@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+from particle_simulation.species import SpeciesRegistry, color_range, label_index, species_label
+from particle_simulation.particle_classes import PARTICLE_TYPES
+from particle_simulation.main_classes import ParticleField, Particle, ParticleStore
+from particle_simulation.checkpoint import load_checkpoint, save_checkpoint
+
+# Test the labels of the generated species
+def test_species_labels():
+    labels = [species_label(i) for i in range(30)]
+
+    assert labels[:5] == ["A", "B", "C", "D", "E"] and labels[26:28] == ["AA", "AB"]
+    assert [label_index(label) for label in labels] == list(range(30))
+    assert label_index("Particle_A") is None
+
+# Test that the classic registry matches the particle classes
+def test_classic_registry():
+    registry = SpeciesRegistry.classic()
+
+    assert registry.labels == ["A", "B", "C", "D"]
+    assert list(registry.influence_radii) == [t.default_influence_radius for t in PARTICLE_TYPES]
+    assert color_range("B") == PARTICLE_TYPES[1].color_range
+    with pytest.raises(ValueError):
+        SpeciesRegistry(["A", "A_B"], [0.2, 0.2], [1, 1], [50, 50])
+
+# Test a field with more than four species
+def test_field_with_sixteen_species():
+    registry = SpeciesRegistry.generate(16, seed=1)
+    field = ParticleField(300, 300, 2000, seed=2, species=registry)
+    forces = np.random.default_rng(3).uniform(-1, 1, size=(16, 16))
+    field.step(forces=forces)
+
+    assert field.store.type_labels == registry.labels
+    assert set(np.unique(field.store.type_ids)) == set(range(16))
+    assert np.array_equal(field.store.influence_radii, registry.influence_radii[field.store.type_ids])
+    assert (field.store.palettes[4:] != 1.0).any()   # generated species get their own palettes
+    assert field.particles[0].particle_label == f"Particle_{registry.labels[field.store.type_ids[0]]}"
+
+# Test that multi character labels are kept by from_particles
+def test_from_particles_keeps_long_labels():
+    particle = Particle((1, 1))
+    particle.particle_label = "Particle_AB"
+    particle.step_size, particle.influence_radius, particle.palette_index = 0.2, 10, 0
+    store = ParticleStore.from_particles([particle])
+
+    assert store.type_labels[store.type_ids[0]] == "AB"
+
+# Test that the species table is saved with a checkpoint
+def test_checkpoint_keeps_species(tmp_path):
+    registry = SpeciesRegistry.generate(6, seed=4)
+    field = ParticleField(100, 100, 50, seed=5, species=registry)
+    save_checkpoint(tmp_path / "state.npz", field, {}, {})
+    restored = load_checkpoint(tmp_path / "state.npz")
+
+    assert restored.field.species.to_dict() == registry.to_dict()
@@ -0,0 +1,36 @@
+import json
+from particle_simulation.main_classes import ParticleField
+from particle_simulation.sweep import grid_configs, random_configs, run_sweep
+
+# Test that the grid covers every combination
+def test_grid_configs():
+    configs = grid_configs(["none", "A_B"], ["C_D"], {'influence_radius': [25, 50], 'base_speed': [0.2]})
+
+    assert len(configs) == 4
+    assert {c['attract'] for c in configs} == {"none", "A_B"}
+    assert all(c['repel'] == "C_D" and c['base_speed'] == 0.2 for c in configs)
+
+# Test that random sampling is reproducible
+def test_random_configs_reproducible():
+    assert random_configs(5, seed=3) == random_configs(5, seed=3)
+    assert random_configs(5, seed=3) != random_configs(5, seed=4)
+
+# Test a small sweep in two worker processes
+def test_run_sweep(tmp_path):
+    output = tmp_path / "sweep.jsonl"
+    configs = grid_configs(["none", "A_A,B_B"], ["none"])
+    results = run_sweep(configs, 100, 200, 200, 3, str(output), workers=2, seed=5)
+
+    lines = [json.loads(line) for line in output.read_text().splitlines()]
+    assert len(lines) == len(results) == 2
+    assert sorted(r['run'] for r in lines) == [0, 1]
+    assert lines[0]['seed'] != lines[1]['seed']     # every run has its own seed
+    assert all(r['mean_nn_distance'] > 0 for r in lines)
+
+# Test that a sweep still finishes after the numba kernel ran in the parent process
+def test_run_sweep_after_numba(tmp_path):
+    ParticleField(200, 200, 100, backend="numba").step({"A_A": True}, {})
+
+    output = tmp_path / "sweep.jsonl"
+    results = run_sweep(grid_configs(["A_A"], ["none"]), 100, 200, 200, 2, str(output), workers=2, seed=1)
+    assert len(results) == 1
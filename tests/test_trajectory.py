@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+from particle_simulation.batch import parse_matrix, run_batch
+from particle_simulation.main_classes import ParticleField
+from particle_simulation.trajectory import TrajectoryReader, TrajectoryWriter
+
+# Test writing every k-th step and reading it back
+def test_record_and_read(tmp_path):
+    field = ParticleField(100, 100, 30, seed=2)
+    path = tmp_path / "traj"
+    with TrajectoryWriter(path, field.store, 100, 100, steps=10, every=3, seed=2) as writer:
+        expected = []
+        for step in range(11):
+            if writer.record(field.store.positions, step):
+                expected.append(field.store.positions.astype(np.float32))
+            field.step({"A_B": True}, {})
+    assert writer.frames == 4   # steps 0, 3, 6, 9
+
+    trajectory = TrajectoryReader(path)
+    assert len(trajectory) == 4
+    assert trajectory.positions.dtype == np.float32
+    assert np.array_equal(trajectory[2], expected[2])
+    assert trajectory.step_of(3) == 9
+    assert np.array_equal(trajectory.colors_rgb(), field.store.colors_rgb())
+    assert trajectory.meta['seed'] == 2
+
+# Test the step interval check
+def test_invalid_interval(tmp_path):
+    field = ParticleField(100, 100, 5)
+    with pytest.raises(ValueError):
+        TrajectoryWriter(tmp_path, field.store, 100, 100, steps=5, every=0)
+
+# Test recording from the batch runner, the last frame matches the final field
+def test_batch_records_trajectory(tmp_path):
+    path = tmp_path / "run"
+    field, summary = run_batch(80, 200, 200, 20, parse_matrix("A_B"), parse_matrix("none"),
+                               seed=3, record=str(path), record_every=5)
+
+    trajectory = TrajectoryReader(path)
+    assert summary['recorded_frames'] == len(trajectory) == 5
+    assert np.allclose(trajectory[-1], field.store.positions, atol=1e-4)